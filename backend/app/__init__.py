@@ -1,14 +1,25 @@
-from quart import Quart
+from quart import Quart, g, has_app_context
 from quart_cors import cors
 import mariadb
+import click
 import os
-import threading
 import functools
 import asyncio
 from .config import Config, config
+from .utils.db_pool import DatabasePool
+from .migrations import run_migrations
+from .utils.executors import configure_event_loop, shutdown_executors
 
-# Thread-local storage for database connections
-db_local = threading.local()
+# Process-wide connection pool, created by init_db()
+db_pool = None
+
+def is_connection_error(error):
+    """Whether a mariadb error means the connection itself is unusable"""
+    if isinstance(error, mariadb.PoolError):
+        # Pool exhaustion is not fixed by swapping connections
+        return False
+    message = str(error).lower()
+    return "server has gone away" in message or "connection" in message
 
 def db_operation(func):
     """Decorator to handle database operations with automatic retry on connection failure"""
@@ -22,18 +33,10 @@ def db_operation(func):
                 else:
                     return func(*args, **kwargs)
             except mariadb.Error as e:
-                if attempt < max_retries - 1 and ("server has gone away" in str(e).lower() or 
-                                                  "connection" in str(e).lower()):
+                if attempt < max_retries - 1 and is_connection_error(e):
                     print(f"Database connection lost, retrying... (attempt {attempt + 1})")
-                    # Force reconnection on next get_db() call
-                    if hasattr(db_local, 'connection'):
-                        try:
-                            db_local.connection.close()
-                        except:
-                            pass
-                        delattr(db_local, 'connection')
-                    if hasattr(db_local, 'cursor'):
-                        delattr(db_local, 'cursor')
+                    # Force a fresh connection on next get_db() call
+                    release_db(discard=True)
                     continue
                 raise
         if asyncio.iscoroutinefunction(func):
@@ -48,18 +51,10 @@ def db_operation(func):
             try:
                 return func(*args, **kwargs)
             except mariadb.Error as e:
-                if attempt < max_retries - 1 and ("server has gone away" in str(e).lower() or 
-                                                  "connection" in str(e).lower()):
+                if attempt < max_retries - 1 and is_connection_error(e):
                     print(f"Database connection lost, retrying... (attempt {attempt + 1})")
-                    # Force reconnection on next get_db() call
-                    if hasattr(db_local, 'connection'):
-                        try:
-                            db_local.connection.close()
-                        except:
-                            pass
-                        delattr(db_local, 'connection')
-                    if hasattr(db_local, 'cursor'):
-                        delattr(db_local, 'cursor')
+                    # Force a fresh connection on next get_db() call
+                    release_db(discard=True)
                     continue
                 raise
         return func(*args, **kwargs)
@@ -102,9 +97,74 @@ def create_app():
     app.config['MAIL_PASSWORD'] = os.getenv('MAIL_PASSWORD')
     app.config['MAIL_DEFAULT_SENDER'] = os.getenv('MAIL_DEFAULT_SENDER')
     
-    # Initialize database connection
+    # Initialize database pool
     init_db()
     
+    # Return each request's connection to the pool when its context ends
+    @app.teardown_appcontext
+    async def teardown_db(exception):
+        release_db()
+    
+    # Send blocking work to the bounded executors instead of the event loop
+    @app.before_serving
+    async def setup_executors():
+        configure_event_loop(asyncio.get_running_loop())
+    
+    @app.before_serving
+    async def start_password_hasher():
+        from app.utils.password_hasher import password_hasher
+        password_hasher.start()
+    
+    # Deliver queued emails in the background, one worker per server process
+    @app.before_serving
+    async def start_email_worker():
+        from app.services.email_outbox import email_worker
+        email_worker.start(asyncio.get_running_loop())
+    
+    @app.after_serving
+    async def shutdown_db_pool():
+        from app.services.email_outbox import email_worker
+        from app.utils.smtp_pool import close_smtp_pool
+        from app.utils.password_hasher import password_hasher
+        await email_worker.stop()
+        close_smtp_pool()
+        password_hasher.close()
+        if db_pool:
+            db_pool.close_all()
+        shutdown_executors()
+    
+    @app.cli.command('rebuild-status-flow')
+    @click.option('--user-id', type=int, default=None, help='Only rebuild counters for this user')
+    def rebuild_status_flow(user_id):
+        """Recompute status-flow analytics counters from job_status_history"""
+        from app.services.job_service import rebuild_status_flow_counts
+        connection = acquire_db_connection()
+        try:
+            rows = rebuild_status_flow_counts(connection, connection.cursor(dictionary=True), user_id)
+        finally:
+            release_db_connection(connection)
+        print(f"Rebuilt status flow counters ({rows} rows)")
+    
+    @app.cli.command('bench-email-templates')
+    @click.option('--iterations', type=int, default=2000, help='Renders per email type')
+    def bench_email_templates(iterations):
+        """Measure the cost of rendering each email type into a full MIME message"""
+        from app.services.email_templates import benchmark_templates
+        for name, result in benchmark_templates(iterations).items():
+            print(f"{name:28} {result['render_us']:8.1f} us/email  {result['message_bytes']:6} bytes")
+    
+    @app.cli.command('requeue-dead-emails')
+    @click.option('--id', 'ids', type=int, multiple=True, help='Only requeue these outbox ids')
+    def requeue_dead_emails_command(ids):
+        """Retry dead-lettered emails from the outbox"""
+        from app.services.email_outbox import requeue_dead_emails
+        connection = acquire_db_connection()
+        try:
+            count = requeue_dead_emails(connection.cursor(dictionary=True), list(ids))
+        finally:
+            release_db_connection(connection)
+        print(f"Requeued {count} dead-lettered emails")
+    
     # Register blueprints
     from app.routes.auth import auth_bp
     from app.routes.jobs import jobs_bp
@@ -121,136 +181,108 @@ def create_app():
     return app
 
 def get_db():
-    """Get database connection with automatic reconnection"""
-    if not hasattr(db_local, 'connection') or not hasattr(db_local, 'cursor'):
-        create_db_connection()
-    
-    # Test if connection is still alive
-    try:
-        db_local.cursor.execute("SELECT 1")
-    except (mariadb.Error, AttributeError):
-        # Connection is dead, recreate it
-        create_db_connection()
-    
-    return db_local.connection, db_local.cursor
+    """Get the request-scoped database connection and cursor.
+
+    The connection is checked out of the pool on first use within the current
+    app context and released by teardown_db() when the context ends.
+
+    No liveness query is issued here: the pool pings a connection on checkout
+    only after it has sat idle for DB_POOL_HEALTH_CHECK_INTERVAL seconds, and
+    db_operation() swaps in a fresh connection when a real query hits a
+    dropped one.
+    """
+    if not has_app_context():
+        raise RuntimeError("get_db() must be called inside an application context")
 
-def create_db_connection():
-    """Create a new database connection for the current thread"""
+    if 'db_conn' not in g:
+        g.db_conn = db_pool.acquire()
+        g.db_cursor = g.db_conn.cursor(dictionary=True)
+
+    return g.db_conn, g.db_cursor
+
+def release_db(discard=False):
+    """Return the request's connection to the pool (discarding it if broken)"""
+    if not has_app_context():
+        return
+    connection = g.pop('db_conn', None)
+    cursor = g.pop('db_cursor', None)
+    if connection is None:
+        return
     try:
-        connection_params = {
-            'user': Config.DB_USER,
-            'password': Config.DB_PASSWORD,
-            'host': Config.DB_HOST,
-            'port': Config.DB_PORT,
-            'database': Config.DB_NAME,
-            'autocommit': True,
-            'connect_timeout': 10,
-            'read_timeout': 10,
-            'write_timeout': 10
-        }
-        
-        # Add SSL configuration if provided
-        if Config.DB_SSL_CA:
-            connection_params['ssl_ca'] = Config.DB_SSL_CA
-        if Config.DB_SSL_CERT:
-            connection_params['ssl_cert'] = Config.DB_SSL_CERT
-        if Config.DB_SSL_KEY:
-            connection_params['ssl_key'] = Config.DB_SSL_KEY
-            
-        db_local.connection = mariadb.connect(**connection_params)
-        db_local.cursor = db_local.connection.cursor(dictionary=True)
-        print(f"Database connection created for thread {threading.current_thread().ident}")
-    except mariadb.Error as e:
-        print(f"Error connecting to MariaDB Platform: {e}")
-        raise
+        if cursor is not None:
+            cursor.close()
+    except mariadb.Error:
+        discard = True
+    db_pool.release(connection, discard=discard)
+
+def acquire_db_connection():
+    """Check out a connection that outlives the request context (e.g. streamed responses).
+
+    The caller owns it and must hand it back with release_db_connection().
+    """
+    return db_pool.acquire()
+
+def release_db_connection(connection, discard=False):
+    """Return a connection obtained from acquire_db_connection()"""
+    db_pool.release(connection, discard=discard)
+
+def get_db_pool_stats():
+    """Expose connection pool counters for monitoring endpoints"""
+    return db_pool.stats() if db_pool else {}
+
+def get_connection_params():
+    """Build mariadb.connect() keyword arguments from Config"""
+    connection_params = {
+        'user': Config.DB_USER,
+        'password': Config.DB_PASSWORD,
+        'host': Config.DB_HOST,
+        'port': Config.DB_PORT,
+        'database': Config.DB_NAME,
+        'autocommit': True,
+        'connect_timeout': 10,
+        'read_timeout': 10,
+        'write_timeout': 10
+    }
+    
+    # Add SSL configuration if provided
+    if Config.DB_SSL_CA:
+        connection_params['ssl_ca'] = Config.DB_SSL_CA
+    if Config.DB_SSL_CERT:
+        connection_params['ssl_cert'] = Config.DB_SSL_CERT
+    if Config.DB_SSL_KEY:
+        connection_params['ssl_key'] = Config.DB_SSL_KEY
+    
+    return connection_params
 
 def init_db():
-    """Initialize database and create tables"""
+    """Initialize the connection pool and create tables"""
+    global db_pool
     try:
-        # Create initial connection to set up tables
-        create_db_connection()
-        print("Database connection successful")
+        db_pool = DatabasePool(
+            get_connection_params(),
+            pool_size=Config.DB_POOL_SIZE,
+            max_overflow=Config.DB_POOL_MAX_OVERFLOW,
+            wait_timeout=Config.DB_POOL_TIMEOUT,
+            health_check_interval=Config.DB_POOL_HEALTH_CHECK_INTERVAL
+        )
         
-        # Create tables
-        create_tables()
+        # Check out an initial connection to set up tables
+        conn = db_pool.acquire()
+        print(f"Database connection successful (pool size {Config.DB_POOL_SIZE}, overflow {Config.DB_POOL_MAX_OVERFLOW})")
+        try:
+            create_tables(conn.cursor(dictionary=True))
+        finally:
+            db_pool.release(conn)
         
     except mariadb.Error as e:
         print(f"Error connecting to MariaDB Platform: {e}")
         exit(1)
 
-def create_tables():
-    """Create database tables if they don't exist"""
-    conn, cursor = get_db()
+def create_tables(cursor):
+    """Bring the database schema up to date"""
     try:
-        # Users table with email verification
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS users (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            username VARCHAR(255) UNIQUE NOT NULL,
-            email VARCHAR(255) UNIQUE NOT NULL,
-            password_hash TEXT NOT NULL,
-            email_verified BOOLEAN DEFAULT FALSE,
-            verification_token VARCHAR(255),
-            verification_token_expires TIMESTAMP NULL,
-            role ENUM('user', 'admin') DEFAULT 'user',
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
-        )
-        """)
-        
-        # Add role column if it doesn't exist (for existing databases)
-        try:
-            cursor.execute("""
-            ALTER TABLE users ADD COLUMN role ENUM('user', 'admin') DEFAULT 'user'
-            """)
-        except mariadb.Error:
-            # Column already exists
-            pass
-
-        # Add email change columns if they don't exist
-        email_change_columns = [
-            ("reset_token", "VARCHAR(255)"),
-            ("reset_token_expires", "TIMESTAMP NULL"),
-            ("new_email", "VARCHAR(255)"),
-            ("email_change_token", "VARCHAR(255)"),
-            ("email_change_token_expires", "TIMESTAMP NULL"),
-            ("new_email_token", "VARCHAR(255)"),
-            ("new_email_token_expires", "TIMESTAMP NULL"),
-            ("last_verification_sent", "DATETIME NULL")
-        ]
-        
-        for column_name, column_type in email_change_columns:
-            try:
-                cursor.execute(f"ALTER TABLE users ADD COLUMN {column_name} {column_type}")
-                print(f"Added column {column_name} to users table")
-            except mariadb.Error:
-                # Column already exists
-                pass
-            
-        print("Users table checked/created successfully.")
-
-        # Job applications table
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS job_applications (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            user_id INT NOT NULL,
-            job_title VARCHAR(255) NOT NULL,
-            company_name VARCHAR(255) NOT NULL,
-            application_date DATE,
-            status VARCHAR(50) DEFAULT 'Applied',
-            job_url TEXT,
-            notes TEXT,
-            location VARCHAR(255),
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
-        )
-        """)
-        print("Job applications table checked/created successfully.")
-
-        
+        run_migrations(cursor)
         print("Database tables checked/created successfully.")
-
     except mariadb.Error as e:
         print(f"Error during table creation: {e}")
         exit(1)
@@ -19,6 +19,22 @@ class Config:
     DB_SSL_CERT = os.getenv('DB_SSL_CERT')
     DB_SSL_KEY = os.getenv('DB_SSL_KEY')
     
+    # Database Connection Pool
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 10))
+    DB_POOL_MAX_OVERFLOW = int(os.getenv('DB_POOL_MAX_OVERFLOW', 5))
+    DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 10))  # seconds to wait for a free connection
+    DB_POOL_HEALTH_CHECK_INTERVAL = int(os.getenv('DB_POOL_HEALTH_CHECK_INTERVAL', 30))  # idle seconds before ping on checkout
+    
+    # Executors for blocking work
+    IO_EXECUTOR_WORKERS = int(os.getenv('IO_EXECUTOR_WORKERS', 32))
+    CPU_EXECUTOR_WORKERS = int(os.getenv('CPU_EXECUTOR_WORKERS', os.cpu_count() or 2))
+    LOOP_BLOCK_WARN_MS = int(os.getenv('LOOP_BLOCK_WARN_MS', 100))  # debug only, 0 disables
+    
+    # bcrypt process pool
+    BCRYPT_PROCESSES = int(os.getenv('BCRYPT_PROCESSES', os.cpu_count() or 2))  # 0 hashes on the calling thread
+    BCRYPT_MAX_PENDING = int(os.getenv('BCRYPT_MAX_PENDING', 32))  # queued + running per process; beyond this requests get 503
+    BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', 12))  # cost of new hashes; existing hashes keep their own
+    
     # Redis Configuration
     REDIS_HOST = os.getenv('REDIS_HOST')
     REDIS_PORT = int(os.getenv('REDIS_PORT')) if os.getenv('REDIS_PORT') else None
@@ -26,6 +42,28 @@ class Config:
     REDIS_PASSWORD = os.getenv('REDIS_PASSWORD')
     REDIS_SSL = os.getenv('REDIS_SSL', 'False').lower() == 'true'
     REDIS_SSL_CERT_REQS = os.getenv('REDIS_SSL_CERT_REQS', 'required')
+    REDIS_MAX_CONNECTIONS = int(os.getenv('REDIS_MAX_CONNECTIONS', 50))  # per client view (text / binary)
+    REDIS_POOL_TIMEOUT = float(os.getenv('REDIS_POOL_TIMEOUT', 5))  # seconds to wait for a free connection
+    
+    # Outbound HTTP (Brandfetch API and logo CDN)
+    HTTP_POOL_HOSTS = int(os.getenv('HTTP_POOL_HOSTS', 10))  # distinct hosts kept in the pool
+    HTTP_POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', 16))  # keep-alive connections per host
+    HTTP_MAX_RETRIES = int(os.getenv('HTTP_MAX_RETRIES', 2))  # GET/HEAD only, on connect errors and 502/503/504
+    HTTP_RETRY_BACKOFF = float(os.getenv('HTTP_RETRY_BACKOFF', 0.3))  # seconds, doubled per retry
+    
+    # Authenticated user cache
+    USER_CACHE_TTL = int(os.getenv('USER_CACHE_TTL', 300))  # seconds in Redis
+    USER_CACHE_LOCAL_TTL = int(os.getenv('USER_CACHE_LOCAL_TTL', 30))  # seconds in process memory
+    USER_CACHE_MAX_ENTRIES = int(os.getenv('USER_CACHE_MAX_ENTRIES', 10000))
+    USER_CACHE_SYNC_INTERVAL = float(os.getenv('USER_CACHE_SYNC_INTERVAL', 1))  # seconds between checks for other workers' invalidations
+    
+    # Admin list pagination
+    ADMIN_MAX_PER_PAGE = int(os.getenv('ADMIN_MAX_PER_PAGE', 100))
+    ADMIN_COUNT_CACHE_TTL = int(os.getenv('ADMIN_COUNT_CACHE_TTL', 60))  # seconds a list total is reused
+    
+    # Job list pagination and export streaming
+    JOBS_MAX_PAGE_SIZE = int(os.getenv('JOBS_MAX_PAGE_SIZE', 500))
+    JOBS_STREAM_BATCH_SIZE = int(os.getenv('JOBS_STREAM_BATCH_SIZE', 500))  # rows per export page; each page takes a pooled connection only while it is read
     
     # Email Configuration
     MAIL_SERVER = os.getenv('MAIL_SERVER')
@@ -35,6 +73,24 @@ class Config:
     MAIL_PASSWORD = os.getenv('MAIL_PASSWORD')
     MAIL_DEFAULT_SENDER = os.getenv('MAIL_DEFAULT_SENDER')
     
+    # Pooled SMTP sessions
+    EMAIL_SMTP_POOL_SIZE = int(os.getenv('EMAIL_SMTP_POOL_SIZE', 4))
+    EMAIL_SMTP_POOL_TIMEOUT = float(os.getenv('EMAIL_SMTP_POOL_TIMEOUT', 30))  # seconds to wait for a free session
+    EMAIL_SMTP_TIMEOUT = float(os.getenv('EMAIL_SMTP_TIMEOUT', 20))  # socket timeout per SMTP command
+    EMAIL_SMTP_NOOP_AFTER = float(os.getenv('EMAIL_SMTP_NOOP_AFTER', 10))  # idle seconds before a NOOP check on reuse
+    EMAIL_SMTP_MAX_IDLE = float(os.getenv('EMAIL_SMTP_MAX_IDLE', 240))  # most servers drop idle sessions after ~5 minutes
+    EMAIL_SMTP_MAX_MESSAGES = int(os.getenv('EMAIL_SMTP_MAX_MESSAGES', 100))  # per session before reconnecting
+    
+    # Email outbox worker
+    EMAIL_OUTBOX_POLL_INTERVAL = float(os.getenv('EMAIL_OUTBOX_POLL_INTERVAL', 5))  # seconds between polls when idle
+    EMAIL_OUTBOX_BATCH_SIZE = int(os.getenv('EMAIL_OUTBOX_BATCH_SIZE', 20))
+    EMAIL_OUTBOX_LEASE_SECONDS = int(os.getenv('EMAIL_OUTBOX_LEASE_SECONDS', 120))  # claimed rows return to the queue after this
+    EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv('EMAIL_OUTBOX_MAX_ATTEMPTS', 6))  # then dead-lettered
+    EMAIL_OUTBOX_RETRY_BASE = int(os.getenv('EMAIL_OUTBOX_RETRY_BASE', 30))  # seconds, doubled per attempt
+    EMAIL_OUTBOX_RETRY_MAX = int(os.getenv('EMAIL_OUTBOX_RETRY_MAX', 3600))
+    EMAIL_OUTBOX_RETENTION_DAYS = int(os.getenv('EMAIL_OUTBOX_RETENTION_DAYS', 7))  # sent rows kept for auditing
+    EMAIL_OUTBOX_SHUTDOWN_TIMEOUT = float(os.getenv('EMAIL_OUTBOX_SHUTDOWN_TIMEOUT', 10))
+    
     # URL Configuration
     FRONTEND_URL = os.getenv('FRONTEND_URL')
     BACKEND_URL = os.getenv('BACKEND_URL')
@@ -53,6 +109,29 @@ class Config:
     
     # Logo service configuration
     BRANDFETCH_API_KEY = os.getenv('BRANDFETCH_API_KEY')
+    LOGO_BATCH_MAX_ITEMS = int(os.getenv('LOGO_BATCH_MAX_ITEMS', 100))
+    LOGO_BATCH_CONCURRENCY = int(os.getenv('LOGO_BATCH_CONCURRENCY', 8))  # upstream fetches in flight per request
+    LOGO_BATCH_ITEM_TIMEOUT = float(os.getenv('LOGO_BATCH_ITEM_TIMEOUT', 8))  # seconds per company
+    LOGO_BATCH_DEADLINE = float(os.getenv('LOGO_BATCH_DEADLINE', 12))  # seconds for the whole batch request
+    LOGO_FETCH_LOCK_TTL = float(os.getenv('LOGO_FETCH_LOCK_TTL', 20))  # seconds a worker may hold an upstream fetch
+    LOGO_FETCH_WAIT_TIMEOUT = float(os.getenv('LOGO_FETCH_WAIT_TIMEOUT', 15))  # seconds to wait on another caller's fetch
+    LOGO_NEGATIVE_TTL_NO_MATCH = int(os.getenv('LOGO_NEGATIVE_TTL_NO_MATCH', 6 * 60 * 60))  # Brandfetch has no logo
+    LOGO_NEGATIVE_TTL_HTTP_ERROR = int(os.getenv('LOGO_NEGATIVE_TTL_HTTP_ERROR', 10 * 60))  # upstream or download failed
+    LOGO_NEGATIVE_TTL_INVALID_CONTENT = int(os.getenv('LOGO_NEGATIVE_TTL_INVALID_CONTENT', 24 * 60 * 60))  # URL is not an image
+    LOGO_NEGATIVE_TTL_JITTER = float(os.getenv('LOGO_NEGATIVE_TTL_JITTER', 0.1))  # +/- fraction applied to each TTL
+    LOGO_LOCAL_CACHE_MAX_BYTES = int(os.getenv('LOGO_LOCAL_CACHE_MAX_BYTES', 32 * 1024 * 1024))  # per process
+    LOGO_LOCAL_CACHE_TTL = int(os.getenv('LOGO_LOCAL_CACHE_TTL', 300))  # caps staleness after a clear on another worker
+    LOGO_VARIANT_SIZES = [int(size) for size in os.getenv('LOGO_VARIANT_SIZES', '32,64,128').split(',')]  # px, served via ?size=
+    LOGO_MAX_DIMENSION = int(os.getenv('LOGO_MAX_DIMENSION', 256))  # larger downloads are shrunk before caching
+    LOGO_VARIANT_QUALITY = int(os.getenv('LOGO_VARIANT_QUALITY', 85))  # WebP quality for resized logos
+    LOGO_IMAGE_MEMORY_BUDGET = int(os.getenv('LOGO_IMAGE_MEMORY_BUDGET', 256 * 1024 * 1024))  # Redis bytes for logos + variants
+    LOGO_PREFIX_MIN_RESULTS = int(os.getenv('LOGO_PREFIX_MIN_RESULTS', 5))  # local matches needed to skip Brandfetch
+    LOGO_PREFIX_INDEX_TTL = int(os.getenv('LOGO_PREFIX_INDEX_TTL', 30 * 24 * 60 * 60))  # refreshed whenever brands are learned
+    
+    # Rate limiting (per-route policies live in app/utils/rate_limiter.py)
+    RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', 'True').lower() == 'true'
+    RATE_LIMIT_TRUSTED_PROXIES = int(os.getenv('RATE_LIMIT_TRUSTED_PROXIES', 0))  # X-Forwarded-For hops added by our own proxies
+    RATE_LIMIT_LOCAL_MAX_KEYS = int(os.getenv('RATE_LIMIT_LOCAL_MAX_KEYS', 10000))  # blocked clients remembered per process
     
     @classmethod
     def is_development(cls):
@@ -0,0 +1,205 @@
+"""
+Versioned schema migrations
+
+Each migration is (version, description, statements). Versions are applied
+in order and recorded in schema_version, so startup only has to read the
+current version once the schema is up to date. MariaDB commits DDL
+implicitly, so statements are written to be idempotent (IF NOT EXISTS):
+a migration interrupted half way is simply re-run on the next start.
+"""
+import mariadb
+
+# Serialises migrations when several workers start at once
+MIGRATION_LOCK_NAME = 'jobtracker_schema_migrations'
+MIGRATION_LOCK_TIMEOUT = 60
+
+MIGRATIONS = [
+    (1, "Baseline users and job_applications tables", [
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            username VARCHAR(255) UNIQUE NOT NULL,
+            email VARCHAR(255) UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            email_verified BOOLEAN DEFAULT FALSE,
+            verification_token VARCHAR(255),
+            verification_token_expires TIMESTAMP NULL,
+            role ENUM('user', 'admin') DEFAULT 'user',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        )
+        """,
+        # Columns added over time; databases created before this runner may lack some
+        """
+        ALTER TABLE users
+            ADD COLUMN IF NOT EXISTS role ENUM('user', 'admin') DEFAULT 'user',
+            ADD COLUMN IF NOT EXISTS reset_token VARCHAR(255),
+            ADD COLUMN IF NOT EXISTS reset_token_expires TIMESTAMP NULL,
+            ADD COLUMN IF NOT EXISTS new_email VARCHAR(255),
+            ADD COLUMN IF NOT EXISTS email_change_token VARCHAR(255),
+            ADD COLUMN IF NOT EXISTS email_change_token_expires TIMESTAMP NULL,
+            ADD COLUMN IF NOT EXISTS new_email_token VARCHAR(255),
+            ADD COLUMN IF NOT EXISTS new_email_token_expires TIMESTAMP NULL,
+            ADD COLUMN IF NOT EXISTS last_verification_sent DATETIME NULL
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS job_applications (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            user_id INT NOT NULL,
+            job_title VARCHAR(255) NOT NULL,
+            company_name VARCHAR(255) NOT NULL,
+            application_date DATE,
+            status VARCHAR(50) DEFAULT 'Applied',
+            job_url TEXT,
+            notes TEXT,
+            location VARCHAR(255),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+        """
+    ]),
+    (2, "Composite indexes for job lists, admin screens and analytics", [
+        # GET /jobs: WHERE user_id = ? ORDER BY created_at DESC, id DESC
+        "CREATE INDEX IF NOT EXISTS idx_job_applications_user_created ON job_applications (user_id, created_at, id)",
+        # Per-user status filters and analytics joins on status
+        "CREATE INDEX IF NOT EXISTS idx_job_applications_user_status ON job_applications (user_id, status)",
+        # Admin jobs list: ORDER BY application_date DESC, id DESC
+        "CREATE INDEX IF NOT EXISTS idx_job_applications_date_id ON job_applications (application_date, id)",
+        # Admin ?all=true export: ORDER BY created_at DESC, id DESC
+        "CREATE INDEX IF NOT EXISTS idx_job_applications_created_id ON job_applications (created_at, id)",
+        # Admin users list: ORDER BY created_at DESC, id DESC
+        "CREATE INDEX IF NOT EXISTS idx_users_created_at_id ON users (created_at, id)",
+        "CREATE INDEX IF NOT EXISTS idx_users_role ON users (role)"
+    ]),
+    (3, "Job status history table, backfilled from current job statuses", [
+        """
+        CREATE TABLE IF NOT EXISTS job_status_history (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            job_id INT NOT NULL,
+            from_status VARCHAR(255),
+            to_status VARCHAR(255) NOT NULL,
+            changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            notes TEXT,
+            created_by INT,
+            FOREIGN KEY (job_id) REFERENCES job_applications(id) ON DELETE CASCADE,
+            FOREIGN KEY (created_by) REFERENCES users(id) ON DELETE SET NULL,
+            INDEX idx_job_id (job_id),
+            INDEX idx_changed_at (changed_at)
+        )
+        """,
+        # Initial history for jobs that have none yet
+        """
+        INSERT INTO job_status_history (job_id, from_status, to_status, changed_at, created_by)
+        SELECT
+            ja.id as job_id,
+            NULL as from_status,
+            ja.status as to_status,
+            ja.application_date as changed_at,
+            ja.user_id as created_by
+        FROM job_applications ja
+        LEFT JOIN job_status_history jsh ON ja.id = jsh.job_id
+        WHERE ja.status IS NOT NULL AND jsh.job_id IS NULL
+        """
+    ]),
+    (4, "Per-user status flow counters for /analytics/status-flow", [
+        # One-time cleanup of duplicate initial entries (previously run on every analytics call)
+        """
+        DELETE jsh1 FROM job_status_history jsh1
+        INNER JOIN job_status_history jsh2
+        WHERE jsh1.id > jsh2.id
+        AND jsh1.job_id = jsh2.job_id
+        AND jsh1.from_status IS NULL
+        AND jsh2.from_status IS NULL
+        AND jsh1.to_status = jsh2.to_status
+        """,
+        # from_status '' marks an initial status (NULL can't be part of the key)
+        """
+        CREATE TABLE IF NOT EXISTS job_status_flow_counts (
+            user_id INT NOT NULL,
+            from_status VARCHAR(255) NOT NULL DEFAULT '',
+            to_status VARCHAR(255) NOT NULL,
+            transition_count INT NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, from_status, to_status),
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+        """,
+        "DELETE FROM job_status_flow_counts",
+        """
+        INSERT INTO job_status_flow_counts (user_id, from_status, to_status, transition_count)
+        SELECT j.user_id, COALESCE(jsh.from_status, ''), jsh.to_status, COUNT(*)
+        FROM job_status_history jsh
+        INNER JOIN job_applications j ON jsh.job_id = j.id
+        GROUP BY j.user_id, COALESCE(jsh.from_status, ''), jsh.to_status
+        """
+    ]),
+    (5, "Email outbox for the background sender", [
+        # status: pending -> sending (claimed until locked_until) -> sent | dead
+        """
+        CREATE TABLE IF NOT EXISTS email_outbox (
+            id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            kind VARCHAR(50) NOT NULL,
+            recipient VARCHAR(255) NOT NULL,
+            payload TEXT,
+            status ENUM('pending', 'sending', 'sent', 'dead') NOT NULL DEFAULT 'pending',
+            attempts INT NOT NULL DEFAULT 0,
+            next_attempt_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            claim_token VARCHAR(32) NULL,
+            locked_until TIMESTAMP NULL,
+            last_error TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            sent_at TIMESTAMP NULL,
+            INDEX idx_email_outbox_status_next (status, next_attempt_at),
+            INDEX idx_email_outbox_claim (claim_token)
+        )
+        """
+    ]),
+]
+
+
+def get_schema_version(cursor):
+    """Return the highest applied migration version (0 for a fresh database)"""
+    cursor.execute("SELECT COALESCE(MAX(version), 0) AS version FROM schema_version")
+    return cursor.fetchone()['version']
+
+
+def run_migrations(cursor):
+    """Apply any pending migrations and return the resulting schema version"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INT PRIMARY KEY,
+            description VARCHAR(255) NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    latest = MIGRATIONS[-1][0]
+    current = get_schema_version(cursor)
+    if current >= latest:
+        print(f"Database schema up to date (version {current})")
+        return current
+
+    cursor.execute("SELECT GET_LOCK(?, ?) AS acquired", (MIGRATION_LOCK_NAME, MIGRATION_LOCK_TIMEOUT))
+    if not cursor.fetchone()['acquired']:
+        raise mariadb.OperationalError("Timed out waiting for the schema migration lock")
+
+    try:
+        # Another worker may have migrated while we waited for the lock
+        current = get_schema_version(cursor)
+        for version, description, statements in MIGRATIONS:
+            if version <= current:
+                continue
+            print(f"Applying migration {version}: {description}")
+            for statement in statements:
+                cursor.execute(statement)
+            cursor.execute(
+                "INSERT INTO schema_version (version, description) VALUES (?, ?)",
+                (version, description)
+            )
+            current = version
+    finally:
+        cursor.execute("SELECT RELEASE_LOCK(?)", (MIGRATION_LOCK_NAME,))
+        cursor.fetchone()
+
+    print(f"Database schema migrated to version {current}")
+    return current
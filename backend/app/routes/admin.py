@@ -2,10 +2,20 @@ from quart import Blueprint, request, jsonify, current_app
 import jwt
 import mariadb
 from functools import wraps
-from app import get_db
+from app import get_db, get_db_pool_stats
 from app.config import Config
-import bcrypt
-from datetime import datetime, timedelta
+from app.services.auth_service import get_user_principal
+from app.services.user_cache_service import user_cache
+from app.services.job_service import delete_job_record
+from app.services.email_outbox import email_worker, get_queue_depth
+from app.services.email_service import EMAIL_SETTING_KEYS, reload_email_settings
+from app.utils.executors import run_io
+from app.utils.password_hasher import get_password_hasher_stats, password_hasher, PasswordHasherBusy
+from app.utils.pagination import encode_cursor, decode_cursor, cached_count
+from app.utils.rate_limiter import rate_limit, get_rate_limit_stats
+from app.utils.redis_client import get_redis_pool_stats
+from app.utils.smtp_pool import get_smtp_pool_stats
+from datetime import date, datetime, timedelta
 import secrets
 import string
 
@@ -37,9 +47,7 @@ def admin_required(f):
 
         try:
             data = jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=["HS256"])
-            conn, cursor = get_db()
-            cursor.execute("SELECT * FROM users WHERE id = ?", (data['sub'],))
-            current_user = cursor.fetchone()
+            current_user = await run_io(get_user_principal, data['sub'])
             
             if not current_user:
                 SecurityUtils.log_security_event(
@@ -93,40 +101,40 @@ def admin_required(f):
 
 
 @admin_bp.route("/admin/dashboard", methods=["GET"])
+@rate_limit('admin')
 @admin_required
-# Rate limiting temporarily disabled
 async def admin_dashboard():
     """Get admin dashboard data"""
     from app.config import Config
     
     try:
-        conn, cursor = get_db()
+        conn, cursor = await run_io(get_db)
         current_user = request.current_user
         
         Config.log_info(f"Admin dashboard accessed by user: {current_user['email']}", 'admin')
         
         # Get total users
-        cursor.execute("SELECT COUNT(*) as total FROM users")
+        await run_io(cursor.execute, "SELECT COUNT(*) as total FROM users")
         total_users = cursor.fetchone()['total']
         
         # Get verified users count
-        cursor.execute("SELECT COUNT(*) as verified FROM users WHERE email_verified = TRUE")
+        await run_io(cursor.execute, "SELECT COUNT(*) as verified FROM users WHERE email_verified = TRUE")
         verified_users = cursor.fetchone()['verified']
         
         # Get unverified users count  
-        cursor.execute("SELECT COUNT(*) as unverified FROM users WHERE email_verified = FALSE")
+        await run_io(cursor.execute, "SELECT COUNT(*) as unverified FROM users WHERE email_verified = FALSE")
         unverified_users = cursor.fetchone()['unverified']
         
         # Get admin users count
-        cursor.execute("SELECT COUNT(*) as admins FROM users WHERE role = 'admin'")
+        await run_io(cursor.execute, "SELECT COUNT(*) as admins FROM users WHERE role = 'admin'")
         admin_users = cursor.fetchone()['admins']
         
         # Get total job applications
-        cursor.execute("SELECT COUNT(*) as total FROM job_applications")
+        await run_io(cursor.execute, "SELECT COUNT(*) as total FROM job_applications")
         total_jobs = cursor.fetchone()['total']
         
         # Get recent users (last 10)
-        cursor.execute("""
+        await run_io(cursor.execute, """
             SELECT id, username, email, email_verified, role, created_at 
             FROM users 
             ORDER BY created_at DESC 
@@ -135,7 +143,7 @@ async def admin_dashboard():
         recent_users = cursor.fetchall()
         
         # Get recent job applications (last 10)
-        cursor.execute("""
+        await run_io(cursor.execute, """
             SELECT ja.id, ja.company_name, ja.job_title as position_title, ja.status, 
                    ja.application_date as applied_date, u.username, u.email
             FROM job_applications ja
@@ -173,51 +181,72 @@ async def admin_dashboard():
         return jsonify({"error": "Failed to load dashboard"}), 500
 
 @admin_bp.route("/admin/users", methods=["GET"])
+@rate_limit('admin')
 @admin_required
-# Rate limiting temporarily disabled
 async def get_users():
-    """Get paginated users list"""
+    """Get users list, newest first, paginated by cursor (page numbers still accepted)"""
     try:
-        page = int(request.args.get('page', 1))
-        per_page = int(request.args.get('per_page', 20))
+        page = max(int(request.args.get('page', 1)), 1)
+        per_page = min(max(int(request.args.get('per_page', 20)), 1), Config.ADMIN_MAX_PER_PAGE)
         search = request.args.get('search', '').strip()
+        cursor_token = request.args.get('cursor', '').strip()
         
         print(f"Admin users request - page: {page}, per_page: {per_page}, search: '{search}'")
         
-        conn, cursor = get_db()
+        conn, cursor = await run_io(get_db)
         
         # Build search query
-        where_clause = ""
+        conditions = []
         params = []
         
         if search:
             # Search in username, email, and role
-            where_clause = "WHERE (username LIKE ? OR email LIKE ? OR role LIKE ?)"
+            conditions.append("(username LIKE ? OR email LIKE ? OR role LIKE ?)")
             search_term = f"%{search}%"
             params = [search_term, search_term, search_term]
         
-        # Get total count
-        count_query = f"SELECT COUNT(*) as total FROM users {where_clause}"
-        cursor.execute(count_query, params)
-        total = cursor.fetchone()['total']
-        
-        print(f"Total users found: {total}")
+        # Total only feeds the page counter, so reuse a recent count for the same search
+        def count_users():
+            where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+            cursor.execute(f"SELECT COUNT(*) as total FROM users {where_clause}", params)
+            return cursor.fetchone()['total']
         
-        # Calculate pagination
-        offset = (page - 1) * per_page
+        total = await run_io(cached_count, 'users', {'search': search}, count_users)
         total_pages = (total + per_page - 1) // per_page
         
-        # Get users
+        # Seek past the last row of the previous page instead of skipping rows with OFFSET
+        query_params = list(params)
+        offset_clause = ""
+        if cursor_token:
+            try:
+                last_created_at, last_id = decode_cursor(cursor_token)
+            except ValueError:
+                return jsonify({"error": "Invalid cursor"}), 400
+            conditions.append("(created_at < ? OR (created_at = ? AND id < ?))")
+            query_params.extend([last_created_at, last_created_at, last_id])
+        elif page > 1:
+            # Direct jump to a page number without a cursor
+            offset_clause = "OFFSET ?"
+        
+        where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        
+        # Get users (one extra row tells us whether another page exists)
         query = f"""
             SELECT id, username, email, email_verified, role, created_at
             FROM users {where_clause}
-            ORDER BY created_at DESC
-            LIMIT ? OFFSET ?
+            ORDER BY created_at DESC, id DESC
+            LIMIT ? {offset_clause}
         """
-        params.extend([per_page, offset])
-        cursor.execute(query, params)
+        query_params.append(per_page + 1)
+        if offset_clause:
+            query_params.append((page - 1) * per_page)
+        await run_io(cursor.execute, query, query_params)
         users = cursor.fetchall()
         
+        has_more = len(users) > per_page
+        users = users[:per_page]
+        next_cursor = encode_cursor(users[-1]['created_at'], users[-1]['id']) if has_more else None
+        
         print(f"Returning {len(users)} users for page {page}")
         
         return jsonify({
@@ -226,7 +255,9 @@ async def get_users():
                 "page": page,
                 "per_page": per_page,
                 "total": total,
-                "pages": total_pages
+                "pages": total_pages,
+                "has_more": has_more,
+                "next_cursor": next_cursor
             },
             "search": search
         })
@@ -236,17 +267,18 @@ async def get_users():
         return jsonify({"error": "Failed to get users"}), 500
 
 @admin_bp.route("/admin/jobs", methods=["GET"])
+@rate_limit('admin')
 @admin_required
-# Rate limiting temporarily disabled
 async def get_all_jobs():
-    """Get paginated job applications list"""
+    """Get job applications list, newest first, paginated by cursor (page numbers still accepted)"""
     try:
-        page = int(request.args.get('page', 1))
-        per_page = int(request.args.get('per_page', 20))
+        page = max(int(request.args.get('page', 1)), 1)
+        per_page = min(max(int(request.args.get('per_page', 20)), 1), Config.ADMIN_MAX_PER_PAGE)
         search = request.args.get('search', '').strip()
         status_filter = request.args.get('status', '').strip()
+        cursor_token = request.args.get('cursor', '').strip()
         
-        conn, cursor = get_db()
+        conn, cursor = await run_io(get_db)
         
         # Build search query
         where_conditions = []
@@ -260,45 +292,80 @@ async def get_all_jobs():
             where_conditions.append("ja.status = ?")
             params.append(status_filter)
         
+        # Total only feeds the page counter, so reuse a recent count for the same filters
+        def count_jobs():
+            where_clause = f"WHERE {' AND '.join(where_conditions)}" if where_conditions else ""
+            if search:
+                count_query = f"""
+                    SELECT COUNT(*) as total 
+                    FROM job_applications ja
+                    JOIN users u ON ja.user_id = u.id
+                    {where_clause}
+                """
+            else:
+                # user_id is a NOT NULL foreign key, so the join cannot change the count
+                count_query = f"SELECT COUNT(*) as total FROM job_applications ja {where_clause}"
+            cursor.execute(count_query, params)
+            return cursor.fetchone()['total']
+        
+        total = await run_io(cached_count, 'jobs', {'search': search, 'status': status_filter}, count_jobs)
+        total_pages = (total + per_page - 1) // per_page
+        
+        # Seek past the last row of the previous page instead of skipping rows with OFFSET.
+        # application_date is nullable and NULLs sort last under DESC.
+        query_params = list(params)
+        offset_clause = ""
+        if cursor_token:
+            try:
+                last_date, last_id = decode_cursor(cursor_token, date)
+            except ValueError:
+                return jsonify({"error": "Invalid cursor"}), 400
+            if last_date is None:
+                where_conditions.append("(ja.application_date IS NULL AND ja.id < ?)")
+                query_params.append(last_id)
+            else:
+                where_conditions.append(
+                    "(ja.application_date < ? OR (ja.application_date = ? AND ja.id < ?) "
+                    "OR ja.application_date IS NULL)"
+                )
+                query_params.extend([last_date, last_date, last_id])
+        elif page > 1:
+            # Direct jump to a page number without a cursor
+            offset_clause = "OFFSET ?"
+        
         where_clause = ""
         if where_conditions:
             where_clause = "WHERE " + " AND ".join(where_conditions)
         
-        # Get total count
-        count_query = f"""
-            SELECT COUNT(*) as total 
-            FROM job_applications ja
-            JOIN users u ON ja.user_id = u.id
-            {where_clause}
-        """
-        cursor.execute(count_query, params)
-        total = cursor.fetchone()['total']
-        
-        # Calculate pagination
-        offset = (page - 1) * per_page
-        total_pages = (total + per_page - 1) // per_page
-        
-        # Get jobs
+        # Get jobs (one extra row tells us whether another page exists)
         query = f"""
             SELECT ja.id, ja.company_name, ja.job_title as position_title, ja.status,
                    ja.application_date as applied_date, ja.location, u.username, u.email
             FROM job_applications ja
             JOIN users u ON ja.user_id = u.id
             {where_clause}
-            ORDER BY ja.application_date DESC
-            LIMIT ? OFFSET ?
+            ORDER BY ja.application_date DESC, ja.id DESC
+            LIMIT ? {offset_clause}
         """
-        params.extend([per_page, offset])
-        cursor.execute(query, params)
+        query_params.append(per_page + 1)
+        if offset_clause:
+            query_params.append((page - 1) * per_page)
+        await run_io(cursor.execute, query, query_params)
         jobs = cursor.fetchall()
         
+        has_more = len(jobs) > per_page
+        jobs = jobs[:per_page]
+        next_cursor = encode_cursor(jobs[-1]['applied_date'], jobs[-1]['id']) if has_more else None
+        
         return jsonify({
             "jobs": jobs,
             "pagination": {
                 "page": page,
                 "per_page": per_page,
                 "total": total,
-                "pages": total_pages
+                "pages": total_pages,
+                "has_more": has_more,
+                "next_cursor": next_cursor
             }
         })
         
@@ -307,23 +374,24 @@ async def get_all_jobs():
         return jsonify({"error": "Failed to get jobs"}), 500
 
 @admin_bp.route("/admin/users/<int:user_id>", methods=["PUT"])
+@rate_limit('admin')
 @admin_required
-# Rate limiting temporarily disabled
 async def update_user(user_id):
     """Update user details"""
     try:
         data = await request.get_json()
         
-        conn, cursor = get_db()
+        conn, cursor = await run_io(get_db)
         
         # Update user
-        cursor.execute("""
+        await run_io(cursor.execute, """
             UPDATE users 
             SET username = ?, email = ?, role = ?, email_verified = ?
             WHERE id = ?
         """, (data['username'], data['email'], data['role'], data['email_verified'], user_id))
         
-        conn.commit()
+        await run_io(conn.commit)
+        await run_io(user_cache.invalidate, user_id)
         
         return jsonify({"message": "User updated successfully"})
         
@@ -332,16 +400,17 @@ async def update_user(user_id):
         return jsonify({"error": "Failed to update user"}), 500
 
 @admin_bp.route("/admin/users/<int:user_id>", methods=["DELETE"])
+@rate_limit('admin')
 @admin_required
-# Rate limiting temporarily disabled
 async def delete_user(user_id):
     """Delete a user"""
     try:
-        conn, cursor = get_db()
+        conn, cursor = await run_io(get_db)
         
         # Delete user (this will cascade to job_applications due to foreign key)
-        cursor.execute("DELETE FROM users WHERE id = ?", (user_id,))
-        conn.commit()
+        await run_io(cursor.execute, "DELETE FROM users WHERE id = ?", (user_id,))
+        await run_io(conn.commit)
+        await run_io(user_cache.invalidate, user_id)
         
         return jsonify({"message": "User deleted successfully"})
         
@@ -350,15 +419,17 @@ async def delete_user(user_id):
         return jsonify({"error": "Failed to delete user"}), 500
 
 @admin_bp.route("/admin/jobs/<int:job_id>", methods=["DELETE"])
+@rate_limit('admin')
 @admin_required
-# Rate limiting temporarily disabled
 async def delete_job_admin(job_id):
     """Delete a job application"""
     try:
-        conn, cursor = get_db()
+        conn, cursor = await run_io(get_db)
         
-        cursor.execute("DELETE FROM job_applications WHERE id = ?", (job_id,))
-        conn.commit()
+        await run_io(cursor.execute, "SELECT user_id FROM job_applications WHERE id = ?", (job_id,))
+        job = cursor.fetchone()
+        if job:
+            await run_io(delete_job_record, conn, cursor, job_id, job['user_id'])
         
         return jsonify({"message": "Job application deleted successfully"})
         
@@ -367,30 +438,32 @@ async def delete_job_admin(job_id):
         return jsonify({"error": "Failed to delete job application"}), 500
 
 @admin_bp.route("/admin/users", methods=["POST"])
+@rate_limit('admin')
 @admin_required
-# Rate limiting temporarily disabled
 async def create_admin_user():
     """Create a new admin user"""
     try:
         data = await request.get_json()
         
         # Hash password
-        password_hash = bcrypt.hashpw(data['password'].encode('utf-8'), bcrypt.gensalt())
+        password_hash = await password_hasher.hash_async(data['password'])
         
-        conn, cursor = get_db()
+        conn, cursor = await run_io(get_db)
         
         # Create user
-        cursor.execute("""
+        await run_io(cursor.execute, """
             INSERT INTO users (username, email, password_hash, role, email_verified, created_at)
             VALUES (?, ?, ?, 'admin', TRUE, ?)
-        """, (data['username'], data['email'], password_hash.decode('utf-8'), datetime.now()))
+        """, (data['username'], data['email'], password_hash, datetime.now()))
         
-        conn.commit()
+        await run_io(conn.commit)
         
         return jsonify({"message": "Admin user created successfully"})
         
     except mariadb.IntegrityError:
         return jsonify({"error": "Username or email already exists"}), 400
+    except PasswordHasherBusy:
+        return jsonify({"error": "Server is busy, please try again shortly"}), 503
     except Exception as e:
         Config.log_error(f"Error creating admin user: {e}", 'admin')
         return jsonify({"error": "Failed to create admin user"}), 500
@@ -400,30 +473,42 @@ async def create_admin_user():
 async def get_system_info():
     """Get system information"""
     try:
-        conn, cursor = get_db()
+        conn, cursor = await run_io(get_db)
         
         # Database info
-        cursor.execute("SELECT VERSION() as version")
+        await run_io(cursor.execute, "SELECT VERSION() as version")
         db_version = cursor.fetchone()['version']
         
-        cursor.execute("SHOW TABLE STATUS")
+        await run_io(cursor.execute, "SHOW TABLE STATUS")
         tables = cursor.fetchall()
         
         # Logo cache stats - handle potential Redis connection issues
         cache_stats = {"error": "Cache service unavailable"}
         try:
             from app.services.logo_cache_service import logo_cache
-            cache_stats = logo_cache.get_cache_stats()
+            cache_stats = await run_io(logo_cache.get_cache_stats)
         except Exception as cache_error:
             Config.log_warning(f"Cache service error: {cache_error}", 'admin')
             cache_stats = {"error": f"Cache service error: {str(cache_error)}"}
         
+        email_outbox = {"worker": email_worker.stats(), "smtp_pool": get_smtp_pool_stats()}
+        try:
+            email_outbox["queue"] = await run_io(get_queue_depth, cursor)
+        except mariadb.Error as outbox_error:
+            Config.log_warning(f"Email outbox stats error: {outbox_error}", 'admin')
+        
         return jsonify({
             "database": {
                 "version": db_version,
-                "tables": [{"name": table['Name'], "rows": table['Rows']} for table in tables]
+                "tables": [{"name": table['Name'], "rows": table['Rows']} for table in tables],
+                "pool": get_db_pool_stats()
             },
             "cache": cache_stats,
+            "user_cache": user_cache.stats(),
+            "redis_pool": get_redis_pool_stats(),
+            "email_outbox": email_outbox,
+            "rate_limits": get_rate_limit_stats(),
+            "password_hasher": get_password_hasher_stats(),
             "environment": {
                 "debug": current_app.config.get('DEBUG'),
                 "environment": current_app.config.get('ENVIRONMENT', 'unknown')
@@ -440,7 +525,7 @@ async def clear_system_cache():
     """Clear system cache"""
     try:
         from app.services.logo_cache_service import logo_cache
-        logo_cache.clear_cache()
+        await run_io(logo_cache.clear_cache)
         return jsonify({"message": "Cache cleared successfully"})
     except Exception as e:
         print(f"Error clearing cache: {e}")
@@ -488,6 +573,8 @@ async def update_environment_variable():
         
         # Update environment variable
         os.environ[data['key']] = data['value']
+        if data['key'] in EMAIL_SETTING_KEYS:
+            reload_email_settings()
         
         return jsonify({'message': f'Environment variable {data["key"]} updated successfully'})
     except Exception as e:
@@ -513,6 +600,8 @@ async def delete_environment_variable(key):
         
         if key in os.environ:
             del os.environ[key]
+            if key in EMAIL_SETTING_KEYS:
+                reload_email_settings()
             Config.log_info(f'Environment variable {key} deleted by admin user {request.current_user.get("email")}', 'admin')
             return jsonify({'message': f'Environment variable {key} deleted successfully'})
         else:
@@ -530,20 +619,23 @@ async def reset_passwords():
         new_password = data.get('new_password', secrets.token_urlsafe(12))
         
         # Hash the new password
-        password_hash = bcrypt.hashpw(new_password.encode('utf-8'), bcrypt.gensalt())
+        password_hash = await password_hasher.hash_async(new_password)
         
-        conn, cursor = get_db()
+        conn, cursor = await run_io(get_db)
         
         # Update all user passwords
-        cursor.execute("UPDATE users SET password_hash = ?", (password_hash.decode('utf-8'),))
+        await run_io(cursor.execute, "UPDATE users SET password_hash = ?", (password_hash,))
         affected_rows = cursor.rowcount
-        conn.commit()
+        await run_io(conn.commit)
+        await run_io(user_cache.clear)
         
         return jsonify({
             "message": f"Reset passwords for {affected_rows} users",
             "new_password": new_password
         })
         
+    except PasswordHasherBusy:
+        return jsonify({"error": "Server is busy, please try again shortly"}), 503
     except Exception as e:
         Config.log_error(f"Error resetting passwords: {e}", 'admin')
         return jsonify({"error": "Failed to reset passwords"}), 500
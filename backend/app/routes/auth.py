@@ -1,12 +1,15 @@
 from quart import Blueprint, request, jsonify, current_app
 import jwt
 import mariadb
-import bcrypt
 from functools import wraps
 from app import get_db
 from app.config import Config
-from app.services.auth_service import register_user, login_user, verify_email_token, resend_verification_email, request_password_reset, reset_password, initiate_email_change, confirm_email_change_request, verify_new_email, verify_password
+from app.services.auth_service import register_user, login_user, verify_email_token, resend_verification_email, request_password_reset, reset_password, initiate_email_change, confirm_email_change_request, verify_new_email, verify_password_async, get_user_principal
 from app.utils.password_validator import PasswordValidator
+from app.utils.executors import run_io
+from app.utils.password_hasher import password_hasher, PasswordHasherBusy
+from app.utils.rate_limiter import rate_limit
+from app.services.user_cache_service import user_cache
 
 
 auth_bp = Blueprint('auth', __name__)
@@ -47,9 +50,7 @@ def token_required(f):
 
         try:
             data = jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=["HS256"])
-            conn, cursor = get_db()
-            cursor.execute("SELECT * FROM users WHERE id = ?", (data['sub'],))
-            current_user = cursor.fetchone()
+            current_user = await run_io(get_user_principal, data['sub'])
             if not current_user:
                 SecurityUtils.log_security_event(
                     'INVALID_TOKEN_USER_NOT_FOUND',
@@ -83,11 +84,12 @@ def token_required(f):
             Config.log_error(f"Unexpected error during token verification: {e}", 'auth')
             return jsonify({"message": "Authentication failed"}), 500
 
+        request.current_user_id = current_user['id']
         return await f(current_user, *args, **kwargs)
     return decorated
 
 @auth_bp.route("/register", methods=["POST"])
-# Rate limiting temporarily disabled
+@rate_limit('register')
 async def register():
     from app.utils.security import SecurityUtils
     
@@ -116,7 +118,7 @@ async def register():
         return jsonify({"error": "Validation failed", "details": errors}), 400
     # --- End Validation ---
 
-    result = register_user(username, email, password)
+    result = await register_user(username, email, password)
     
     if "error" in result:
         return jsonify({"error": result["error"]}), result["code"]
@@ -124,7 +126,7 @@ async def register():
     return jsonify({"message": result["message"]}), 201
 
 @auth_bp.route("/login", methods=["POST"])
-# Rate limiting temporarily disabled
+@rate_limit('login')
 async def login():
     from app.config import Config
     
@@ -151,7 +153,7 @@ async def login():
     # --- End Validation ---
 
     Config.log_debug(f"Calling login_user with email: {email}", 'auth')
-    result = login_user(email, password, current_app.config['SECRET_KEY'])
+    result = await login_user(email, password, current_app.config['SECRET_KEY'])
     Config.log_debug(f"login_user result: {'success' if 'success' in result else 'error'}", 'auth')
 
     if "error" in result:
@@ -165,7 +167,7 @@ async def login():
     }), 200
 
 @auth_bp.route("/verify-email", methods=["GET"])
-# Rate limiting temporarily disabled
+@rate_limit('verify_token')
 def verify_email():
     token = request.args.get('token')
     
@@ -180,7 +182,7 @@ def verify_email():
     return jsonify({"message": result["message"]}), 200
 
 @auth_bp.route("/resend-verification", methods=["POST"])
-# Rate limiting temporarily disabled
+@rate_limit('send_email')
 async def resend_verification():
     data = await request.get_json()
     
@@ -195,7 +197,7 @@ async def resend_verification():
         return jsonify({"error": "Invalid email format"}), 400
     # --- End Validation ---
     
-    result = resend_verification_email(email)
+    result = await run_io(resend_verification_email, email)
     
     if "error" in result:
         return jsonify({"error": result["error"]}), result["code"]
@@ -203,7 +205,7 @@ async def resend_verification():
     return jsonify({"message": result["message"]}), 200
 
 @auth_bp.route("/forgot-password", methods=["POST"])
-# Rate limiting temporarily disabled
+@rate_limit('send_email')
 async def forgot_password():
     from app.utils.security import SecurityUtils
     
@@ -220,7 +222,7 @@ async def forgot_password():
         return jsonify({"error": "Valid email is required"}), 400
     # --- End Validation ---
 
-    result = request_password_reset(email)
+    result = await run_io(request_password_reset, email)
     
     if "error" in result:
         return jsonify({"error": result["error"]}), result["code"]
@@ -228,7 +230,7 @@ async def forgot_password():
     return jsonify({"message": result["message"]}), 200
 
 @auth_bp.route("/reset-password", methods=["POST"])
-# Rate limiting temporarily disabled
+@rate_limit('reset_password')
 async def reset_password_route():
     from app.utils.security import SecurityUtils
     
@@ -253,7 +255,7 @@ async def reset_password_route():
         return jsonify({"error": "Password must be at least 6 characters long"}), 400
     # --- End Validation ---
     
-    result = reset_password(token, new_password)
+    result = await reset_password(token, new_password)
     
     if "error" in result:
         return jsonify({"error": result["error"]}), result["code"]
@@ -319,7 +321,7 @@ def get_profile():
         return jsonify({"message": "Failed to load profile"}), 500
 
 @auth_bp.route("/change-password", methods=["PUT"])
-# Rate limiting temporarily disabled
+@rate_limit('account')
 async def change_password():
     # For PUT requests, require authentication
     token = None
@@ -335,8 +337,8 @@ async def change_password():
 
     try:
         data = jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=["HS256"])
-        conn, cursor = get_db()
-        cursor.execute("SELECT * FROM users WHERE id = ?", (data['sub'],))
+        conn, cursor = await run_io(get_db)
+        await run_io(cursor.execute, "SELECT * FROM users WHERE id = ?", (data['sub'],))
         current_user = cursor.fetchone()
         if not current_user:
             return jsonify({"message": "Token is invalid or user not found"}), 401
@@ -364,27 +366,30 @@ async def change_password():
         return jsonify({"message": "Password must be at least 6 characters long"}), 400
     
     try:
-        conn, cursor = get_db()
+        conn, cursor = await run_io(get_db)
         
         # Ensure we're getting the password hash from database consistently
-        cursor.execute("SELECT password_hash FROM users WHERE id = ?", (current_user['id'],))
+        await run_io(cursor.execute, "SELECT password_hash FROM users WHERE id = ?", (current_user['id'],))
         user_data = cursor.fetchone()
         if not user_data:
             return jsonify({"message": "User not found"}), 404
             
         stored_password_hash = user_data['password_hash']
-        if not verify_password(stored_password_hash, current_password):
+        if not await verify_password_async(stored_password_hash, current_password):
             return jsonify({"message": "Current password is incorrect"}), 400
         
         # Hash new password
-        new_password_hash = bcrypt.hashpw(new_password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        new_password_hash = await password_hasher.hash_async(new_password)
         
         # Update password in database - use password_hash column consistently
-        cursor.execute("UPDATE users SET password_hash = ? WHERE id = ?", (new_password_hash, current_user['id']))
-        conn.commit()
+        await run_io(cursor.execute, "UPDATE users SET password_hash = ? WHERE id = ?", (new_password_hash, current_user['id']))
+        await run_io(conn.commit)
+        await run_io(user_cache.invalidate, current_user['id'])
         
         return jsonify({"message": "Password changed successfully"}), 200
         
+    except PasswordHasherBusy:
+        return jsonify({"message": "Server is busy, please try again shortly"}), 503
     except mariadb.Error as e:
         print(f"Database error during password change: {e}")
         return jsonify({"message": "Failed to change password due to server error"}), 500
@@ -393,7 +398,7 @@ async def change_password():
         return jsonify({"message": "Failed to change password"}), 500
 
 @auth_bp.route('/delete-account', methods=['DELETE'])
-# Rate limiting temporarily disabled
+@rate_limit('account')
 async def delete_account():
     token = None
     if 'Authorization' in request.headers:
@@ -408,8 +413,8 @@ async def delete_account():
 
     try:
         data = jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=["HS256"])
-        conn, cursor = get_db()
-        cursor.execute("SELECT * FROM users WHERE id = ?", (data['sub'],))
+        conn, cursor = await run_io(get_db)
+        await run_io(cursor.execute, "SELECT * FROM users WHERE id = ?", (data['sub'],))
         current_user = cursor.fetchone()
         if not current_user:
             return jsonify({"message": "Token is invalid or user not found"}), 401
@@ -433,10 +438,10 @@ async def delete_account():
         return jsonify({"message": "Password is required to delete account"}), 400
     
     try:
-        conn, cursor = get_db()
+        conn, cursor = await run_io(get_db)
         
         # Get the current password hash from database consistently
-        cursor.execute("SELECT password_hash FROM users WHERE id = ?", (current_user['id'],))
+        await run_io(cursor.execute, "SELECT password_hash FROM users WHERE id = ?", (current_user['id'],))
         user_data = cursor.fetchone()
         if not user_data:
             return jsonify({"message": "User not found"}), 404
@@ -444,18 +449,21 @@ async def delete_account():
         stored_password_hash = user_data['password_hash']
         
         # Verify password using safe helper
-        if not verify_password(stored_password_hash, password):
+        if not await verify_password_async(stored_password_hash, password):
             return jsonify({"message": "Password is incorrect"}), 400
         
         # Delete user's job applications first (due to foreign key constraint)
-        cursor.execute("DELETE FROM job_applications WHERE user_id = ?", (current_user['id'],))
+        await run_io(cursor.execute, "DELETE FROM job_applications WHERE user_id = ?", (current_user['id'],))
         
         # Delete the user account
-        cursor.execute("DELETE FROM users WHERE id = ?", (current_user['id'],))
-        conn.commit()
+        await run_io(cursor.execute, "DELETE FROM users WHERE id = ?", (current_user['id'],))
+        await run_io(conn.commit)
+        await run_io(user_cache.invalidate, current_user['id'])
         
         return jsonify({"message": "Account deleted successfully"}), 200
         
+    except PasswordHasherBusy:
+        return jsonify({"message": "Server is busy, please try again shortly"}), 503
     except mariadb.Error as e:
         print(f"Database error during account deletion: {e}")
         return jsonify({"message": "Failed to delete account due to server error"}), 500
@@ -464,8 +472,8 @@ async def delete_account():
         return jsonify({"message": "Failed to delete account"}), 500
 
 @auth_bp.route("/request-email-change", methods=["POST"])
+@rate_limit('account')
 @token_required
-# Rate limiting temporarily disabled
 def request_email_change_route(current_user):
     """Simplified email change endpoint that matches frontend expectations"""
     try:
@@ -496,24 +504,20 @@ def request_email_change_route(current_user):
         user = cursor.fetchone()
         
         if not user:
-            conn.close()
             return jsonify({"error": "User not found"}), 404
             
         # Import and use the verify_password function from auth_service
         from app.services.auth_service import verify_password
         if not verify_password(user['password_hash'], password):
-            conn.close()
             return jsonify({"error": "Invalid password"}), 401
         
         # Check if new email is different from current
         if new_email == user['email']:
-            conn.close()
             return jsonify({"error": "New email must be different from current email"}), 400
         
         # Check if new email is already in use
         cursor.execute("SELECT id FROM users WHERE email = ? AND id != ?", (new_email, user_id))
         if cursor.fetchone():
-            conn.close()
             return jsonify({"error": "Email is already in use"}), 409
         
         # Generate tokens for two-step verification
@@ -524,44 +528,42 @@ def request_email_change_route(current_user):
         new_email_token = secrets.token_urlsafe(32)
         expires = datetime.utcnow() + timedelta(hours=24)
         
-        # Store the email change request
-        cursor.execute("""
-            UPDATE users 
-            SET new_email = ?, 
-                email_change_token = ?, 
-                new_email_token = ?,
-                email_change_token_expires = ?,
-                new_email_token_expires = ?
-            WHERE id = ?
-        """, (new_email, current_email_token, new_email_token, expires, expires, user_id))
-        
-        conn.commit()
-        conn.close()
-        
-        # Send confirmation emails
-        from app.services.email_service import send_email_change_confirmation, send_new_email_verification
+        # Store the email change request and queue both confirmation emails with it
+        from app.services.email_outbox import enqueue_email, notify_email_worker
         
+        conn.begin()
         try:
-            # Send confirmation to current email
-            send_email_change_confirmation(user['email'], current_email_token)
-            # Send verification to new email  
-            send_new_email_verification(new_email, new_email_token)
-        except Exception as e:
-            print(f"Failed to send email change confirmation: {e}")
-            return jsonify({"error": "Failed to send confirmation emails"}), 500
+            cursor.execute("""
+                UPDATE users 
+                SET new_email = ?, 
+                    email_change_token = ?, 
+                    new_email_token = ?,
+                    email_change_token_expires = ?,
+                    new_email_token_expires = ?
+                WHERE id = ?
+            """, (new_email, current_email_token, new_email_token, expires, expires, user_id))
+            enqueue_email(cursor, 'email_change_confirmation', user['email'], current_email_token)
+            enqueue_email(cursor, 'new_email_verification', new_email, new_email_token)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        notify_email_worker()
         
         return jsonify({
             "success": True, 
             "message": "Email change requests sent. Please check both your current and new email addresses."
         }), 200
         
+    except PasswordHasherBusy:
+        return jsonify({"error": "Server is busy, please try again shortly"}), 503
     except Exception as e:
         print(f"Error in request_email_change: {e}")
         return jsonify({"error": "Failed to process email change request"}), 500
 
 @auth_bp.route("/initiate-email-change", methods=["POST"])
+@rate_limit('account')
 @token_required
-# Rate limiting temporarily disabled
 def initiate_email_change_route():
     """Step 1: Initiate email change process"""
     data = request.get_json()
@@ -583,7 +585,7 @@ def initiate_email_change_route():
     return jsonify(result), 200
 
 @auth_bp.route("/confirm-email-change", methods=["GET", "POST"])
-# Rate limiting temporarily disabled
+@rate_limit('verify_token')
 def confirm_email_change_route():
     """Step 2: Confirm email change and provide new email"""
     if request.method == "GET":
@@ -822,7 +824,7 @@ def verify_new_email_route():
     """
 
 @auth_bp.route('/validate-password', methods=['POST'])
-# Rate limiting temporarily disabled
+@rate_limit('validate_password')
 def validate_password_endpoint():
     """Validate password strength"""
     try:
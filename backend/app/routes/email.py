@@ -1,11 +1,13 @@
 from quart import Blueprint, request, jsonify, redirect, url_for, current_app
 from app.services.auth_service import verify_email_token, resend_verification_email
+from app.utils.executors import run_io
+from app.utils.rate_limiter import rate_limit
 
 
 email_bp = Blueprint('email', __name__)
 
 @email_bp.route("/verify-email", methods=["GET"])
-# Rate limiting temporarily disabled
+@rate_limit('verify_token')
 async def verify_email_page():
     """Handle email verification from email links"""
     token = request.args.get('token')
@@ -15,7 +17,7 @@ async def verify_email_page():
         return jsonify({"error": "Valid verification token is required"}), 400
     # --- End Validation ---
     
-    result = verify_email_token(token)
+    result = await run_io(verify_email_token, token)
     
     if "error" in result:
         # In a real app, you might redirect to a frontend page with error message
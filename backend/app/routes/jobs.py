@@ -1,73 +1,32 @@
-from quart import Blueprint, request, jsonify, current_app
+from quart import Blueprint, Response, request, jsonify, current_app
+import json
 import mariadb
 import random
-from app import get_db
+from functools import wraps
+from app import get_db, acquire_db_connection, release_db_connection
+from app.config import Config
+from app.utils.executors import run_io
+from app.utils.pagination import encode_cursor, decode_cursor
+from app.utils.rate_limiter import rate_limit
+from app.services.job_service import create_job_record, update_job_record, delete_job_record, get_status_flow
 from app.routes.auth import token_required
 
 jobs_bp = Blueprint('jobs', __name__)
 
-def ensure_status_history_table(cursor):
-    """Ensure the job_status_history table exists"""
-    try:
-        # Check if table exists
-        cursor.execute("""
-            SELECT COUNT(*) as count FROM information_schema.tables 
-            WHERE table_schema = DATABASE() 
-            AND table_name = 'job_status_history'
-        """)
-        table_exists = cursor.fetchone()['count'] > 0
-        
-        if not table_exists:
-            print("Creating job_status_history table...")
-            # Create the table
-            cursor.execute("""
-                CREATE TABLE job_status_history (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    job_id INT NOT NULL,
-                    from_status VARCHAR(255),
-                    to_status VARCHAR(255) NOT NULL,
-                    changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    notes TEXT,
-                    created_by INT,
-                    FOREIGN KEY (job_id) REFERENCES job_applications(id) ON DELETE CASCADE,
-                    FOREIGN KEY (created_by) REFERENCES users(id) ON DELETE SET NULL,
-                    INDEX idx_job_id (job_id),
-                    INDEX idx_changed_at (changed_at)
-                )
-            """)
-            
-            # Insert initial history for existing jobs (only if no history exists for them)
-            cursor.execute("""
-                INSERT INTO job_status_history (job_id, from_status, to_status, changed_at, created_by)
-                SELECT 
-                    ja.id as job_id,
-                    NULL as from_status,
-                    ja.status as to_status,
-                    ja.application_date as changed_at,
-                    ja.user_id as created_by
-                FROM job_applications ja
-                LEFT JOIN job_status_history jsh ON ja.id = jsh.job_id
-                WHERE ja.status IS NOT NULL AND jsh.job_id IS NULL
-            """)
-            print("job_status_history table created and populated with existing job data")
-            
-    except Exception as e:
-        print(f"Error ensuring status history table: {e}")
-
-from functools import wraps
-
 def set_user_id_in_request(f):
     @wraps(f)
     async def decorated(*args, **kwargs):
-        if 'current_user' in kwargs and kwargs['current_user']:
-            request.current_user_id = kwargs['current_user']['id']
+        # token_required passes the principal positionally
+        current_user = kwargs.get('current_user') or (args[0] if args else None)
+        if current_user:
+            request.current_user_id = current_user['id']
         return await f(*args, **kwargs)
     return decorated
 
 @jobs_bp.route("/jobs", methods=["POST"])
+@rate_limit('jobs_write')
 @token_required
 @set_user_id_in_request
-# Rate limiting temporarily disabled
 async def create_job(current_user):
     data = await request.get_json()
     user_id = current_user['id']
@@ -121,34 +80,12 @@ async def create_job(current_user):
     # --- End Validation ---
 
     try:
-        conn, cursor = get_db()
-        
-        sql = """
-            INSERT INTO job_applications
-            (user_id, job_title, company_name, application_date, status, job_url, notes, location)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """
-        values = (user_id, job_title, company_name, application_date, status, job_url, notes, location)
-        cursor.execute(sql, values)
-        new_job_id = cursor.lastrowid
+        conn, cursor = await run_io(get_db)
         
-        # Add initial status history entry
-        add_status_history(cursor, new_job_id, None, status, user_id)
-        
-        cursor.execute("SELECT * FROM job_applications WHERE id = ?", (new_job_id,))
-        new_job = cursor.fetchone()
-        
-        # Convert datetime objects to ISO format
-        if new_job.get('application_date'):
-            new_job['application_date'] = new_job['application_date'].isoformat()
-        if new_job.get('created_at'):
-            new_job['created_at'] = new_job['created_at'].isoformat()
-        if new_job.get('updated_at'):
-            new_job['updated_at'] = new_job['updated_at'].isoformat()
-
-        conn.commit()
-        conn.close()
-        return jsonify(new_job), 201
+        # Row and initial history in one transaction, one executor hop
+        new_job = await run_io(create_job_record, conn, cursor, user_id, job_title, company_name,
+                               application_date, status, job_url, notes, location)
+        return jsonify(serialize_job(new_job)), 201
     except mariadb.Error as e:
         print(f"Database error creating job: {e}")
         return jsonify({"error": "Failed to create job application due to a database error"}), 500
@@ -156,44 +93,196 @@ async def create_job(current_user):
         print(f"Unexpected error creating job: {e}")
         return jsonify({"error": "An unexpected error occurred while creating the job"}), 500
 
+# Columns a client may request with ?fields=
+JOB_FIELDS = (
+    'id', 'user_id', 'job_title', 'company_name', 'application_date', 'status',
+    'job_url', 'notes', 'location', 'created_at', 'updated_at'
+)
+
+def parse_job_fields(raw_fields, include_user_name):
+    """Validate a comma-separated ?fields= list; None means every column"""
+    if not raw_fields:
+        return None
+    allowed = JOB_FIELDS + (('user_name',) if include_user_name else ())
+    fields = [field.strip() for field in raw_fields.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return fields
+
+def build_jobs_query(user_id, show_all, fields, after=None, limit=None):
+    """Build the job list query, newest first, keyed on (created_at, id).
+
+    Returns (sql, params, hidden) where hidden lists the columns selected
+    only to build the next cursor, to be stripped from the output.
+    """
+    if fields is None:
+        columns = ["ja.*"] + (["u.username as user_name"] if show_all else [])
+        hidden = []
+    else:
+        columns = [
+            "u.username as user_name" if field == 'user_name' else f"ja.{field}"
+            for field in fields
+        ]
+        hidden = [field for field in ('id', 'created_at') if field not in fields]
+        columns += [f"ja.{field}" for field in hidden]
+    
+    conditions = []
+    params = []
+    if not show_all:
+        conditions.append("ja.user_id = ?")
+        params.append(user_id)
+    if after:
+        conditions.append("(ja.created_at < ? OR (ja.created_at = ? AND ja.id < ?))")
+        params.extend([after[0], after[0], after[1]])
+    
+    sql = f"SELECT {', '.join(columns)} FROM job_applications ja"
+    if show_all and (fields is None or 'user_name' in fields):
+        sql += " LEFT JOIN users u ON ja.user_id = u.id"
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    sql += " ORDER BY ja.created_at DESC, ja.id DESC"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+    return sql, params, hidden
+
+def serialize_job(job, hidden=()):
+    """Convert date/datetime columns to ISO format and drop cursor-only columns"""
+    for field in hidden:
+        job.pop(field, None)
+    for field in ('application_date', 'created_at', 'updated_at'):
+        if job.get(field):
+            job[field] = job[field].isoformat()
+    return job
+
+def fetch_jobs_page(sql, params):
+    """Run one export page on a pooled connection that is returned before the rows are sent.
+
+    Holding no connection between pages means a slow client can't pin a
+    pool slot for the length of its download, and a response that is
+    never iterated has nothing to release.
+    """
+    conn = acquire_db_connection()
+    discard = True
+    try:
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+        discard = False
+        return rows
+    finally:
+        release_db_connection(conn, discard=discard)
+
+async def stream_jobs(page_query, rows, hidden, ndjson):
+    """Yield every job as NDJSON or a JSON array, one keyset page at a time.
+
+    rows is the first page, fetched before the response starts so that
+    errors there still become a 500; page_query(after) gives the SQL for
+    the page after a (created_at, id) cursor. Headers are already sent by
+    the time a later page can fail: NDJSON ends with an {"error": ...}
+    line, a JSON array is aborted so the client sees a broken transfer
+    rather than a short list.
+    """
+    if not ndjson:
+        yield b"["
+    first = True
+    while rows:
+        after = (rows[-1]['created_at'], rows[-1]['id'])
+        chunk = []
+        for row in rows:
+            encoded = json.dumps(serialize_job(row, hidden), default=str)
+            if ndjson:
+                chunk.append(encoded + "\n")
+            else:
+                chunk.append(encoded if first else "," + encoded)
+            first = False
+        yield "".join(chunk).encode('utf-8')
+        if len(rows) < Config.JOBS_STREAM_BATCH_SIZE:
+            break
+        try:
+            rows = await run_io(fetch_jobs_page, *page_query(after))
+        except mariadb.Error as e:
+            print(f"Database error streaming jobs: {e}")
+            if not ndjson:
+                raise
+            yield (json.dumps({"error": "Failed to retrieve job applications"}) + "\n").encode('utf-8')
+            return
+    if not ndjson:
+        yield b"]"
+
 @jobs_bp.route("/jobs", methods=["GET"])
+@rate_limit('jobs_read')
 @token_required
 @set_user_id_in_request
-# Rate limiting temporarily disabled
 async def get_jobs(current_user):
+    """List jobs newest first.
+
+    With ?limit= (and ?cursor= for later pages) returns one page plus a
+    next_cursor; otherwise streams every row, as a JSON array by default or
+    as NDJSON with ?format=ndjson. ?fields= restricts the columns returned.
+    """
     user_id = current_user['id']
     is_admin = current_user.get('role') == 'admin'
     
     # Check if admin wants to see all jobs (optional query parameter)
-    show_all = request.args.get('all', 'false').lower() == 'true'
+    show_all = is_admin and request.args.get('all', 'false').lower() == 'true'
     
     try:
-        conn, cursor = get_db()
+        fields = parse_job_fields(request.args.get('fields', '').strip(), show_all)
         
-        if is_admin and show_all:
-            # Admin can optionally see all jobs from all users
-            cursor.execute("""
-                SELECT ja.*, u.username as user_name 
-                FROM job_applications ja 
-                LEFT JOIN users u ON ja.user_id = u.id 
-                ORDER BY ja.created_at DESC
-            """)
-        else:
-            # Regular behavior - only user's own jobs
-            cursor.execute("SELECT * FROM job_applications WHERE user_id = ? ORDER BY created_at DESC", (user_id,))
+        limit = request.args.get('limit')
+        cursor_token = request.args.get('cursor', '').strip()
+        
+        export = limit is None and not cursor_token
+        if not export:
+            limit = min(max(int(limit or 50), 1), Config.JOBS_MAX_PAGE_SIZE)
+            after = decode_cursor(cursor_token) if cursor_token else None
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    if export:
+        # Stream the whole list in keyset pages without materialising it
+        def page_query(after=None):
+            sql, params, _ = build_jobs_query(user_id, show_all, fields, after, Config.JOBS_STREAM_BATCH_SIZE)
+            return sql, params
         
+        hidden = build_jobs_query(user_id, show_all, fields)[2]
+        ndjson = request.args.get('format', 'json').lower() == 'ndjson'
+        mimetype = 'application/x-ndjson' if ndjson else 'application/json'
+        if request.method == 'HEAD':
+            # The body is never sent, so skip the query
+            return Response(b"", mimetype=mimetype)
+        try:
+            rows = await run_io(fetch_jobs_page, *page_query())
+        except mariadb.Error as e:
+            print(f"Database error exporting jobs: {e}")
+            return jsonify({"error": "Failed to retrieve job applications"}), 500
+        return Response(stream_jobs(page_query, rows, hidden, ndjson), mimetype=mimetype)
+    
+    try:
+        conn, cursor = await run_io(get_db)
+        
+        # Fetch one extra row to learn whether another page exists
+        sql, params, hidden = build_jobs_query(user_id, show_all, fields, after, limit + 1)
+        await run_io(cursor.execute, sql, params)
         jobs = cursor.fetchall()
         
-        # Convert datetime objects to ISO format
-        for job in jobs:
-            if job.get('application_date'):
-                job['application_date'] = job['application_date'].isoformat()
-            if job.get('created_at'):
-                job['created_at'] = job['created_at'].isoformat()
-            if job.get('updated_at'):
-                job['updated_at'] = job['updated_at'].isoformat()
-                
-        return jsonify(jobs)
+        has_more = len(jobs) > limit
+        jobs = jobs[:limit]
+        next_cursor = encode_cursor(jobs[-1]['created_at'], jobs[-1]['id']) if has_more else None
+        
+        return jsonify({
+            "jobs": [serialize_job(job, hidden) for job in jobs],
+            "pagination": {
+                "limit": limit,
+                "has_more": has_more,
+                "next_cursor": next_cursor
+            }
+        })
     except mariadb.Error as e:
         print(f"Database error getting jobs: {e}")
         return jsonify({"error": "Failed to retrieve job applications"}), 500
@@ -202,19 +291,19 @@ async def get_jobs(current_user):
         return jsonify({"error": "An unexpected error occurred"}), 500
 
 @jobs_bp.route("/jobs/<int:job_id>", methods=["GET"])
+@rate_limit('jobs_read')
 @token_required
 @set_user_id_in_request
-# Rate limiting temporarily disabled
 async def get_job(current_user, job_id):
     user_id = current_user['id']
     is_admin = current_user.get('role') == 'admin'
     try:
-        conn, cursor = get_db()
+        conn, cursor = await run_io(get_db)
         # Admin can access any job, regular users can only access their own
         if is_admin:
-            cursor.execute("SELECT * FROM job_applications WHERE id = ?", (job_id,))
+            await run_io(cursor.execute, "SELECT * FROM job_applications WHERE id = ?", (job_id,))
         else:
-            cursor.execute("SELECT * FROM job_applications WHERE id = ? AND user_id = ?", (job_id, user_id))
+            await run_io(cursor.execute, "SELECT * FROM job_applications WHERE id = ? AND user_id = ?", (job_id, user_id))
         job = cursor.fetchone()
         if job:
             if job.get('application_date'):
@@ -234,9 +323,9 @@ async def get_job(current_user, job_id):
         return jsonify({"error": "An unexpected error occurred"}), 500
 
 @jobs_bp.route("/jobs/<int:job_id>", methods=["PUT"])
+@rate_limit('jobs_write')
 @token_required
 @set_user_id_in_request
-# Rate limiting temporarily disabled
 async def update_job(current_user, job_id):
     user_id = current_user['id']
     is_admin = current_user.get('role') == 'admin'
@@ -273,53 +362,14 @@ async def update_job(current_user, job_id):
     if not update_fields:
         return jsonify({"error": "No valid fields provided for update"}), 400
 
-    set_clause = ", ".join([f"{field} = ?" for field in update_fields])
-    values = list(update_fields.values())
-    values.append(job_id)
-
     try:
-        conn, cursor = get_db()
-        # Fetch the job to check ownership
-        cursor.execute("SELECT user_id, status FROM job_applications WHERE id = ?", (job_id,))
-        current_job = cursor.fetchone()
-        if not current_job:
-            return jsonify({"error": "Job application not found"}), 404
-
-        # Authorization check: must be owner or admin
-        if current_job['user_id'] != user_id and not is_admin:
-            return jsonify({"error": "Access denied"}), 403
-
-        # If status is being updated, track status change
-        if 'status' in update_fields:
-            # Track status change if status is different
-            old_status = current_job['status']
-            new_status = update_fields['status']
-            if old_status != new_status:
-                # Use the ID of the user performing the change
-                add_status_history(cursor, job_id, old_status, new_status, user_id)
-
-        # Build and execute the update query
-        sql = f"UPDATE job_applications SET {set_clause} WHERE id = ?"
-        cursor.execute(sql, tuple(values))
-
-        if cursor.rowcount == 0:
-            # This can happen if the submitted data is the same as the existing data
-            conn.close()
-            return jsonify({"message": "No changes detected or applied"}), 200
-
-        # Fetch and return the updated job
-        cursor.execute("SELECT * FROM job_applications WHERE id = ?", (job_id,))
-        updated_job = cursor.fetchone()
-        if updated_job.get('application_date'):
-            updated_job['application_date'] = updated_job['application_date'].isoformat()
-        if updated_job.get('created_at'):
-            updated_job['created_at'] = updated_job['created_at'].isoformat()
-        if updated_job.get('updated_at'):
-            updated_job['updated_at'] = updated_job['updated_at'].isoformat()
-
-        conn.commit()
-        conn.close()
-        return jsonify(updated_job)
+        conn, cursor = await run_io(get_db)
+        result = await run_io(update_job_record, conn, cursor, job_id, user_id, is_admin, update_fields)
+        if "job" not in result:
+            code = result.pop("code")
+            return jsonify(result), code
+        
+        return jsonify(serialize_job(result["job"]))
     except mariadb.Error as e:
         # Log the detailed error for debugging
         print(f"Database error updating job {job_id}: {e}")
@@ -332,17 +382,17 @@ async def update_job(current_user, job_id):
         return jsonify({"error": "An unexpected error occurred while updating the job"}), 500
 
 @jobs_bp.route("/jobs/<int:job_id>", methods=["DELETE"])
+@rate_limit('jobs_write')
 @token_required
 @set_user_id_in_request
-# Rate limiting temporarily disabled
 async def delete_job(current_user, job_id):
     user_id = current_user['id']
     is_admin = current_user.get('role') == 'admin'
     try:
-        conn, cursor = get_db()
+        conn, cursor = await run_io(get_db)
 
         # First, verify ownership or admin status
-        cursor.execute("SELECT user_id FROM job_applications WHERE id = ?", (job_id,))
+        await run_io(cursor.execute, "SELECT user_id FROM job_applications WHERE id = ?", (job_id,))
         job = cursor.fetchone()
 
         if not job:
@@ -352,15 +402,12 @@ async def delete_job(current_user, job_id):
             return jsonify({"error": "Access denied"}), 403
 
         # If authorized, proceed with deletion
-        cursor.execute("DELETE FROM job_applications WHERE id = ?", (job_id,))
+        deleted = await run_io(delete_job_record, conn, cursor, job_id, job['user_id'])
         
-        if cursor.rowcount > 0:
-            conn.commit()
-            conn.close()
+        if deleted > 0:
             return jsonify({"message": "Job application deleted successfully"})
         else:
             # This case should ideally not be reached if the above checks pass
-            conn.close()
             return jsonify({"error": "Deletion failed unexpectedly"}), 500
             
     except mariadb.Error as e:
@@ -370,45 +417,27 @@ async def delete_job(current_user, job_id):
         print(f"Unexpected error deleting job {job_id}: {e}")
         return jsonify({"error": "An unexpected error occurred"}), 500
 
-def add_status_history(cursor, job_id, from_status, to_status, user_id, notes=None):
-    """Add a status change entry to the history table"""
-    try:
-        # Ensure the table exists
-        ensure_status_history_table(cursor)
-        
-        cursor.execute("""
-            INSERT INTO job_status_history (job_id, from_status, to_status, created_by, notes)
-            VALUES (?, ?, ?, ?, ?)
-        """, (job_id, from_status, to_status, user_id, notes))
-        return True
-    except mariadb.Error as e:
-        print(f"Error adding status history: {e}")
-        return False
-
 @jobs_bp.route('/status-history/<int:job_id>', methods=['GET'])
+@rate_limit('jobs_read')
 @token_required
 @set_user_id_in_request
-# Rate limiting temporarily disabled
 async def get_job_status_history(current_user, job_id):
     """Get status history for a specific job"""
     try:
-        conn, cursor = get_db()
-        
-        # Ensure the table exists
-        ensure_status_history_table(cursor)
+        conn, cursor = await run_io(get_db)
         
         # Verify user owns this job or is admin
         is_admin = current_user.get('role') == 'admin'
         if is_admin:
-            cursor.execute("SELECT id FROM job_applications WHERE id = ?", (job_id,))
+            await run_io(cursor.execute, "SELECT id FROM job_applications WHERE id = ?", (job_id,))
         else:
-            cursor.execute("SELECT id FROM job_applications WHERE id = ? AND user_id = ?", (job_id, current_user['id']))
+            await run_io(cursor.execute, "SELECT id FROM job_applications WHERE id = ? AND user_id = ?", (job_id, current_user['id']))
         
         if not cursor.fetchone():
             return jsonify({"error": "Job not found or access denied"}), 404
         
         # Get status history
-        cursor.execute("""
+        await run_io(cursor.execute, """
             SELECT jsh.id, jsh.from_status, jsh.to_status, jsh.changed_at, jsh.notes,
                    u.username as changed_by
             FROM job_status_history jsh
@@ -428,7 +457,6 @@ async def get_job_status_history(current_user, job_id):
                 'changed_by': row['changed_by']
             })
         
-        conn.close()
         return jsonify(history), 200
         
     except mariadb.Error as e:
@@ -439,95 +467,17 @@ async def get_job_status_history(current_user, job_id):
         return jsonify({"error": "An unexpected error occurred"}), 500
 
 @jobs_bp.route('/analytics/status-flow', methods=['GET'])
+@rate_limit('jobs_read')
 @token_required
 @set_user_id_in_request
-# Rate limiting temporarily disabled
 async def get_status_flow_analytics(current_user):
     """Get status flow data for Sankey diagram"""
     try:
-        conn, cursor = get_db()
-        
-        # Ensure the table exists
-        ensure_status_history_table(cursor)
-        
-        # Debug: Get total job count for this user
-        cursor.execute("SELECT COUNT(*) as total_jobs FROM job_applications WHERE user_id = ?", (current_user['id'],))
-        total_jobs = cursor.fetchone()['total_jobs']
-        print(f"🔍 Debug: User {current_user['id']} has {total_jobs} total jobs")
-        
-        # Clean up any duplicate initial status entries (safety check)
-        cursor.execute("""
-            DELETE jsh1 FROM job_status_history jsh1
-            INNER JOIN job_status_history jsh2 
-            WHERE jsh1.id > jsh2.id 
-            AND jsh1.job_id = jsh2.job_id 
-            AND jsh1.from_status IS NULL 
-            AND jsh2.from_status IS NULL 
-            AND jsh1.to_status = jsh2.to_status
-            AND EXISTS (SELECT 1 FROM job_applications ja WHERE ja.id = jsh1.job_id AND ja.user_id = ?)
-        """, (current_user['id'],))
-        
-        if cursor.rowcount > 0:
-            print(f"🔧 Debug: Cleaned up {cursor.rowcount} duplicate initial status entries")
-        
-        # Get all status transitions for user's jobs
-        cursor.execute("""
-            SELECT jsh.from_status, jsh.to_status, COUNT(*) as transition_count
-            FROM job_status_history jsh
-            INNER JOIN job_applications j ON jsh.job_id = j.id
-            WHERE j.user_id = ? AND jsh.from_status IS NOT NULL
-            GROUP BY jsh.from_status, jsh.to_status
-            ORDER BY transition_count DESC
-        """, (current_user['id'],))
-        
-        transitions = []
-        for row in cursor.fetchall():
-            transitions.append({
-                'from_status': row['from_status'],
-                'to_status': row['to_status'],
-                'count': row['transition_count']
-            })
-            print(f"🔍 Debug: Transition {row['from_status']} -> {row['to_status']}: {row['transition_count']}")
-        
-        # Get initial status counts (applications that started with this status)
-        cursor.execute("""
-            SELECT jsh.to_status as status, COUNT(*) as count
-            FROM job_status_history jsh
-            INNER JOIN job_applications j ON jsh.job_id = j.id
-            WHERE j.user_id = ? AND jsh.from_status IS NULL
-            GROUP BY jsh.to_status
-        """, (current_user['id'],))
-        
-        initial_statuses = []
-        total_initial = 0
-        for row in cursor.fetchall():
-            initial_statuses.append({
-                'status': row['status'],
-                'count': row['count']
-            })
-            total_initial += row['count']
-            print(f"🔍 Debug: Initial status {row['status']}: {row['count']}")
-        
-        print(f"🔍 Debug: Total initial statuses: {total_initial}")
-        print(f"🔍 Debug: Total transitions: {len(transitions)}")
-        
-        # Debug: Check for duplicate history entries
-        cursor.execute("""
-            SELECT job_id, COUNT(*) as history_count
-            FROM job_status_history jsh
-            INNER JOIN job_applications j ON jsh.job_id = j.id
-            WHERE j.user_id = ? AND jsh.from_status IS NULL
-            GROUP BY job_id
-            HAVING COUNT(*) > 1
-        """, (current_user['id'],))
+        conn, cursor = await run_io(get_db)
         
-        duplicates = cursor.fetchall()
-        if duplicates:
-            print(f"🚨 Debug: Found {len(duplicates)} jobs with multiple initial status entries!")
-            for dup in duplicates:
-                print(f"   Job ID {dup['job_id']} has {dup['history_count']} initial status entries")
+        # Single read of the per-user counters kept up to date by add_status_history
+        transitions, initial_statuses = await run_io(get_status_flow, cursor, current_user['id'])
         
-        conn.close()
         return jsonify({
             'transitions': transitions,
             'initial_statuses': initial_statuses
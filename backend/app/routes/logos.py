@@ -1,10 +1,34 @@
 from quart import Blueprint, request, jsonify, Response, current_app
+import asyncio
+from email.utils import formatdate
+from app.config import Config
 from app.services.logo_cache_service import logo_cache
 from app.routes.admin import admin_required
+from app.utils.executors import run_io
+from app.utils.rate_limiter import rate_limit
 
 logos_bp = Blueprint('logos', __name__)
 
+def logo_cache_headers(etag, cached_at):
+    """Caching and validator headers shared by full and 304 logo responses"""
+    headers = {
+        'Cache-Control': 'public, max-age=86400',  # Cache for 1 day
+        'ETag': f'"{etag}"'
+    }
+    if cached_at:
+        headers['Last-Modified'] = formatdate(cached_at, usegmt=True)
+    return headers
+
+def logo_not_modified(etag, cached_at):
+    """Whether the client's copy is current (If-None-Match wins over If-Modified-Since)"""
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    if request.if_modified_since and cached_at:
+        return int(cached_at) <= request.if_modified_since.timestamp()
+    return False
+
 @logos_bp.route("/logos/company/<company_name>", methods=["GET"])
+@rate_limit('logo_image')
 async def get_company_logo(company_name):
     """Get cached company logo image"""
     # --- Input Validation & Sanitization ---
@@ -12,17 +36,35 @@ async def get_company_logo(company_name):
         return jsonify({"error": "Invalid company name"}), 400
     # --- End Validation ---
     
+    size = request.args.get('size')
+    if size is not None:
+        if not size.isdigit() or not 0 < int(size) <= Config.LOGO_MAX_DIMENSION:
+            return jsonify({"error": f"size must be between 1 and {Config.LOGO_MAX_DIMENSION}"}), 400
+        size = int(size)
+    
     try:
-        image_data, content_type = logo_cache.get_logo_data(company_name)
+        # Revalidation only needs the metadata, not the image bytes
+        if request.if_none_match or request.if_modified_since:
+            metadata = await run_io(logo_cache.get_logo_validators, company_name, size)
+            if metadata and logo_not_modified(metadata['etag'], metadata.get('cached_at')):
+                return Response(status=304, headers=logo_cache_headers(metadata['etag'], metadata.get('cached_at')))
         
-        if image_data:
+        entry = await run_io(logo_cache.get_logo_entry, company_name, size=size)
+        
+        if entry:
+            metadata = entry['metadata']
+            # Entries cached before ETags were stored get one computed on the fly
+            etag = metadata.get('etag') or logo_cache.compute_etag(entry['image_data'])
+            cached_at = metadata.get('cached_at')
+            if logo_not_modified(etag, cached_at):
+                return Response(status=304, headers=logo_cache_headers(etag, cached_at))
+            
+            headers = logo_cache_headers(etag, cached_at)
+            headers['Content-Disposition'] = f'inline; filename="{company_name}_logo"'
             return Response(
-                image_data,
-                mimetype=content_type,
-                headers={
-                    'Cache-Control': 'public, max-age=86400',  # Cache for 1 day
-                    'Content-Disposition': f'inline; filename="{company_name}_logo"'
-                }
+                entry['image_data'],
+                mimetype=entry['content_type'],
+                headers=headers
             )
         else:
             # Return a placeholder or 404
@@ -39,6 +81,7 @@ async def get_company_logo(company_name):
         }), 500
 
 @logos_bp.route("/logos/url/<company_name>", methods=["GET"])
+@rate_limit('logo_lookup')
 async def get_company_logo_url(company_name):
     """Get company logo URL for API responses (returns internal URL)"""
     # --- Input Validation & Sanitization ---
@@ -48,7 +91,7 @@ async def get_company_logo_url(company_name):
     
     try:
         # Check if we have the image cached
-        image_data, content_type = logo_cache.get_logo_data(company_name)
+        image_data, content_type = await run_io(logo_cache.get_logo_data, company_name)
         
         if image_data:
             # Return our internal URL (no API token exposed)
@@ -73,6 +116,7 @@ async def get_company_logo_url(company_name):
         }), 500
 
 @logos_bp.route("/logos/search", methods=["GET"])
+@rate_limit('logo_search')
 async def search_companies():
     """Search for companies with autocomplete"""
     try:
@@ -86,7 +130,7 @@ async def search_companies():
                 "message": "Query must be at least 2 characters"
             })
         
-        results = logo_cache.search_companies(query, limit)
+        results = await run_io(logo_cache.search_companies, query, limit)
         
         return jsonify({
             "results": results,
@@ -102,8 +146,16 @@ async def search_companies():
         }), 500
 
 @logos_bp.route("/logos/batch", methods=["POST"])
+@rate_limit('logo_batch')
 async def get_batch_logos():
-    """Get multiple company logo URLs in one request"""
+    """Get multiple company logo URLs in one request.
+
+    Cached logos are resolved with one MGET; misses are fetched upstream in
+    parallel (at most LOGO_BATCH_CONCURRENCY at a time), each bounded by
+    LOGO_BATCH_ITEM_TIMEOUT and all by LOGO_BATCH_DEADLINE. Items still in
+    flight when time runs out come back as pending: their fetch keeps
+    running in the background and the image URL will serve the result.
+    """
     try:
         data = await request.get_json()
         company_names = data.get('companies', [])
@@ -111,22 +163,90 @@ async def get_batch_logos():
         if not company_names:
             return jsonify({"error": "No company names provided"}), 400
         
+        # Drop invalid names and duplicates, keeping request order
+        company_names = list(dict.fromkeys(
+            name for name in company_names
+            if isinstance(name, str) and name.strip() and len(name) <= 100
+        ))
+        if len(company_names) > Config.LOGO_BATCH_MAX_ITEMS:
+            return jsonify({"error": f"At most {Config.LOGO_BATCH_MAX_ITEMS} companies per request"}), 400
+        
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + Config.LOGO_BATCH_DEADLINE
+        
         results = {}
-        for company_name in company_names:
-            # Pre-cache the image (async download)
-            image_data, content_type = logo_cache.get_logo_data(company_name)
-            
-            if image_data:
+        
+        # Cache hits: one round trip for the whole batch
+        cached = await run_io(logo_cache.get_cached_metadata_many, company_names)
+        misses = []
+        for company_name, metadata in cached.items():
+            if metadata:
                 results[company_name] = {
                     "logo_url": f"/api/logos/company/{company_name}",
-                    "content_type": content_type,
+                    "content_type": metadata.get('content_type', 'image/png'),
                     "cached": True
                 }
             else:
+                misses.append(company_name)
+        
+        # Misses: bounded parallel upstream fetches
+        semaphore = asyncio.Semaphore(Config.LOGO_BATCH_CONCURRENCY)
+        
+        def release_slot(done):
+            # A timed-out fetch keeps its executor thread until upstream answers,
+            # so its slot is only handed back once the thread is done with it
+            semaphore.release()
+            if not done.cancelled():
+                done.exception()  # retrieved here so late failures aren't reported as unhandled
+        
+        async def fetch(company_name):
+            await semaphore.acquire()
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                semaphore.release()
+                raise asyncio.TimeoutError()
+            upstream = asyncio.ensure_future(run_io(logo_cache.get_logo_data, company_name))
+            upstream.add_done_callback(release_slot)
+            # shield: giving up on the result must not look like the fetch finishing
+            return await asyncio.wait_for(
+                asyncio.shield(upstream),
+                timeout=min(Config.LOGO_BATCH_ITEM_TIMEOUT, remaining)
+            )
+        
+        tasks = {company_name: asyncio.ensure_future(fetch(company_name)) for company_name in misses}
+        if tasks:
+            await asyncio.wait(tasks.values(), timeout=max(deadline - loop.time(), 0))
+        
+        for company_name, task in tasks.items():
+            if not task.done():
+                task.cancel()
+            if task.done() and not task.cancelled() and task.exception() is None:
+                image_data, content_type = task.result()
+                if image_data:
+                    results[company_name] = {
+                        "logo_url": f"/api/logos/company/{company_name}",
+                        "content_type": content_type,
+                        "cached": True
+                    }
+                else:
+                    results[company_name] = {
+                        "logo_url": None,
+                        "cached": False,
+                        "error": "Logo not found"
+                    }
+            elif task.done() and not task.cancelled() and not isinstance(task.exception(), asyncio.TimeoutError):
+                print(f"Error fetching logo for {company_name} in batch: {task.exception()}")
                 results[company_name] = {
                     "logo_url": None,
                     "cached": False,
-                    "error": "Logo not found"
+                    "error": "Failed to get logo"
+                }
+            else:
+                # Out of time; the executor thread finishes and caches it anyway
+                results[company_name] = {
+                    "logo_url": f"/api/logos/company/{company_name}",
+                    "cached": False,
+                    "pending": True
                 }
         
         return jsonify({
@@ -139,10 +259,11 @@ async def get_batch_logos():
         return jsonify({"error": "Failed to get batch logos"}), 500
 
 @logos_bp.route("/logos/validate/<company_name>", methods=["GET"])
+@rate_limit('logo_lookup')
 async def validate_company_logo(company_name):
     """Get and validate company logo"""
     try:
-        image_data, content_type = logo_cache.get_logo_data(company_name)
+        image_data, content_type = await run_io(logo_cache.get_logo_data, company_name)
         
         return jsonify({
             "company_name": company_name,
@@ -160,6 +281,7 @@ async def validate_company_logo(company_name):
         }), 500
 
 @logos_bp.route("/logos/cache/clear", methods=["POST"])
+@rate_limit('admin')
 @admin_required
 async def clear_logo_cache():
     """Clear logo cache (admin endpoint)"""
@@ -168,7 +290,7 @@ async def clear_logo_cache():
         company_name = data.get('company_name')
         
         # Get clear result with statistics
-        clear_result = logo_cache.clear_cache(company_name)
+        clear_result = await run_io(logo_cache.clear_cache, company_name)
         
         if not clear_result.get('success', True):
             return jsonify(clear_result), 500
@@ -192,12 +314,39 @@ async def clear_logo_cache():
         Config.log_error(f"Error clearing cache: {e}", 'logos')
         return jsonify({"error": "Failed to clear cache"}), 500
 
+@logos_bp.route("/logos/cache/refresh/<company_name>", methods=["POST"])
+@rate_limit('admin')
+@admin_required
+async def refresh_company_logo(company_name):
+    """Look a logo up again, ignoring a cached miss for the company (admin endpoint)"""
+    if not company_name or len(company_name) > 100:
+        return jsonify({"error": "Invalid company name"}), 400
+    
+    try:
+        image_data, content_type = await run_io(logo_cache.get_logo_data, company_name, bypass_negative=True)
+        if not image_data:
+            return jsonify({
+                "error": "Logo not found",
+                "company_name": company_name
+            }), 404
+        return jsonify({
+            "company_name": company_name,
+            "logo_url": f"/api/logos/company/{company_name}",
+            "cached": True,
+            "content_type": content_type
+        })
+        
+    except Exception as e:
+        Config.log_error(f"Error refreshing logo for {company_name}: {e}", 'logos')
+        return jsonify({"error": "Failed to refresh company logo"}), 500
+
 @logos_bp.route("/logos/cache/stats", methods=["GET"])
+@rate_limit('admin')
 @admin_required
 async def get_cache_stats():
     """Get cache statistics (admin endpoint)"""
     try:
-        stats = logo_cache.get_cache_stats()
+        stats = await run_io(logo_cache.get_cache_stats)
         return jsonify(stats)
         
     except Exception as e:
@@ -211,7 +360,7 @@ async def logo_service_health():
     try:
         # Test Redis connection
         if logo_cache.redis_client:
-            logo_cache.redis_client.ping()
+            await run_io(logo_cache.redis_client.ping)
             redis_status = "connected"
         else:
             redis_status = "disconnected"
@@ -231,18 +380,26 @@ async def logo_service_health():
         }), 500
 
 @logos_bp.route("/logos/config", methods=["GET", "POST"])
+@rate_limit('admin')
 @admin_required
 async def logo_service_config():
     """Get or set logo service configuration (admin endpoint)"""
     try:
         if request.method == "GET":
             # Get current configuration
-            config = logo_cache.get_service_config()
+            config = await run_io(logo_cache.get_service_config)
             return jsonify(config)
         
         elif request.method == "POST":
             # Set configuration
             data = await request.get_json()
+            
+            # Admin switch for the negative lookup cache
+            if 'negative_cache' in data:
+                result = await run_io(logo_cache.set_negative_cache_enabled, bool(data['negative_cache']))
+                if 'service_type' not in data:
+                    return jsonify(result)
+            
             service_type = data.get('service_type', 'auto')
             
             # Validate service type - only brandfetch allowed
@@ -251,7 +408,7 @@ async def logo_service_config():
                 return jsonify({"error": "Invalid service type. Only 'brandfetch' is supported."}), 400
             
             # Update configuration
-            result = logo_cache.set_service_config(service_type)
+            result = await run_io(logo_cache.set_service_config, service_type)
             return jsonify(result)
             
     except Exception as e:
@@ -1,15 +1,21 @@
-import bcrypt
 import jwt
 import datetime
 import secrets
 import mariadb
-from app import get_db
-from app.services.email_service import send_verification_email, send_password_reset_email
+from app import get_db, db_operation
+from app.utils.executors import run_io
+from app.services.email_outbox import enqueue_email, notify_email_worker
 from app.utils.password_validator import PasswordValidator
+from app.utils.password_hasher import password_hasher, PasswordHasherBusy
+from app.services.user_cache_service import user_cache
 
 
 def hash_password(password):
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    return password_hasher.hash(password)
+
+
+async def hash_password_async(password):
+    return await password_hasher.hash_async(password)
 
 
 def _is_bcrypt_hash(candidate: str) -> bool:
@@ -23,43 +29,57 @@ def _is_bcrypt_hash(candidate: str) -> bool:
         return False
 
 
+def _bcrypt_inputs(stored_password, provided_password):
+    """(password bytes, hash bytes) ready for checkpw, or None if the stored value is not a bcrypt hash"""
+    if not stored_password or not provided_password:
+        return None
+
+    # Normalize stored hash to string for quick validation
+    if isinstance(stored_password, (bytes, bytearray)):
+        stored_password_str = stored_password.decode('utf-8', errors='ignore')
+    else:
+        stored_password_str = str(stored_password)
+
+    # Bcrypt hashes should start with $2a$, $2b$, or $2y$
+    if not _is_bcrypt_hash(stored_password_str):
+        # Not a valid bcrypt hash format
+        return None
+
+    provided_bytes = (
+        provided_password.encode('utf-8')
+        if isinstance(provided_password, str)
+        else bytes(provided_password)
+    )
+    return provided_bytes, stored_password_str.encode('utf-8')
+
+
 def verify_password(stored_password, provided_password):
     """Safely verify a plaintext password against a stored hash.
     Returns False if the stored hash is missing or invalid (e.g., legacy/plaintext),
     preventing crashes like `ValueError: Invalid salt`.
     """
     try:
-        if not stored_password or not provided_password:
-            return False
-
-        # Normalize stored hash to string for quick validation
-        if isinstance(stored_password, (bytes, bytearray)):
-            stored_password_str = stored_password.decode('utf-8', errors='ignore')
-        else:
-            stored_password_str = str(stored_password)
+        inputs = _bcrypt_inputs(stored_password, provided_password)
+        return password_hasher.check(*inputs) if inputs else False
 
-        # Bcrypt hashes should start with $2a$, $2b$, or $2y$
-        if not _is_bcrypt_hash(stored_password_str):
-            # Not a valid bcrypt hash format
-            return False
+    except (ValueError, TypeError) as e:
+        # Invalid salt or bad format – treat as invalid credentials, not server error
+        print(f"Password verification failed due to invalid hash format: {e}")
+        return False
 
-        # Prepare bytes for bcrypt
-        stored_hash_bytes = stored_password_str.encode('utf-8')
-        provided_bytes = (
-            provided_password.encode('utf-8')
-            if isinstance(provided_password, str)
-            else bytes(provided_password)
-        )
 
-        return bcrypt.checkpw(provided_bytes, stored_hash_bytes)
+async def verify_password_async(stored_password, provided_password):
+    """verify_password() for async handlers"""
+    try:
+        inputs = _bcrypt_inputs(stored_password, provided_password)
+        return await password_hasher.check_async(*inputs) if inputs else False
 
     except (ValueError, TypeError) as e:
-        # Invalid salt or bad format – treat as invalid credentials, not server error
         print(f"Password verification failed due to invalid hash format: {e}")
         return False
 
 
-def verify_and_migrate_password(user_id: int, stored_password, provided_password) -> bool:
+async def verify_and_migrate_password(user_id: int, stored_password, provided_password) -> bool:
     """Verify password. If stored password is legacy/plaintext and matches the provided
     password exactly, migrate it to a bcrypt hash.
     Returns True if credentials are valid after optional migration, else False.
@@ -85,7 +105,7 @@ def verify_and_migrate_password(user_id: int, stored_password, provided_password
         if _is_bcrypt_hash(stored_password_str):
             # Standard bcrypt verification
             Config.log_debug("Using bcrypt verification", 'auth')
-            result = bcrypt.checkpw(provided_password.encode('utf-8'), stored_password_str.encode('utf-8'))
+            result = await password_hasher.check_async(provided_password.encode('utf-8'), stored_password_str.encode('utf-8'))
             Config.log_debug(f"Bcrypt verification result: {result}", 'auth')
             return result
 
@@ -95,9 +115,8 @@ def verify_and_migrate_password(user_id: int, stored_password, provided_password
             Config.log_info(f"Legacy password match! Migrating to bcrypt for user {user_id}", 'auth')
             # Migrate to bcrypt
             try:
-                new_hash = hash_password(provided_password)
-                conn, cursor = get_db()
-                cursor.execute("UPDATE users SET password_hash = ? WHERE id = ?", (new_hash, user_id))
+                new_hash = await hash_password_async(provided_password)
+                await run_io(_store_password_hash, user_id, new_hash)
                 Config.log_info(f"Password migrated successfully for user {user_id}", 'auth')
             except Exception as ex:
                 Config.log_error(f"Failed to migrate legacy password for user {user_id}: {ex}", 'auth')
@@ -106,11 +125,43 @@ def verify_and_migrate_password(user_id: int, stored_password, provided_password
 
         Config.log_debug("Legacy password does not match", 'auth')
         return False
+    except PasswordHasherBusy:
+        # Overload, not a wrong password
+        raise
     except Exception as e:
         Config.log_error(f"verify_and_migrate_password error: {e}", 'auth')
         return False
 
 
+def _store_password_hash(user_id, password_hash):
+    conn, cursor = get_db()
+    cursor.execute("UPDATE users SET password_hash = ? WHERE id = ?", (password_hash, user_id))
+    user_cache.invalidate(user_id)
+
+
+@db_operation
+def _load_user_principal(user_id):
+    """Load the fields token checks need, without password hash or token columns.
+
+    This is the first query of every authenticated request on a cache miss,
+    so a connection dropped by the server is detected here and replaced by
+    db_operation.
+    """
+    conn, cursor = get_db()
+    cursor.execute("SELECT id, username, email, email_verified, role FROM users WHERE id = ?", (user_id,))
+    return cursor.fetchone()
+
+
+def get_user_principal(user_id):
+    """Return the authenticated user's principal, served from user_cache when warm"""
+    principal = user_cache.get(user_id)
+    if principal is None:
+        user = _load_user_principal(user_id)
+        if user:
+            principal = user_cache.set(user)
+    return principal
+
+
 def generate_auth_token(user_id, secret_key):
     from app.config import Config
     
@@ -132,12 +183,38 @@ def generate_verification_token():
     return secrets.token_urlsafe(32)
 
 
-def register_user(username, email, password):
+def _user_exists(email, username):
+    conn, cursor = get_db()
+    cursor.execute("SELECT id FROM users WHERE email = ? OR username = ?", (email, username))
+    return cursor.fetchone() is not None
+
+
+def _create_user(username, email, hashed_password, verification_token, verification_expires):
+    """Insert the user and queue its verification email in one transaction; returns the new id"""
+    conn, cursor = get_db()
+    conn.begin()
+    try:
+        cursor.execute("""
+            INSERT INTO users (username, email, password_hash, verification_token, verification_token_expires, last_verification_sent)
+            VALUES (?, ?, ?, ?, ?, NULL)
+        """, (username, email, hashed_password, verification_token, verification_expires))
+
+        user_id = cursor.lastrowid
+
+        # Queue the verification email with the user; the outbox worker sends it
+        enqueue_email(cursor, 'verification', email, verification_token)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    notify_email_worker()
+    return user_id
+
+
+async def register_user(username, email, password):
     """Register a new user with email verification"""
     from app.config import Config
     
-    conn, cursor = get_db()
-    
     # Validate password strength
     is_valid, validation_details = PasswordValidator.validate_password(password)
     if not is_valid:
@@ -147,33 +224,18 @@ def register_user(username, email, password):
             "validation_details": validation_details
         }
     
-    # Check if user already exists
-    cursor.execute("SELECT id FROM users WHERE email = ? OR username = ?", (email, username))
-    if cursor.fetchone():
-        return {"error": "User already exists", "code": 409}
-
-    # Ensure last_verification_sent column exists
-    try:
-        cursor.execute("ALTER TABLE users ADD COLUMN last_verification_sent DATETIME NULL")
-    except mariadb.Error:
-        pass  # Ignore if already exists
-
     # Generate verification token
     verification_token = generate_verification_token()
     verification_expires = datetime.datetime.utcnow() + datetime.timedelta(hours=24)
 
     try:
-        # Hash password and create user
-        hashed_password = hash_password(password)
-        cursor.execute("""
-            INSERT INTO users (username, email, password_hash, verification_token, verification_token_expires, last_verification_sent)
-            VALUES (?, ?, ?, ?, ?, NULL)
-        """, (username, email, hashed_password, verification_token, verification_expires))
-
-        user_id = cursor.lastrowid
+        # Check if user already exists
+        if await run_io(_user_exists, email, username):
+            return {"error": "User already exists", "code": 409}
 
-        # Send verification email
-        send_verification_email(email, verification_token)
+        # Hash password and create user
+        hashed_password = await hash_password_async(password)
+        user_id = await run_io(_create_user, username, email, hashed_password, verification_token, verification_expires)
         
         Config.log_info(f"User registered successfully: {email}", 'auth')
         return {"success": True, "user_id": user_id, "message": "Registration successful. Please check your email to verify your account."}
@@ -181,20 +243,25 @@ def register_user(username, email, password):
     except mariadb.Error as e:
         Config.log_error(f"Database error during registration: {e}", 'auth')
         return {"error": "Registration failed", "code": 500}
+    except PasswordHasherBusy:
+        return {"error": "Server is busy, please try again shortly", "code": 503}
+
+
+def _find_login_user(email):
+    conn, cursor = get_db()
+    cursor.execute("SELECT id, password_hash, email_verified FROM users WHERE email = ?", (email,))
+    return cursor.fetchone()
 
 
-def login_user(email, password, secret_key):
+async def login_user(email, password, secret_key):
     """Login user with email verification check"""
     from app.config import Config
     
     Config.log_debug(f"Login attempt for email: {email}", 'auth')
     
-    conn, cursor = get_db()
-    
     try:
         Config.log_debug(f"Querying database for email: {email}", 'auth')
-        cursor.execute("SELECT id, password_hash, email_verified FROM users WHERE email = ?", (email,))
-        user = cursor.fetchone()
+        user = await run_io(_find_login_user, email)
         
         if not user:
             Config.log_warning(f"Login attempt for non-existent user: {email}", 'auth')
@@ -204,7 +271,7 @@ def login_user(email, password, secret_key):
         
         # Verify and migrate legacy passwords if necessary
         Config.log_debug("Calling verify_and_migrate_password", 'auth')
-        password_valid = verify_and_migrate_password(user['id'], user['password_hash'], password)
+        password_valid = await verify_and_migrate_password(user['id'], user['password_hash'], password)
         Config.log_debug(f"Password verification result: {password_valid}", 'auth')
         
         if not password_valid:
@@ -228,6 +295,9 @@ def login_user(email, password, secret_key):
     except mariadb.Error as e:
         Config.log_error(f"Database error during login: {e}", 'auth')
         return {"error": "Login failed", "code": 500}
+    except PasswordHasherBusy:
+        Config.log_warning("Login rejected: password hashing queue is full", 'auth')
+        return {"error": "Server is busy, please try again shortly", "code": 503}
     except Exception as e:
         Config.log_error(f"Unexpected error during login: {e}", 'auth')
         return {"error": "Login failed", "code": 500}
@@ -255,6 +325,7 @@ def verify_email_token(token):
             SET email_verified = TRUE, verification_token = NULL, verification_token_expires = NULL 
             WHERE id = ?
         """, (user['id'],))
+        user_cache.invalidate(user['id'])
         
         return {"success": True, "message": "Email verified successfully"}
         
@@ -299,14 +370,20 @@ def resend_verification_email(email):
         verification_token = generate_verification_token()
         verification_expires = now + datetime.timedelta(hours=24)
         print(f"[resend_verification_email] Generated token: {verification_token}", flush=True)
-        cursor.execute("""
-            UPDATE users 
-            SET verification_token = ?, verification_token_expires = ?, last_verification_sent = ? 
-            WHERE id = ?
-        """, (verification_token, verification_expires, now.strftime("%Y-%m-%d %H:%M:%S"), user['id']))
-        print(f"[resend_verification_email] DB updated for user {user['id']}", flush=True)
-        send_verification_email(email, verification_token)
-        print(f"[resend_verification_email] Email send function called.", flush=True)
+        conn.begin()
+        try:
+            cursor.execute("""
+                UPDATE users 
+                SET verification_token = ?, verification_token_expires = ?, last_verification_sent = ? 
+                WHERE id = ?
+            """, (verification_token, verification_expires, now.strftime("%Y-%m-%d %H:%M:%S"), user['id']))
+            enqueue_email(cursor, 'verification', email, verification_token)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        notify_email_worker()
+        print(f"[resend_verification_email] DB updated and email queued for user {user['id']}", flush=True)
         return {"success": True, "message": "Verification email sent"}
     except mariadb.Error as e:
         print(f"Database error during resend verification: {e}", flush=True)
@@ -330,15 +407,20 @@ def request_password_reset(email):
         reset_token = generate_verification_token()
         reset_expires = datetime.datetime.utcnow() + datetime.timedelta(hours=1)  # 1 hour expiry
         
-        # Store reset token in database
-        cursor.execute("""
-            UPDATE users 
-            SET reset_token = ?, reset_token_expires = ?
-            WHERE id = ?
-        """, (reset_token, reset_expires, user['id']))
-        
-        # Send password reset email
-        send_password_reset_email(email, reset_token)
+        # Store reset token and queue the email that carries it together
+        conn.begin()
+        try:
+            cursor.execute("""
+                UPDATE users 
+                SET reset_token = ?, reset_token_expires = ?
+                WHERE id = ?
+            """, (reset_token, reset_expires, user['id']))
+            enqueue_email(cursor, 'password_reset', email, reset_token)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        notify_email_worker()
         
         return {"success": True, "message": "If an account with that email exists, a password reset link has been sent"}
         
@@ -350,10 +432,29 @@ def request_password_reset(email):
         return {"error": "Failed to send password reset email", "code": 500}
 
 
-def reset_password(token, new_password):
-    """Reset password using a valid reset token"""
+def _find_reset_user(token):
     conn, cursor = get_db()
-    
+    cursor.execute("""
+        SELECT id, email, reset_token_expires 
+        FROM users 
+        WHERE reset_token = ? AND reset_token_expires > ?
+    """, (token, datetime.datetime.utcnow()))
+    return cursor.fetchone()
+
+
+def _apply_password_reset(user_id, hashed_password):
+    """Store the new hash and clear the reset token"""
+    conn, cursor = get_db()
+    cursor.execute("""
+        UPDATE users 
+        SET password_hash = ?, reset_token = NULL, reset_token_expires = NULL
+        WHERE id = ?
+    """, (hashed_password, user_id))
+    user_cache.invalidate(user_id)
+
+
+async def reset_password(token, new_password):
+    """Reset password using a valid reset token"""
     # Validate password strength
     is_valid, validation_details = PasswordValidator.validate_password(new_password)
     if not is_valid:
@@ -365,32 +466,23 @@ def reset_password(token, new_password):
     
     try:
         # Find user with valid reset token
-        cursor.execute("""
-            SELECT id, email, reset_token_expires 
-            FROM users 
-            WHERE reset_token = ? AND reset_token_expires > ?
-        """, (token, datetime.datetime.utcnow()))
-        
-        user = cursor.fetchone()
+        user = await run_io(_find_reset_user, token)
         
         if not user:
             return {"error": "Invalid or expired reset token", "code": 400}
         
         # Hash new password
-        hashed_password = hash_password(new_password)
+        hashed_password = await hash_password_async(new_password)
         
-        # Update password and clear reset token
-        cursor.execute("""
-            UPDATE users 
-            SET password_hash = ?, reset_token = NULL, reset_token_expires = NULL
-            WHERE id = ?
-        """, (hashed_password, user['id']))
+        await run_io(_apply_password_reset, user['id'], hashed_password)
         
         return {"success": True, "message": "Password has been reset successfully"}
         
     except mariadb.Error as e:
         print(f"Database error during password reset: {e}")
         return {"error": "Failed to reset password", "code": 500}
+    except PasswordHasherBusy:
+        return {"error": "Server is busy, please try again shortly", "code": 503}
 
 
 def initiate_email_change(user_id, current_password):
@@ -412,22 +504,28 @@ def initiate_email_change(user_id, current_password):
         confirmation_token = generate_verification_token()
         token_expires = datetime.datetime.utcnow() + datetime.timedelta(hours=1)  # 1 hour expiry
         
-        # Store token in database
-        cursor.execute("""
-            UPDATE users 
-            SET email_change_token = ?, email_change_token_expires = ?
-            WHERE id = ?
-        """, (confirmation_token, token_expires, user_id))
-        
-        # Send confirmation email to current email
-        from app.services.email_service import send_email_change_confirmation
-        send_email_change_confirmation(user['email'], confirmation_token)
+        # Store token and queue the confirmation to the current email together
+        conn.begin()
+        try:
+            cursor.execute("""
+                UPDATE users 
+                SET email_change_token = ?, email_change_token_expires = ?
+                WHERE id = ?
+            """, (confirmation_token, token_expires, user_id))
+            enqueue_email(cursor, 'email_change_confirmation', user['email'], confirmation_token)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        notify_email_worker()
         
         return {"success": True, "message": "Confirmation email sent to your current email address"}
         
     except mariadb.Error as e:
         print(f"Database error during email change initiation: {e}")
         return {"error": "Failed to initiate email change", "code": 500}
+    except PasswordHasherBusy:
+        return {"error": "Server is busy, please try again shortly", "code": 503}
 
 
 def confirm_email_change_request(token, new_email):
@@ -461,17 +559,21 @@ def confirm_email_change_request(token, new_email):
         verification_token = generate_verification_token()
         verification_expires = datetime.datetime.utcnow() + datetime.timedelta(hours=24)  # 24 hour expiry
         
-        # Store new email and verification token
-        cursor.execute("""
-            UPDATE users 
-            SET new_email = ?, new_email_token = ?, new_email_token_expires = ?,
-                email_change_token = NULL, email_change_token_expires = NULL
-            WHERE id = ?
-        """, (new_email, verification_token, verification_expires, user['id']))
-        
-        # Send verification email to new email address
-        from app.services.email_service import send_new_email_verification
-        send_new_email_verification(new_email, verification_token)
+        # Store new email and verification token, queueing the verification to the new address
+        conn.begin()
+        try:
+            cursor.execute("""
+                UPDATE users 
+                SET new_email = ?, new_email_token = ?, new_email_token_expires = ?,
+                    email_change_token = NULL, email_change_token_expires = NULL
+                WHERE id = ?
+            """, (new_email, verification_token, verification_expires, user['id']))
+            enqueue_email(cursor, 'new_email_verification', new_email, verification_token)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        notify_email_worker()
         
         return {"success": True, "message": f"Verification email sent to {new_email}"}
         
@@ -506,6 +608,7 @@ def verify_new_email(token):
                 new_email_token_expires = NULL
             WHERE id = ?
         """, (user['id'],))
+        user_cache.invalidate(user['id'])
         
         return {"success": True, "message": "Email address updated successfully"}
         
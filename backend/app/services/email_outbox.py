@@ -0,0 +1,269 @@
+"""
+Transactional email outbox and the background worker that delivers it
+
+Request handlers never talk to SMTP: they insert a row into email_outbox in
+the same transaction as the token it carries and nudge the worker. The
+worker claims due rows with a lease (so several server processes can run
+one each), sends them through email_service, and reschedules failures with
+exponential backoff until EMAIL_OUTBOX_MAX_ATTEMPTS, after which the row is
+kept as a dead letter for inspection or requeueing.
+"""
+import asyncio
+import json
+import random
+import secrets
+import threading
+import time
+from collections import deque
+import mariadb
+from app.config import Config
+from app.services.email_service import send_templated_email
+from app.services.email_templates import EMAIL_TEMPLATES
+from app.utils.executors import run_io
+
+# Outbox kinds are template names; delivery renders and sends them directly
+EMAIL_KINDS = tuple(EMAIL_TEMPLATES)
+
+
+def enqueue_email(cursor, kind, recipient, token):
+    """Queue an email on the caller's cursor; commit it together with the token it carries"""
+    if kind not in EMAIL_KINDS:
+        raise ValueError(f"Unknown email kind: {kind}")
+    cursor.execute(
+        "INSERT INTO email_outbox (kind, recipient, payload) VALUES (?, ?, ?)",
+        (kind, recipient, json.dumps({'token': token}))
+    )
+
+
+def notify_email_worker():
+    """Wake this process's worker after committing queued emails (safe from any thread)"""
+    email_worker.notify()
+
+
+def get_queue_depth(cursor):
+    """Outbox rows per status"""
+    cursor.execute("SELECT status, COUNT(*) AS count FROM email_outbox GROUP BY status")
+    depth = {'pending': 0, 'sending': 0, 'sent': 0, 'dead': 0}
+    depth.update({row['status']: row['count'] for row in cursor.fetchall()})
+    return depth
+
+
+def requeue_dead_emails(cursor, ids=None):
+    """Give dead letters a fresh set of attempts; returns the number requeued"""
+    query = """
+        UPDATE email_outbox
+        SET status = 'pending', attempts = 0, next_attempt_at = NOW(), last_error = NULL
+        WHERE status = 'dead'
+    """
+    params = ()
+    if ids:
+        query += f" AND id IN ({', '.join('?' for _ in ids)})"
+        params = tuple(ids)
+    cursor.execute(query, params)
+    return cursor.rowcount
+
+
+class EmailOutboxWorker:
+    """Background task that drains email_outbox"""
+
+    def __init__(self):
+        self._loop = None
+        self._wake = None
+        self._task = None
+        self._stopping = False
+        self._last_cleanup = 0.0
+        self._stats_lock = threading.Lock()
+        self._recent_sends = deque()
+        self.counters = {'sent': 0, 'failed': 0, 'dead': 0, 'batches': 0, 'send_time_total': 0.0}
+
+    def start(self, loop):
+        """Start draining the outbox on the given event loop"""
+        self._loop = loop
+        self._wake = asyncio.Event()
+        self._stopping = False
+        self._task = loop.create_task(self._run())
+        Config.log_info("Email outbox worker started", 'email')
+        # Leases are renewed per message, so one only has to cover a single send:
+        # waiting for a pooled session plus a stalled SMTP command on each of two attempts
+        single_send = Config.EMAIL_SMTP_POOL_TIMEOUT + 2 * Config.EMAIL_SMTP_TIMEOUT
+        if Config.EMAIL_OUTBOX_LEASE_SECONDS <= single_send:
+            Config.log_warning(
+                f"EMAIL_OUTBOX_LEASE_SECONDS ({Config.EMAIL_OUTBOX_LEASE_SECONDS}s) is shorter than one slow send "
+                f"({single_send:.0f}s); another worker may re-send emails still in flight", 'email'
+            )
+
+    async def stop(self):
+        if not self._task:
+            return
+        self._stopping = True
+        self._wake.set()
+        try:
+            await asyncio.wait_for(self._task, timeout=Config.EMAIL_OUTBOX_SHUTDOWN_TIMEOUT)
+        except asyncio.TimeoutError:
+            self._task.cancel()
+        self._task = None
+
+    def notify(self):
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                claimed = await run_io(self.process_batch)
+            except Exception as e:
+                Config.log_error(f"Email outbox batch failed: {e}", 'email')
+                claimed = 0
+
+            # A full batch means more is probably due; otherwise sleep until nudged or the next poll
+            if claimed >= Config.EMAIL_OUTBOX_BATCH_SIZE:
+                continue
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=Config.EMAIL_OUTBOX_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    def process_batch(self):
+        """Claim and deliver one batch of due emails; returns how many were claimed"""
+        from app import acquire_db_connection, release_db_connection
+
+        connection = acquire_db_connection()
+        discard = False
+        try:
+            cursor = connection.cursor(dictionary=True)
+            messages = self.claim_batch(cursor)
+            for message in messages:
+                self.deliver(cursor, message)
+            self.cleanup_sent(cursor)
+            with self._stats_lock:
+                self.counters['batches'] += 1
+            return len(messages)
+        except mariadb.Error:
+            discard = True
+            raise
+        finally:
+            release_db_connection(connection, discard=discard)
+
+    def claim_batch(self, cursor):
+        """Lease due rows (and rows whose previous lease ran out) to this worker"""
+        token = secrets.token_hex(16)
+        cursor.execute("""
+            UPDATE email_outbox
+            SET status = 'sending', claim_token = ?, locked_until = NOW() + INTERVAL ? SECOND
+            WHERE (status = 'pending' AND next_attempt_at <= NOW())
+               OR (status = 'sending' AND locked_until < NOW())
+            ORDER BY next_attempt_at, id
+            LIMIT ?
+        """, (token, Config.EMAIL_OUTBOX_LEASE_SECONDS, Config.EMAIL_OUTBOX_BATCH_SIZE))
+        if cursor.rowcount == 0:
+            return []
+        cursor.execute("""
+            SELECT id, kind, recipient, payload, attempts, claim_token
+            FROM email_outbox WHERE claim_token = ? ORDER BY id
+        """, (token,))
+        return cursor.fetchall()
+
+    def renew_lease(self, cursor, message):
+        """Extend the lease on a claimed row just before sending it; False if it was lost.
+
+        Rows later in a batch wait while earlier ones are sent, so without
+        renewal a slow batch could outlive EMAIL_OUTBOX_LEASE_SECONDS and
+        another worker would re-claim (and re-send) rows still in flight.
+        """
+        cursor.execute("""
+            UPDATE email_outbox
+            SET locked_until = NOW() + INTERVAL ? SECOND
+            WHERE id = ? AND claim_token = ? AND status = 'sending'
+        """, (Config.EMAIL_OUTBOX_LEASE_SECONDS, message['id'], message['claim_token']))
+        return cursor.rowcount == 1
+
+    def deliver(self, cursor, message):
+        """Send one claimed email and record the outcome"""
+        if not self.renew_lease(cursor, message):
+            Config.log_warning(f"Email {message['id']} was re-claimed by another worker, skipping", 'email')
+            return
+        attempts = message['attempts'] + 1
+        error = None
+        started = time.monotonic()
+        if message['kind'] not in EMAIL_KINDS:
+            error = f"Unknown email kind: {message['kind']}"
+            attempts = Config.EMAIL_OUTBOX_MAX_ATTEMPTS
+        else:
+            try:
+                token = json.loads(message['payload'] or '{}').get('token')
+                # SMTP errors propagate here so last_error records what actually went wrong
+                if not send_templated_email(message['kind'], message['recipient'], token):
+                    error = "Email configuration missing"
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+        elapsed = time.monotonic() - started
+
+        if error is None:
+            cursor.execute("""
+                UPDATE email_outbox
+                SET status = 'sent', sent_at = NOW(), attempts = ?, payload = NULL,
+                    claim_token = NULL, locked_until = NULL, last_error = NULL
+                WHERE id = ? AND claim_token = ?
+            """, (attempts, message['id'], message['claim_token']))
+            self._record('sent', elapsed)
+        elif attempts >= Config.EMAIL_OUTBOX_MAX_ATTEMPTS:
+            cursor.execute("""
+                UPDATE email_outbox
+                SET status = 'dead', attempts = ?, claim_token = NULL, locked_until = NULL, last_error = ?
+                WHERE id = ? AND claim_token = ?
+            """, (attempts, error[:1000], message['id'], message['claim_token']))
+            self._record('dead', elapsed)
+            Config.log_error(f"Email {message['id']} ({message['kind']}) dead-lettered after {attempts} attempts: {error}", 'email')
+        else:
+            delay = min(Config.EMAIL_OUTBOX_RETRY_BASE * 2 ** (attempts - 1), Config.EMAIL_OUTBOX_RETRY_MAX)
+            delay = int(delay * random.uniform(0.8, 1.2))
+            cursor.execute("""
+                UPDATE email_outbox
+                SET status = 'pending', attempts = ?, next_attempt_at = NOW() + INTERVAL ? SECOND,
+                    claim_token = NULL, locked_until = NULL, last_error = ?
+                WHERE id = ? AND claim_token = ?
+            """, (attempts, delay, error[:1000], message['id'], message['claim_token']))
+            self._record('failed', elapsed)
+            Config.log_warning(f"Email {message['id']} ({message['kind']}) failed, retrying in {delay}s: {error}", 'email')
+
+    def cleanup_sent(self, cursor):
+        """Delete delivered rows past their retention, at most once a minute"""
+        now = time.monotonic()
+        if now - self._last_cleanup < 60:
+            return
+        self._last_cleanup = now
+        cursor.execute(
+            "DELETE FROM email_outbox WHERE status = 'sent' AND sent_at < NOW() - INTERVAL ? DAY LIMIT 1000",
+            (Config.EMAIL_OUTBOX_RETENTION_DAYS,)
+        )
+
+    def _record(self, outcome, elapsed):
+        with self._stats_lock:
+            self.counters[outcome] += 1
+            self.counters['send_time_total'] += elapsed
+            if outcome == 'sent':
+                now = time.monotonic()
+                self._recent_sends.append(now)
+                while self._recent_sends and self._recent_sends[0] < now - 60:
+                    self._recent_sends.popleft()
+
+    def stats(self):
+        """Delivery counters for this process"""
+        with self._stats_lock:
+            now = time.monotonic()
+            while self._recent_sends and self._recent_sends[0] < now - 60:
+                self._recent_sends.popleft()
+            attempts = self.counters['sent'] + self.counters['failed'] + self.counters['dead']
+            return {
+                "running": self._task is not None and not self._task.done(),
+                "sent": self.counters['sent'],
+                "failed": self.counters['failed'],
+                "dead_lettered": self.counters['dead'],
+                "batches": self.counters['batches'],
+                "sent_last_minute": len(self._recent_sends),
+                "avg_send_seconds": round(self.counters['send_time_total'] / attempts, 3) if attempts else 0.0
+            }
+
+# Global instance
+email_worker = EmailOutboxWorker()
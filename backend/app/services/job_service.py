@@ -1,6 +1,7 @@
 # Job service functions
-# Currently handled directly in routes/jobs.py
-# This file is kept for future expansion
+# Transactional create/update/delete of job applications together with
+# their status history and per-user status-flow counters, used by
+# routes/jobs.py and the admin routes
 
 def validate_job_data(data):
     """Validate job application data"""
@@ -8,4 +9,196 @@ def validate_job_data(data):
     for field in required_fields:
         if not data.get(field):
             return f"{field.replace('_', ' ').title()} is required"
-    return None
\ No newline at end of file
+    return None
+
+# Status flow counters
+#
+# job_status_flow_counts holds, per job owner, how many times each
+# (from_status, to_status) transition appears in job_status_history.
+# Initial statuses are stored with from_status = '' since it is part of the
+# primary key. The counters are kept in step with the history table by
+# record_status_transition() and remove_job_status_flow(), and can be
+# recomputed from scratch with rebuild_status_flow_counts().
+
+def record_status_transition(cursor, owner_id, from_status, to_status):
+    """Count one status transition (from_status None = initial status) for a job owner"""
+    cursor.execute("""
+        INSERT INTO job_status_flow_counts (user_id, from_status, to_status, transition_count)
+        VALUES (?, ?, ?, 1)
+        ON DUPLICATE KEY UPDATE transition_count = transition_count + 1
+    """, (owner_id, from_status or '', to_status))
+
+def remove_job_status_flow(cursor, job_id, owner_id):
+    """Subtract a job's history from its owner's counters; call before deleting the job"""
+    cursor.execute("""
+        UPDATE job_status_flow_counts c
+        JOIN (
+            SELECT COALESCE(from_status, '') AS from_status, to_status, COUNT(*) AS transitions
+            FROM job_status_history
+            WHERE job_id = ?
+            GROUP BY COALESCE(from_status, ''), to_status
+        ) h ON c.from_status = h.from_status AND c.to_status = h.to_status
+        SET c.transition_count = GREATEST(c.transition_count - h.transitions, 0)
+        WHERE c.user_id = ?
+    """, (job_id, owner_id))
+    cursor.execute(
+        "DELETE FROM job_status_flow_counts WHERE user_id = ? AND transition_count = 0",
+        (owner_id,)
+    )
+
+def get_status_flow(cursor, user_id):
+    """Return (transitions, initial_statuses) for a user from the precomputed counters"""
+    cursor.execute("""
+        SELECT from_status, to_status, transition_count
+        FROM job_status_flow_counts
+        WHERE user_id = ? AND transition_count > 0
+        ORDER BY transition_count DESC
+    """, (user_id,))
+    
+    transitions = []
+    initial_statuses = []
+    for row in cursor.fetchall():
+        if row['from_status']:
+            transitions.append({
+                'from_status': row['from_status'],
+                'to_status': row['to_status'],
+                'count': row['transition_count']
+            })
+        else:
+            initial_statuses.append({
+                'status': row['to_status'],
+                'count': row['transition_count']
+            })
+    return transitions, initial_statuses
+
+def rebuild_status_flow_counts(conn, cursor, user_id=None):
+    """Recompute the counters from job_status_history (all users, or one) in one transaction"""
+    user_filter = "WHERE user_id = ?" if user_id is not None else ""
+    job_filter = "WHERE j.user_id = ?" if user_id is not None else ""
+    params = (user_id,) if user_id is not None else ()
+    
+    conn.begin()
+    try:
+        cursor.execute(f"DELETE FROM job_status_flow_counts {user_filter}", params)
+        cursor.execute(f"""
+            INSERT INTO job_status_flow_counts (user_id, from_status, to_status, transition_count)
+            SELECT j.user_id, COALESCE(jsh.from_status, ''), jsh.to_status, COUNT(*)
+            FROM job_status_history jsh
+            INNER JOIN job_applications j ON jsh.job_id = j.id
+            {job_filter}
+            GROUP BY j.user_id, COALESCE(jsh.from_status, ''), jsh.to_status
+        """, params)
+        rows = cursor.rowcount
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return rows
+
+
+# Job writes
+#
+# Each write runs as one explicit transaction on the request's connection,
+# so a job row and its status history are committed (or rolled back)
+# together. Callers invoke these with a single run_io() hop.
+
+def add_status_history(cursor, job_id, from_status, to_status, user_id, notes=None, owner_id=None):
+    """Add a status change entry to the history table and count it for the job owner"""
+    cursor.execute("""
+        INSERT INTO job_status_history (job_id, from_status, to_status, created_by, notes)
+        VALUES (?, ?, ?, ?, ?)
+    """, (job_id, from_status, to_status, user_id, notes))
+    record_status_transition(cursor, owner_id or user_id, from_status, to_status)
+
+def create_job_record(conn, cursor, user_id, job_title, company_name, application_date,
+                      status, job_url, notes, location):
+    """Insert a job with its initial status history and return the stored row"""
+    conn.begin()
+    try:
+        cursor.execute("""
+            INSERT INTO job_applications
+            (user_id, job_title, company_name, application_date, status, job_url, notes, location)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            RETURNING *
+        """, (user_id, job_title, company_name, application_date, status, job_url, notes, location))
+        job = cursor.fetchone()
+        
+        if job['status']:
+            add_status_history(cursor, job['id'], None, job['status'], user_id)
+        
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return job
+
+def update_job_record(conn, cursor, job_id, user_id, is_admin, update_fields):
+    """Apply an update (and status history) to a job the user owns, or any job for admins.
+
+    Returns {"job": row} on success, otherwise {"error"/"message": ..., "code": ...}.
+    """
+    set_clause = ", ".join([f"{field} = ?" for field in update_fields])
+    values = list(update_fields.values())
+    
+    conn.begin()
+    try:
+        if 'status' in update_fields:
+            # The previous status is needed for history; lock the row until commit
+            cursor.execute("SELECT user_id, status FROM job_applications WHERE id = ? FOR UPDATE", (job_id,))
+            current_job = cursor.fetchone()
+            if not current_job:
+                conn.rollback()
+                return {"error": "Job application not found", "code": 404}
+            if current_job['user_id'] != user_id and not is_admin:
+                conn.rollback()
+                return {"error": "Access denied", "code": 403}
+            
+            if current_job['status'] != update_fields['status']:
+                # Use the ID of the user performing the change
+                add_status_history(cursor, job_id, current_job['status'], update_fields['status'],
+                                   user_id, owner_id=current_job['user_id'])
+            
+            cursor.execute(f"UPDATE job_applications SET {set_clause} WHERE id = ?", (*values, job_id))
+        elif is_admin:
+            cursor.execute(f"UPDATE job_applications SET {set_clause} WHERE id = ?", (*values, job_id))
+        else:
+            # Ownership is part of the predicate, so no read is needed up front
+            cursor.execute(
+                f"UPDATE job_applications SET {set_clause} WHERE id = ? AND user_id = ?",
+                (*values, job_id, user_id)
+            )
+        
+        if cursor.rowcount == 0:
+            # Nothing changed: work out whether the job is missing, not ours, or identical
+            cursor.execute("SELECT user_id FROM job_applications WHERE id = ?", (job_id,))
+            existing = cursor.fetchone()
+            conn.commit()
+            if not existing:
+                return {"error": "Job application not found", "code": 404}
+            if existing['user_id'] != user_id and not is_admin:
+                return {"error": "Access denied", "code": 403}
+            # This can happen if the submitted data is the same as the existing data
+            return {"message": "No changes detected or applied", "code": 200}
+        
+        # MariaDB has no UPDATE ... RETURNING, so read the row back inside the transaction
+        cursor.execute("SELECT * FROM job_applications WHERE id = ?", (job_id,))
+        job = cursor.fetchone()
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return {"job": job}
+
+def delete_job_record(conn, cursor, job_id, owner_id):
+    """Delete a job and take its history out of the owner's flow counters; returns rows deleted"""
+    conn.begin()
+    try:
+        # History rows cascade with the job, so settle the counters first
+        remove_job_status_flow(cursor, job_id, owner_id)
+        cursor.execute("DELETE FROM job_applications WHERE id = ?", (job_id,))
+        deleted = cursor.rowcount
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return deleted
@@ -1,12 +1,86 @@
-import redis
-import requests
 import json
 import time
 import os
 import base64
 import hashlib
+import random
+import secrets
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
 from urllib.parse import quote
 from app.config import Config
+from app.utils.executors import run_cpu_sync
+from app.utils.http_client import http_get, http_head, get_http_stats
+from app.utils.logo_images import normalize_logo
+from app.utils.redis_client import get_binary_redis, get_text_redis
+
+class LocalImageCache:
+    """Bounded in-process LRU of logo images, sized by bytes rather than entries"""
+    
+    def __init__(self, max_bytes, max_ttl):
+        self.max_bytes = max_bytes
+        self.max_ttl = max_ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, cache_key):
+        """Return the cached entry dict or None"""
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry and entry[0] > time.time():
+                self._entries.move_to_end(cache_key)
+                self.hits += 1
+                return entry[1]
+            if entry:
+                self._remove(cache_key)
+            self.misses += 1
+            return None
+    
+    def set(self, cache_key, entry, redis_expires_at):
+        """Store an entry; it never outlives its Redis copy or max_ttl"""
+        size = len(entry['image_data'])
+        if size > self.max_bytes:
+            return
+        expires_at = min(redis_expires_at, time.time() + self.max_ttl)
+        with self._lock:
+            if cache_key in self._entries:
+                self._remove(cache_key)
+            self._entries[cache_key] = (expires_at, entry, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self.evictions += 1
+    
+    def pop(self, cache_key):
+        with self._lock:
+            if cache_key in self._entries:
+                self._remove(cache_key)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+    
+    def _remove(self, cache_key):
+        _, _, size = self._entries.pop(cache_key)
+        self.current_bytes -= size
+    
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
 
 class LogoCacheService:
     """Service for caching company logo images using Redis"""
@@ -20,6 +94,19 @@ class LogoCacheService:
         self.search_cache_ttl = 24 * 60 * 60  # 1 day for search results
         self.autocomplete_cache_ttl = 6 * 60 * 60  # 6 hours for autocomplete
         self.service_config = 'brandfetch'  # Only use Brandfetch
+        self._register_script = None
+        self._unregister_script = None
+        # Single-flight bookkeeping for concurrent cache misses
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+        self.single_flight_stats = {'upstream_fetches': 0, 'coalesced_local': 0, 'coalesced_remote': 0}
+        self.negative_stats = {'hits': 0, 'stored': 0}
+        self.prefix_stats = {'local_answers': 0, 'upstream_searches': 0}
+        self._prefix_index_seeded = False
+        # Hot logos served from process memory without a Redis round trip
+        self.local_cache = LocalImageCache(Config.LOGO_LOCAL_CACHE_MAX_BYTES, Config.LOGO_LOCAL_CACHE_TTL)
+        # Bytes downloaded vs bytes stored after normalization, since startup
+        self.normalize_stats = {'ingested_bytes': 0, 'stored_bytes': 0}
         self.connect_redis()
         self.load_service_config()  # Load saved configuration
         
@@ -30,34 +117,12 @@ class LogoCacheService:
         print(f"   - Should use Brandfetch: {self.should_use_brandfetch()}")
     
     def connect_redis(self):
-        """Connect to Redis server"""
+        """Attach to the shared Redis connection pool"""
         try:
-            redis_config = {
-                'host': Config.REDIS_HOST,
-                'port': Config.REDIS_PORT,
-                'db': Config.REDIS_DB,
-                'decode_responses': False,  # Binary mode for images
-                'socket_timeout': 10,
-                'socket_connect_timeout': 10
-            }
-            
-            # Add password if configured
-            if Config.REDIS_PASSWORD:
-                redis_config['password'] = Config.REDIS_PASSWORD
-            
-            # Add SSL configuration if enabled
-            if Config.REDIS_SSL:
-                redis_config['ssl'] = True
-                if Config.REDIS_SSL_CERT_REQS:
-                    import ssl
-                    if Config.REDIS_SSL_CERT_REQS.lower() == 'required':
-                        redis_config['ssl_cert_reqs'] = ssl.CERT_REQUIRED
-                    elif Config.REDIS_SSL_CERT_REQS.lower() == 'optional':
-                        redis_config['ssl_cert_reqs'] = ssl.CERT_OPTIONAL
-                    else:
-                        redis_config['ssl_cert_reqs'] = ssl.CERT_NONE
-            
-            self.redis_client = redis.Redis(**redis_config)
+            # Binary client for images; text lookups go through get_text_redis()
+            self.redis_client = get_binary_redis()
+            if self.redis_client is None:
+                raise ValueError("REDIS_HOST is not configured")
             # Test connection
             self.redis_client.ping()
             print("Redis connection successful")
@@ -85,28 +150,148 @@ class LogoCacheService:
         safe_name = clean_name.replace(' ', '_').replace('.', '_').replace('/', '_')[:30]
         return f"logo_meta:{safe_name}_{name_hash}"
     
-    def get_logo_data(self, company_name):
+    def get_variant_key(self, cache_key, size):
+        """Cache key for a resized variant of the logo stored under cache_key"""
+        return f"logo_variant:{size}:{cache_key[len('logo_img:'):]}"
+    
+    def pick_variant(self, size):
+        """Smallest configured variant size that covers a requested display size, or None"""
+        if not size:
+            return None
+        candidates = [variant for variant in Config.LOGO_VARIANT_SIZES if variant >= size]
+        return min(candidates) if candidates else None
+    
+    def get_logo_data(self, company_name, bypass_negative=False):
         """Get logo image data with caching using only Brandfetch API"""
+        entry = self.get_logo_entry(company_name, bypass_negative)
+        if not entry:
+            return None, None
+        return entry['image_data'], entry['content_type']
+    
+    def get_logo_entry(self, company_name, bypass_negative=False, size=None):
+        """Like get_logo_data, but returns the cache entry dict (image_data, content_type, metadata) or None.
+
+        With size, the smallest cached variant at least that many pixels
+        across is preferred; the full logo is returned when there is none.
+        """
         if not company_name:
             print(f"❌ get_logo_data: No company name provided")
-            return None, None
+            return None
         
         print(f"🔍 get_logo_data: Searching for logo for '{company_name}'")
         
         cache_key = self.get_cache_key(company_name)
         meta_key = self.get_metadata_key(company_name)
+        variant = self.pick_variant(size)
+        if variant:
+            cached_variant = self.get_image_from_cache(self.get_variant_key(cache_key, variant), meta_key, variant)
+            if cached_variant:
+                return cached_variant
         
         # Step 1: Try to get cached image from Redis
         cached_data = self.get_image_from_cache(cache_key, meta_key)
         if cached_data:
             print(f"✅ get_logo_data: Logo found in CACHE for '{company_name}' (source: {cached_data.get('metadata', {}).get('source', 'unknown')})")
-            return cached_data['image_data'], cached_data['content_type']
+            return cached_data
+        
+        # Step 2: Skip companies recently found to have no usable logo
+        if not bypass_negative:
+            reason = self.get_negative_result(company_name)
+            if reason:
+                print(f"⏭️ get_logo_data: Negative cache hit for '{company_name}' ({reason})")
+                return None
         
         print(f"🔄 get_logo_data: No cache hit for '{company_name}', trying Brandfetch API...")
         
-        # Step 2: Try Brandfetch API for company search
+        # Step 3: Fetch upstream, sharing one fetch between concurrent misses
+        image_data, content_type = self.fetch_single_flight(company_name, cache_key, meta_key)
+        if not image_data:
+            return None
+        if variant:
+            cached_variant = self.get_image_from_cache(self.get_variant_key(cache_key, variant), meta_key, variant)
+            if cached_variant:
+                return cached_variant
+        return {'image_data': image_data, 'content_type': content_type, 'metadata': {}}
+    
+    def fetch_single_flight(self, company_name, cache_key, meta_key):
+        """Fetch a missing logo once, however many callers miss on it at the same time.
+
+        Callers in this process wait on the leader's future; other workers
+        see the Redis fetch lock and poll the cache until the holder is done.
+        """
+        with self._inflight_lock:
+            future = self._inflight.get(cache_key)
+            is_leader = future is None
+            if is_leader:
+                future = Future()
+                self._inflight[cache_key] = future
+            else:
+                self.single_flight_stats['coalesced_local'] += 1
+        
+        if not is_leader:
+            try:
+                return future.result(timeout=Config.LOGO_FETCH_WAIT_TIMEOUT)
+            except Exception as e:
+                print(f"❌ get_logo_data: Gave up waiting for in-flight fetch of '{company_name}': {e}")
+                return None, None
+        
+        result = (None, None)
+        try:
+            result = self.fetch_with_redis_lock(company_name, cache_key, meta_key)
+            return result
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(cache_key, None)
+            future.set_result(result)
+    
+    def fetch_with_redis_lock(self, company_name, cache_key, meta_key):
+        """Fetch upstream under a short Redis lock so only one worker calls Brandfetch"""
+        text_redis = get_text_redis()
+        lock_key = f"logo_fetch_lock:{cache_key}"
+        token = secrets.token_hex(8)
+        
+        acquired = True
+        if text_redis:
+            try:
+                acquired = text_redis.set(lock_key, token, nx=True, px=int(Config.LOGO_FETCH_LOCK_TTL * 1000))
+            except Exception as e:
+                # Fail open: a duplicate fetch beats no logo
+                print(f"Error acquiring logo fetch lock for {company_name}: {e}")
+        
+        if not acquired:
+            with self._inflight_lock:
+                self.single_flight_stats['coalesced_remote'] += 1
+            deadline = time.monotonic() + Config.LOGO_FETCH_WAIT_TIMEOUT
+            while time.monotonic() < deadline:
+                time.sleep(0.1)
+                cached_data = self.get_image_from_cache(cache_key, meta_key)
+                if cached_data:
+                    return cached_data['image_data'], cached_data['content_type']
+                try:
+                    if not text_redis.exists(lock_key):
+                        # Holder finished without caching anything: no logo to be had
+                        break
+                except Exception:
+                    break
+            return None, None
+        
+        try:
+            with self._inflight_lock:
+                self.single_flight_stats['upstream_fetches'] += 1
+            return self.fetch_from_brandfetch(company_name, cache_key, meta_key)
+        finally:
+            if text_redis:
+                try:
+                    # Only delete the lock if it is still ours
+                    text_redis.eval(self.RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+                except Exception as e:
+                    print(f"Error releasing logo fetch lock for {company_name}: {e}")
+    
+    def fetch_from_brandfetch(self, company_name, cache_key, meta_key):
+        """Search Brandfetch for a company and download and cache its logo"""
+        failure = {}
         try:
-            search_result = self.search_brandfetch_api(company_name)
+            search_result = self.search_brandfetch_api(company_name, failure)
             print(f"🔍 get_logo_data: search_brandfetch_api returned: {search_result}")
             
             if search_result:
@@ -114,27 +299,118 @@ class LogoCacheService:
                 found_company_name = search_result.get('company_name', 'Unknown')
                 if logo_url:
                     print(f"🎯 get_logo_data: Found logo via BRANDFETCH API for '{company_name}' -> '{found_company_name}': {logo_url}")
-                    image_data, content_type = self.download_and_cache_image(logo_url, cache_key, meta_key, company_name, source='brandfetch_api')
+                    image_data, content_type = self.download_and_cache_image(logo_url, cache_key, meta_key, company_name, source='brandfetch_api', failure=failure)
                     if image_data:
                         print(f"✅ get_logo_data: Successfully downloaded and cached logo from BRANDFETCH for '{company_name}' -> '{found_company_name}'")
                         return image_data, content_type
                     else:
                         print(f"❌ get_logo_data: Failed to download image for '{company_name}' from URL: {logo_url}")
                 else:
+                    self.note_failure(failure, 'no_match')
                     print(f"❌ get_logo_data: No logo URL in search result for '{company_name}'")
             else:
                 print(f"❌ get_logo_data: search_brandfetch_api returned None for '{company_name}'")
         except Exception as e:
+            self.note_failure(failure, 'http_error')
             print(f"❌ get_logo_data: Exception during Brandfetch API search for '{company_name}': {e}")
 
         print(f"❌ get_logo_data: No logo found for '{company_name}' from Brandfetch API")
+        if failure.get('reason'):
+            self.cache_negative_result(company_name, failure['reason'])
         return None, None
     
-    def download_and_cache_image(self, logo_url, cache_key, meta_key, company_name, source='generated'):
+    # Negative cache
+    #
+    # Lookups that found no usable logo are remembered under
+    # logo_miss:<reason>:<name> for a reason-specific TTL with jitter, so
+    # expiries of a burst of misses spread out instead of retrying together.
+    
+    NEGATIVE_REASONS = ('no_match', 'http_error', 'invalid_content_type')
+    NEGATIVE_FLAG_KEY = 'logo_negative_cache_enabled'
+    
+    @staticmethod
+    def note_failure(failure, reason):
+        """Record why a lookup failed (first reason wins)"""
+        if failure is not None:
+            failure.setdefault('reason', reason)
+    
+    def get_negative_key(self, company_name, reason):
+        """Generate negative cache key for a failure reason"""
+        suffix = self.get_cache_key(company_name)[len('logo_img:'):]
+        return f"logo_miss:{reason}:{suffix}"
+    
+    def negative_ttl(self, reason):
+        """TTL for a negative entry, jittered by +/- LOGO_NEGATIVE_TTL_JITTER"""
+        base = {
+            'no_match': Config.LOGO_NEGATIVE_TTL_NO_MATCH,
+            'http_error': Config.LOGO_NEGATIVE_TTL_HTTP_ERROR,
+            'invalid_content_type': Config.LOGO_NEGATIVE_TTL_INVALID_CONTENT
+        }[reason]
+        jitter = Config.LOGO_NEGATIVE_TTL_JITTER
+        return max(1, int(base * random.uniform(1 - jitter, 1 + jitter)))
+    
+    def get_negative_result(self, company_name):
+        """Return the cached failure reason for a company, or None"""
+        text_redis = get_text_redis()
+        if not text_redis:
+            return None
+        
+        try:
+            # The admin on/off flag rides along in the same MGET
+            keys = [self.NEGATIVE_FLAG_KEY] + [self.get_negative_key(company_name, reason) for reason in self.NEGATIVE_REASONS]
+            flag, *entries = text_redis.mget(keys)
+            if flag == 'off':
+                return None
+            for reason, entry in zip(self.NEGATIVE_REASONS, entries):
+                if entry:
+                    with self._inflight_lock:
+                        self.negative_stats['hits'] += 1
+                    return reason
+        except Exception as e:
+            print(f"Error reading negative logo cache for {company_name}: {e}")
+        return None
+    
+    def cache_negative_result(self, company_name, reason):
+        """Remember that a company has no usable logo, for a reason-specific TTL"""
+        text_redis = get_text_redis()
+        if not text_redis or reason not in self.NEGATIVE_REASONS:
+            return
+        
+        try:
+            key = self.get_negative_key(company_name, reason)
+            ttl = self.negative_ttl(reason)
+            payload = json.dumps({'reason': reason, 'company_name': company_name, 'cached_at': int(time.time())})
+            text_redis.setex(key, ttl, payload)
+            self.register_cache_keys([(key, len(payload), ttl)])
+            with self._inflight_lock:
+                self.negative_stats['stored'] += 1
+            print(f"Cached negative logo result for {company_name} ({reason}, {ttl}s)")
+        except Exception as e:
+            print(f"Error caching negative logo result for {company_name}: {e}")
+    
+    def is_negative_cache_enabled(self):
+        """Whether negative entries are honoured (admin switch, shared by all workers)"""
+        text_redis = get_text_redis()
+        if not text_redis:
+            return False
+        try:
+            return text_redis.get(self.NEGATIVE_FLAG_KEY) != 'off'
+        except Exception:
+            return True
+    
+    def set_negative_cache_enabled(self, enabled):
+        """Turn the negative cache on or off for every worker"""
+        text_redis = get_text_redis()
+        if not text_redis:
+            return {"error": "Redis not connected"}
+        text_redis.set(self.NEGATIVE_FLAG_KEY, 'on' if enabled else 'off')
+        return {"negative_cache_enabled": bool(enabled), "success": True}
+    
+    def download_and_cache_image(self, logo_url, cache_key, meta_key, company_name, source='generated', failure=None):
         """Download image from URL and cache in Redis"""
         try:
             # Download the image
-            response = requests.get(logo_url, timeout=10, headers={
+            response = http_get('logo_download', logo_url, timeout=10, headers={
                 'User-Agent': 'jobtrack.dev-LogoCache/1.0'
             })
             
@@ -143,68 +419,128 @@ class LogoCacheService:
                 
                 # Validate it's actually an image
                 if not content_type.startswith('image/'):
+                    self.note_failure(failure, 'invalid_content_type')
                     print(f"Invalid content type for {company_name}: {content_type}")
                     return None, None
                 
-                image_data = response.content
+                original_size = len(response.content)
+                
+                # Sanitize SVGs, shrink oversized rasters and build the small variants
+                try:
+                    image_data, content_type, variants = run_cpu_sync(
+                        normalize_logo, response.content, content_type, Config.LOGO_VARIANT_SIZES,
+                        Config.LOGO_MAX_DIMENSION, Config.LOGO_VARIANT_QUALITY
+                    )
+                except ValueError as e:
+                    self.note_failure(failure, 'invalid_content_type')
+                    print(f"Rejected logo for {company_name}: {e}")
+                    return None, None
                 
                 # Cache the image and metadata
-                self.cache_image(cache_key, meta_key, image_data, content_type, company_name, source)
+                self.cache_image(cache_key, meta_key, image_data, content_type, company_name, source,
+                                 variants=variants, original_size=original_size)
                 
                 return image_data, content_type
             else:
+                self.note_failure(failure, 'http_error')
                 print(f"Failed to download logo for {company_name}: HTTP {response.status_code}")
                 return None, None
                 
         except Exception as e:
+            self.note_failure(failure, 'http_error')
             print(f"Error downloading logo for {company_name}: {e}")
             return None, None
     
-    def cache_image(self, cache_key, meta_key, image_data, content_type, company_name, source='generated'):
-        """Cache image data and metadata in Redis"""
+    def cache_image(self, cache_key, meta_key, image_data, content_type, company_name, source='generated',
+                    variants=None, original_size=None):
+        """Cache image data, its resized variants ({size: (data, content_type)}) and metadata in Redis"""
         if not self.redis_client:
             return
         
         try:
-            # Cache the raw image data
-            self.redis_client.setex(cache_key, self.cache_ttl, image_data)
-            
+            variants = variants or {}
             # Cache metadata as JSON
             metadata = {
                 'content_type': content_type,
                 'company_name': company_name,
                 'source': source,
                 'cached_at': int(time.time()),
-                'size': len(image_data)
+                'size': len(image_data),
+                'original_size': original_size or len(image_data),
+                'etag': self.compute_etag(image_data),
+                'variants': {
+                    str(size): {
+                        'content_type': variant_type,
+                        'size': len(variant_data),
+                        'etag': self.compute_etag(variant_data)
+                    }
+                    for size, (variant_data, variant_type) in variants.items()
+                }
             }
+            meta_json = json.dumps(metadata)
+            
+            # Image, variants and metadata in one round trip
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.setex(cache_key, self.cache_ttl, image_data)
+            registered = [(cache_key, len(image_data), self.cache_ttl)]
+            for size, (variant_data, _) in variants.items():
+                variant_key = self.get_variant_key(cache_key, size)
+                pipe.setex(variant_key, self.cache_ttl, variant_data)
+                registered.append((variant_key, len(variant_data), self.cache_ttl))
+            pipe.setex(meta_key, self.cache_ttl, meta_json)
+            registered.append((meta_key, len(meta_json), self.cache_ttl))
+            pipe.execute()
+            
+            with self._inflight_lock:
+                self.normalize_stats['ingested_bytes'] += metadata['original_size']
+                self.normalize_stats['stored_bytes'] += sum(size for _, size, _ in registered[:-1])
             
-            self.redis_client.setex(meta_key, self.cache_ttl, json.dumps(metadata))
+            self.local_cache.set(cache_key, {
+                'image_data': image_data,
+                'content_type': content_type,
+                'metadata': metadata
+            }, metadata['cached_at'] + self.cache_ttl)
+            self.register_cache_keys(registered)
             print(f"Cached image for {company_name} ({len(image_data)} bytes)")
             
         except Exception as e:
             print(f"Error caching image for {company_name}: {e}")
     
-    def get_image_from_cache(self, cache_key, meta_key):
-        """Get image data and metadata from Redis cache"""
+    def get_image_from_cache(self, cache_key, meta_key, variant=None):
+        """Get image data and metadata from the local LRU, falling back to Redis.
+
+        For a variant, cache_key is the variant key and the returned metadata
+        carries the variant's content type, size and ETag.
+        """
+        entry = self.local_cache.get(cache_key)
+        if entry:
+            return entry
+        
         if not self.redis_client:
             return None
         
         try:
-            # Get image data
-            image_data = self.redis_client.get(cache_key)
+            # Image and metadata in one round trip
+            image_data, meta_json = self.redis_client.mget(cache_key, meta_key)
             if not image_data:
                 return None
             
-            # Get metadata
-            meta_json = self.redis_client.get(meta_key)
             if meta_json:
                 metadata = json.loads(meta_json.decode('utf-8'))
-                return {
+                if variant:
+                    variant_meta = metadata.get('variants', {}).get(str(variant))
+                    if not variant_meta:
+                        return None
+                    metadata = {**metadata, **variant_meta}
+                entry = {
                     'image_data': image_data,
                     'content_type': metadata.get('content_type', 'image/png'),
                     'metadata': metadata
                 }
-            else:
+                expires_at = metadata.get('cached_at', 0) + self.cache_ttl
+                self.local_cache.set(cache_key, entry, expires_at)
+                return entry
+            elif not variant:
                 # Fallback if metadata is missing
                 return {
                     'image_data': image_data,
@@ -216,7 +552,60 @@ class LogoCacheService:
             print(f"Error getting image from cache: {e}")
             return None
 
-    def search_brandfetch_api(self, company_name):
+    @staticmethod
+    def compute_etag(image_data):
+        """Strong validator for a logo: truncated SHA-256 of its bytes"""
+        return hashlib.sha256(image_data).hexdigest()[:32]
+    
+    def get_logo_validators(self, company_name, size=None):
+        """Return the cached logo's metadata for revalidation without reading its bytes.
+
+        Returns None when nothing is cached or the metadata predates ETags,
+        in which case the caller should fall back to a full lookup. With
+        size, the metadata describes the variant get_logo_entry would serve.
+        """
+        cache_key = self.get_cache_key(company_name)
+        entry = self.local_cache.get(cache_key)
+        if entry:
+            metadata = entry['metadata']
+        elif self.redis_client:
+            try:
+                meta_json = self.redis_client.get(self.get_metadata_key(company_name))
+            except Exception as e:
+                print(f"Error getting logo metadata for {company_name}: {e}")
+                return None
+            if not meta_json:
+                return None
+            metadata = json.loads(meta_json)
+        else:
+            return None
+        
+        variant_meta = metadata.get('variants', {}).get(str(self.pick_variant(size)))
+        if variant_meta:
+            metadata = {**metadata, **variant_meta}
+        return metadata if metadata.get('etag') else None
+    
+    def get_cached_metadata_many(self, company_names):
+        """Look up cached logo metadata for many companies with a single MGET.
+
+        Returns {company_name: metadata or None}. Metadata and image are
+        written together with the same TTL, so metadata stands in for the
+        image when only existence and content type are needed.
+        """
+        results = {company_name: None for company_name in company_names}
+        if not self.redis_client or not company_names:
+            return results
+        
+        try:
+            meta_keys = [self.get_metadata_key(company_name) for company_name in company_names]
+            for company_name, meta_json in zip(company_names, self.redis_client.mget(meta_keys)):
+                if meta_json:
+                    results[company_name] = json.loads(meta_json)
+        except Exception as e:
+            print(f"Error getting batch metadata from cache: {e}")
+        return results
+
+    def search_brandfetch_api(self, company_name, failure=None):
         """Search Brandfetch API for company logo and brand data"""
         print(f"🚀 search_brandfetch_api: Starting search for '{company_name}'")
         
@@ -248,7 +637,8 @@ class LogoCacheService:
             api_url = self.brandfetch_search_url + f"/{company_name}"
             print(f"📡 search_brandfetch_api: URL: {api_url}")
             
-            response = requests.get(
+            response = http_get(
+                'brandfetch_search',
                 api_url,
                 headers=headers,
                 timeout=5
@@ -304,6 +694,7 @@ class LogoCacheService:
                             print(f"🔍 search_brandfetch_api: Using first result for '{company_name}': {brand.get('name', 'Unknown')} (no exact match)")
                     
                     if not brand:
+                        self.note_failure(failure, 'no_match')
                         print(f"❌ search_brandfetch_api: No suitable brand found for '{company_name}'")
                         return None
                     
@@ -356,10 +747,13 @@ class LogoCacheService:
                         print(f"✅ search_brandfetch_api: Found Brandfetch logo for '{company_name}' -> '{brand.get('name', company_name)}': {logo_url}")
                         return search_result
                     else:
+                        self.note_failure(failure, 'no_match')
                         print(f"❌ search_brandfetch_api: No logo found in Brandfetch data for '{company_name}'")
                 else:
+                    self.note_failure(failure, 'no_match')
                     print(f"❌ search_brandfetch_api: No Brandfetch search results for '{company_name}'")
             else:
+                self.note_failure(failure, 'http_error')
                 print(f"❌ search_brandfetch_api: Brandfetch API failed with status {response.status_code}")
                 if response.text:
                     print(f"   Response text: {response.text[:200]}...")  # Truncate long responses
@@ -368,6 +762,7 @@ class LogoCacheService:
             return None
             
         except Exception as e:
+            self.note_failure(failure, 'http_error')
             print(f"❌ search_brandfetch_api: Exception occurred for '{company_name}': {e}")
             import traceback
             print(f"   Traceback: {traceback.format_exc()}")
@@ -376,13 +771,10 @@ class LogoCacheService:
     def get_search_from_cache(self, cache_key):
         """Get search result from cache (text-based)"""
         try:
-            # Create a text-based redis client for search results
-            text_redis = redis.Redis(
-                host=Config.REDIS_HOST,
-                port=Config.REDIS_PORT,
-                db=Config.REDIS_DB,
-                decode_responses=True
-            )
+            # Text client for search results
+            text_redis = get_text_redis()
+            if not text_redis:
+                return None
             
             cached_data = text_redis.get(cache_key)
             if cached_data:
@@ -395,13 +787,10 @@ class LogoCacheService:
     def cache_search_result(self, cache_key, search_result):
         """Cache search result with shorter TTL"""
         try:
-            # Create a text-based redis client for search results
-            text_redis = redis.Redis(
-                host=Config.REDIS_HOST,
-                port=Config.REDIS_PORT,
-                db=Config.REDIS_DB,
-                decode_responses=True
-            )
+            # Text client for search results
+            text_redis = get_text_redis()
+            if not text_redis:
+                return
             
             cache_data = {
                 **search_result,
@@ -410,11 +799,13 @@ class LogoCacheService:
             }
             
             # Use shorter TTL for search results (1 day)
+            payload = json.dumps(cache_data)
             text_redis.setex(
                 cache_key, 
                 self.search_cache_ttl,
-                json.dumps(cache_data)
+                payload
             )
+            self.register_cache_keys([(cache_key, len(payload), self.search_cache_ttl)])
             print(f"Cached search result for {cache_key}")
         except Exception as e:
             print(f"Error caching search result: {e}")
@@ -458,7 +849,7 @@ class LogoCacheService:
     def validate_logo_url(self, logo_url):
         """Validate that logo URL returns a valid image"""
         try:
-            response = requests.head(logo_url, timeout=5)
+            response = http_head('logo_validate', logo_url, timeout=5)
             content_type = response.headers.get('content-type', '')
             return (response.status_code == 200 and 
                    content_type.startswith('image/'))
@@ -487,17 +878,28 @@ class LogoCacheService:
         if cached_results:
             print(f"✅ search_companies: Found {len(cached_results)} cached results for '{query}'")
             return cached_results
+        
+        # Answer from brands we already know when enough of them match the prefix
+        local_results = self.search_prefix_index(query, limit)
+        if len(local_results) >= min(limit, Config.LOGO_PREFIX_MIN_RESULTS):
+            with self._inflight_lock:
+                self.prefix_stats['local_answers'] += 1
+            print(f"✅ search_companies: Answered '{query}' from the prefix index ({len(local_results)} results)")
+            return local_results
 
         try:
             # Use Brandfetch API
             if self.should_use_brandfetch():
                 print(f"🎯 search_companies: Trying BRANDFETCH API for '{query}'")
                 try:
+                    with self._inflight_lock:
+                        self.prefix_stats['upstream_searches'] += 1
                     results = self.search_brandfetch_autocomplete(query, limit)
                     if results:
                         print(f"✅ search_companies: BRANDFETCH returned {len(results)} results for '{query}'")
-                        # Cache the results
+                        # Cache the results and learn the brands for later prefixes
                         self.cache_autocomplete(cache_key, results)
+                        self.index_brands(results)
                         return results
                     else:
                         print(f"⚠️ search_companies: BRANDFETCH returned no results for '{query}'")
@@ -506,6 +908,9 @@ class LogoCacheService:
             else:
                 print(f"⚠️ search_companies: BRANDFETCH not available (config: {self.service_config}, has_key: {bool(self.brandfetch_api_key)})")
             
+            if local_results:
+                return local_results
+            
             # If Brandfetch fails, return empty results
             print(f"❌ search_companies: No results found for '{query}'")
             return []
@@ -514,6 +919,92 @@ class LogoCacheService:
             print(f"❌ search_companies: Unexpected error for '{query}': {e}")
             return []
 
+    # Prefix index
+    #
+    # Brand names learned from Brandfetch autocomplete responses, plus
+    # DOMAIN_MAPPINGS, are kept in a sorted set with equal scores so that
+    # ZRANGEBYLEX returns every name starting with a prefix; each name's
+    # autocomplete result lives in a companion hash.
+    
+    PREFIX_INDEX_PREFIX = 'brand_prefix:'
+    PREFIX_INDEX_KEY = 'brand_prefix:index'
+    PREFIX_DATA_KEY = 'brand_prefix:data'
+    
+    @staticmethod
+    def normalize_prefix(text):
+        return ' '.join(text.lower().split())
+    
+    def index_brands(self, results, only_new=False):
+        """Add autocomplete results to the prefix index; returns True once written"""
+        text_redis = get_text_redis()
+        if not text_redis or not results:
+            return False
+        
+        try:
+            pipe = text_redis.pipeline()
+            for result in results:
+                name = self.normalize_prefix(result.get('name') or '')
+                if not name:
+                    continue
+                pipe.zadd(self.PREFIX_INDEX_KEY, {name: 0})
+                if only_new:
+                    pipe.hsetnx(self.PREFIX_DATA_KEY, name, json.dumps(result))
+                else:
+                    pipe.hset(self.PREFIX_DATA_KEY, name, json.dumps(result))
+            pipe.expire(self.PREFIX_INDEX_KEY, Config.LOGO_PREFIX_INDEX_TTL)
+            pipe.expire(self.PREFIX_DATA_KEY, Config.LOGO_PREFIX_INDEX_TTL)
+            pipe.execute()
+            return True
+        except Exception as e:
+            print(f"Error indexing brands for autocomplete: {e}")
+            return False
+    
+    def seed_prefix_index(self):
+        """Add DOMAIN_MAPPINGS to the prefix index without overwriting Brandfetch data; True once written"""
+        seeded = self.index_brands([
+            {
+                'name': name.title(),
+                'domain': domain,
+                'logo_url': f"/api/logos/company/{quote(name.title())}",
+                'description': '',
+                'industry': '',
+                'confidence': 0.7,
+                'source': 'domain_mapping',
+                'icon': None
+            }
+            for name, domain in self.DOMAIN_MAPPINGS.items()
+        ], only_new=True)
+        # Only a successful write counts, so a Redis error is retried on the next search
+        if seeded:
+            self._prefix_index_seeded = True
+        return seeded
+    
+    def search_prefix_index(self, query, limit):
+        """Indexed autocomplete results whose brand name starts with query"""
+        text_redis = get_text_redis()
+        if not text_redis:
+            return []
+        
+        try:
+            # Byte-wise range [prefix, prefix + 0xff] covers every name with that prefix
+            prefix = self.normalize_prefix(query).encode('utf-8')
+            lex_range = (self.PREFIX_INDEX_KEY, b'[' + prefix, b'[' + prefix + b'\xff')
+            pipe = text_redis.pipeline(transaction=False)
+            pipe.exists(self.PREFIX_INDEX_KEY)
+            pipe.zrangebylex(*lex_range, start=0, num=limit)
+            index_exists, names = pipe.execute()
+            # Seed on this process's first search, and again whenever the index
+            # has expired (LOGO_PREFIX_INDEX_TTL) or been cleared
+            if not index_exists or not self._prefix_index_seeded:
+                if self.seed_prefix_index():
+                    names = text_redis.zrangebylex(*lex_range, start=0, num=limit)
+            if not names:
+                return []
+            return [json.loads(payload) for payload in text_redis.hmget(self.PREFIX_DATA_KEY, names) if payload]
+        except Exception as e:
+            print(f"Error searching prefix index for '{query}': {e}")
+            return []
+
     def search_brandfetch_autocomplete(self, query, limit=10):
         """Search Brandfetch API for company autocomplete suggestions"""
         if not self.brandfetch_api_key:
@@ -532,7 +1023,8 @@ class LogoCacheService:
             url = f"{self.brandfetch_search_url}/{query}"
             print(f"🌐 search_brandfetch_autocomplete: Making request to: {url}")
             
-            response = requests.get(
+            response = http_get(
+                'brandfetch_autocomplete',
                 url,
                 headers=headers,
                 timeout=5
@@ -667,15 +1159,172 @@ class LogoCacheService:
             # Use provided TTL or default
             cache_ttl = ttl if ttl is not None else getattr(self, 'autocomplete_cache_ttl', 3600)
             
+            payload = json.dumps(cache_data)
             self.redis_client.setex(
                 cache_key, 
                 cache_ttl, 
-                json.dumps(cache_data)
+                payload
             )
+            self.register_cache_keys([(cache_key, len(payload), cache_ttl)])
             print(f"Cached autocomplete results for {cache_key}")
         except Exception as e:
             print(f"Error caching autocomplete: {e}")
     
+    # KEYS: lock key; ARGV: owner token
+    RELEASE_LOCK_SCRIPT = """
+        if redis.call('GET', KEYS[1]) == ARGV[1] then
+            return redis.call('DEL', KEYS[1])
+        end
+        return 0
+    """
+
+    # Key registry
+    #
+    # Every key the logo cache writes is recorded in a per-category sorted
+    # set (score = expiry time) with its payload size in a companion hash,
+    # and a running byte total per category. Stats read these counters
+    # instead of walking the keyspace with KEYS / MEMORY USAGE. Expired
+    # entries are pruned a few at a time by every registration, and in
+    # larger batches when stats are read.
+
+    KEY_CATEGORIES = {
+        'logo_images': 'logo_img:',
+        'logo_variants': 'logo_variant:',
+        'metadata': 'logo_meta:',
+        'search_results': 'brandfetch_search:',
+        'direct_search_results': 'brandfetch_direct_search:',
+        'autocomplete_brand_results': 'brandfetch_autocomplete:',
+        'autocomplete': 'autocomplete:',
+        'negative_no_match': 'logo_miss:no_match:',
+        'negative_http_error': 'logo_miss:http_error:',
+        'negative_invalid_content_type': 'logo_miss:invalid_content_type:'
+    }
+    REGISTRY_PREFIX = 'logo_registry:'
+    REGISTRY_TOTALS_KEY = 'logo_registry:bytes'
+    REGISTRY_PRUNE_BATCH = 1000
+    REGISTRY_WRITE_PRUNE = 20  # expired entries dropped alongside each registration
+    SCAN_BATCH_SIZE = 500
+
+    # KEYS: index zset, sizes hash, totals hash; ARGV: member, expires_at, size, category, now, prune limit
+    # Each write also drops a few already-expired members, so the registry
+    # stays bounded by the live keys without anything reading the stats.
+    REGISTER_SCRIPT = """
+        local freed = 0
+        local expired = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[5], 'LIMIT', 0, tonumber(ARGV[6]))
+        for _, member in ipairs(expired) do
+            if member ~= ARGV[1] then
+                freed = freed + tonumber(redis.call('HGET', KEYS[2], member) or '0')
+                redis.call('HDEL', KEYS[2], member)
+                redis.call('ZREM', KEYS[1], member)
+            end
+        end
+        local previous = tonumber(redis.call('HGET', KEYS[2], ARGV[1]) or '0')
+        redis.call('ZADD', KEYS[1], ARGV[2], ARGV[1])
+        redis.call('HSET', KEYS[2], ARGV[1], ARGV[3])
+        redis.call('HINCRBY', KEYS[3], ARGV[4], tonumber(ARGV[3]) - previous - freed)
+        return #expired
+    """
+
+    # KEYS: index zset, sizes hash, totals hash; ARGV: category, members...
+    UNREGISTER_SCRIPT = """
+        local freed = 0
+        local removed = 0
+        for i = 2, #ARGV do
+            local size = redis.call('HGET', KEYS[2], ARGV[i])
+            if size then
+                freed = freed + tonumber(size)
+                redis.call('HDEL', KEYS[2], ARGV[i])
+            end
+            removed = removed + redis.call('ZREM', KEYS[1], ARGV[i])
+        end
+        if freed > 0 then
+            redis.call('HINCRBY', KEYS[3], ARGV[1], -freed)
+        end
+        return removed
+    """
+
+    def _registry_keys(self, category):
+        index_key = f"{self.REGISTRY_PREFIX}{category}"
+        return [index_key, f"{index_key}:sizes", self.REGISTRY_TOTALS_KEY]
+
+    def _load_registry_scripts(self, text_redis):
+        # Script objects run via EVALSHA and reload themselves if Redis lost them
+        if self._register_script is None:
+            self._register_script = text_redis.register_script(self.REGISTER_SCRIPT)
+            self._unregister_script = text_redis.register_script(self.UNREGISTER_SCRIPT)
+
+    def _category_for_key(self, key):
+        for category, prefix in self.KEY_CATEGORIES.items():
+            if key.startswith(prefix):
+                return category
+        return None
+
+    def register_cache_keys(self, entries):
+        """Record freshly written keys as (key, size_in_bytes, ttl) tuples"""
+        text_redis = get_text_redis()
+        if not text_redis:
+            return
+        
+        try:
+            self._load_registry_scripts(text_redis)
+            now = time.time()
+            pipe = text_redis.pipeline(transaction=False)
+            for key, size, ttl in entries:
+                category = self._category_for_key(key)
+                if category:
+                    self._register_script(keys=self._registry_keys(category),
+                                          args=[key, now + ttl, size, category, now, self.REGISTRY_WRITE_PRUNE],
+                                          client=pipe)
+            pipe.execute()
+        except Exception as e:
+            print(f"Error registering logo cache keys: {e}")
+
+    def unregister_cache_keys(self, keys):
+        """Drop deleted keys from the registry and their bytes from the totals"""
+        text_redis = get_text_redis()
+        if not text_redis:
+            return
+        
+        try:
+            by_category = {}
+            for key in keys:
+                category = self._category_for_key(key)
+                if category:
+                    by_category.setdefault(category, []).append(key)
+            
+            self._load_registry_scripts(text_redis)
+            pipe = text_redis.pipeline(transaction=False)
+            for category, members in by_category.items():
+                self._unregister_script(keys=self._registry_keys(category),
+                                        args=[category, *members], client=pipe)
+            pipe.execute()
+        except Exception as e:
+            print(f"Error unregistering logo cache keys: {e}")
+
+    def prune_registry(self, category):
+        """Remove up to REGISTRY_PRUNE_BATCH expired entries from a category's registry"""
+        text_redis = get_text_redis()
+        index_key = self._registry_keys(category)[0]
+        expired = text_redis.zrangebyscore(index_key, '-inf', time.time(),
+                                           start=0, num=self.REGISTRY_PRUNE_BATCH)
+        if expired:
+            self._load_registry_scripts(text_redis)
+            self._unregister_script(keys=self._registry_keys(category), args=[category, *expired])
+        return len(expired)
+
+    def unlink_by_prefix(self, prefix):
+        """Delete every key with a prefix using incremental SCAN + UNLINK batches"""
+        deleted = 0
+        batch = []
+        for key in self.redis_client.scan_iter(match=f"{prefix}*", count=self.SCAN_BATCH_SIZE):
+            batch.append(key)
+            if len(batch) >= self.SCAN_BATCH_SIZE:
+                deleted += self.redis_client.unlink(*batch)
+                batch = []
+        if batch:
+            deleted += self.redis_client.unlink(*batch)
+        return deleted
+
     def clear_cache(self, company_name=None):
         """Clear logo cache for specific company or all logos"""
         if not self.redis_client:
@@ -694,28 +1343,17 @@ class LogoCacheService:
                 autocomplete_search_key = f"brandfetch_search:{clean_name.replace(' ', '_')}_{name_hash}"
                 autocomplete_brand_key = f"brandfetch_autocomplete:{clean_name.replace(' ', '_')}_{name_hash}"
                 
-                cleared_keys = []
-                if self.redis_client.delete(cache_key):
-                    cleared_keys.append(cache_key)
-                if self.redis_client.delete(meta_key):
-                    cleared_keys.append(meta_key)
-                
-                # Also clear with text redis client for search cache
-                try:
-                    text_redis = redis.Redis(
-                        host=Config.REDIS_HOST,
-                        port=Config.REDIS_PORT,
-                        db=Config.REDIS_DB,
-                        decode_responses=True
-                    )
-                    if text_redis.delete(direct_search_key):
-                        cleared_keys.append(direct_search_key)
-                    if text_redis.delete(autocomplete_search_key):
-                        cleared_keys.append(autocomplete_search_key)
-                    if text_redis.delete(autocomplete_brand_key):
-                        cleared_keys.append(autocomplete_brand_key)
-                except Exception as e:
-                    print(f"Error clearing search cache: {e}")
+                candidate_keys = [cache_key, meta_key, direct_search_key, autocomplete_search_key, autocomplete_brand_key]
+                variant_keys = [self.get_variant_key(cache_key, size) for size in Config.LOGO_VARIANT_SIZES]
+                candidate_keys += variant_keys
+                candidate_keys += [self.get_negative_key(company_name, reason) for reason in self.NEGATIVE_REASONS]
+                pipe = self.redis_client.pipeline(transaction=False)
+                for key in candidate_keys:
+                    pipe.unlink(key)
+                cleared_keys = [key for key, removed in zip(candidate_keys, pipe.execute()) if removed]
+                for key in [cache_key, *variant_keys]:
+                    self.local_cache.pop(key)
+                self.unregister_cache_keys(candidate_keys)
                 
                 result = {
                     "company_name": company_name,
@@ -726,33 +1364,23 @@ class LogoCacheService:
                 print(f"Cleared cache for {company_name}: {cleared_keys}")
                 return result
             else:
-                # Clear all logo cache entries
-                logo_keys = self.redis_client.keys("logo_img:*")
-                meta_keys = self.redis_client.keys("logo_meta:*")
-                search_keys = self.redis_client.keys("brandfetch_search:*")
-                direct_search_keys = self.redis_client.keys("brandfetch_direct_search:*")
-                autocomplete_brand_keys = self.redis_client.keys("brandfetch_autocomplete:*")
-                autocomplete_keys = self.redis_client.keys("autocomplete:*")
+                # Clear all logo cache entries, one SCAN batch at a time so Redis never stalls
+                counts = {}
+                for category, prefix in self.KEY_CATEGORIES.items():
+                    counts[category] = self.unlink_by_prefix(prefix)
                 
-                # Count before clearing
-                counts = {
-                    "logo_images": len(logo_keys),
-                    "metadata": len(meta_keys),
-                    "search_results": len(search_keys),
-                    "direct_search_results": len(direct_search_keys),
-                    "autocomplete_brand_results": len(autocomplete_brand_keys),
-                    "autocomplete": len(autocomplete_keys)
-                }
+                counts['prefix_index'] = self.unlink_by_prefix(self.PREFIX_INDEX_PREFIX)
+                self._prefix_index_seeded = False
                 
-                all_keys = logo_keys + meta_keys + search_keys + direct_search_keys + autocomplete_brand_keys + autocomplete_keys
-                cleared_count = 0
-                if all_keys:
-                    cleared_count = self.redis_client.delete(*all_keys)
+                # Reset the registry along with the keys it described
+                self.unlink_by_prefix(self.REGISTRY_PREFIX)
+                self.local_cache.clear()
                 
+                cleared_count = sum(counts.values())
                 result = {
                     "cleared_count": cleared_count,
                     "breakdown": counts,
-                    "total_keys": len(all_keys),
+                    "total_keys": cleared_count,
                     "success": True
                 }
                 
@@ -763,103 +1391,103 @@ class LogoCacheService:
             print(f"Error clearing cache: {e}")
             return error_result
     
+    # Well-known companies whose domain can't be guessed from the name alone
+    DOMAIN_MAPPINGS = {
+        'google': 'google.com',
+        'alphabet': 'google.com',
+        'apple': 'apple.com',
+        'microsoft': 'microsoft.com',
+        'meta': 'meta.com',
+        'facebook': 'meta.com',
+        'amazon': 'amazon.com',
+        'tesla': 'tesla.com',
+        'netflix': 'netflix.com',
+        'uber': 'uber.com',
+        'airbnb': 'airbnb.com',
+        'twitter': 'twitter.com',
+        'x': 'x.com',
+        'linkedin': 'linkedin.com',
+        'spotify': 'spotify.com',
+        'discord': 'discord.com',
+        'slack': 'slack.com',
+        'figma': 'figma.com',
+        'canva': 'canva.com',
+        'adobe': 'adobe.com',
+        'salesforce': 'salesforce.com',
+        'oracle': 'oracle.com',
+        'ibm': 'ibm.com',
+        'intel': 'intel.com',
+        'nvidia': 'nvidia.com',
+        'amd': 'amd.com',
+        'paypal': 'paypal.com',
+        'stripe': 'stripe.com',
+        'coinbase': 'coinbase.com',
+        'shopify': 'shopify.com',
+        'squareup': 'squareup.com',
+        'square': 'squareup.com',
+        'zoom': 'zoom.us',
+        'github': 'github.com',
+        'gitlab': 'gitlab.com',
+        'redis': 'redis.io',
+        'mongodb': 'mongodb.com',
+        'elastic': 'elastic.co',
+        'databricks': 'databricks.com',
+        'snowflake': 'snowflake.com',
+        'palantir': 'palantir.com',
+        'mckinsey': 'mckinsey.com',
+        'bcg': 'bcg.com',
+        'bain': 'bain.com',
+        'deloitte': 'deloitte.com',
+        'accenture': 'accenture.com',
+        'pwc': 'pwc.com',
+        'ey': 'ey.com',
+        'kpmg': 'kpmg.com',
+        'ford': 'ford.com',
+        'gm': 'gm.com',
+        'general motors': 'gm.com',
+        'bmw': 'bmw.com',
+        'toyota': 'toyota.com',
+        'honda': 'honda.com',
+        'volkswagen': 'vw.com',
+        'booking': 'booking.com',
+        'expedia': 'expedia.com',
+        'airbnb': 'airbnb.com',
+        'lyft': 'lyft.com',
+        'doordash': 'doordash.com',
+        'grubhub': 'grubhub.com',
+        'youtube': 'youtube.com',
+        'tiktok': 'tiktok.com',
+        'instagram': 'instagram.com',
+        'snapchat': 'snapchat.com',
+        'pinterest': 'pinterest.com',
+        'reddit': 'reddit.com',
+        'twitch': 'twitch.tv',
+        'epicgames': 'epicgames.com',
+        'epic games': 'epicgames.com',
+        'activision': 'activision.com',
+        'activisionblizzard': 'activisionblizzard.com',
+        'ea': 'ea.com',
+        'electronic arts': 'ea.com',
+        'riotgames': 'riotgames.com',
+        'riot games': 'riotgames.com',
+        'valve': 'valvesoftware.com',
+        'steam': 'steampowered.com',
+        'airtable': 'airtable.com',
+        'notion': 'notion.so',
+        'asana': 'asana.com',
+        'trello': 'trello.com',
+        'monday': 'monday.com',
+        'clickup': 'clickup.com'
+    }
+
     def guess_company_domain(self, company_name):
         """Guess the most likely domain for a company name"""
         # Clean the company name
         clean_name = company_name.lower().strip()
         
-        # Handle common company mappings
-        domain_mappings = {
-            'google': 'google.com',
-            'alphabet': 'google.com',
-            'apple': 'apple.com',
-            'microsoft': 'microsoft.com',
-            'meta': 'meta.com',
-            'facebook': 'meta.com',
-            'amazon': 'amazon.com',
-            'tesla': 'tesla.com',
-            'netflix': 'netflix.com',
-            'uber': 'uber.com',
-            'airbnb': 'airbnb.com',
-            'twitter': 'twitter.com',
-            'x': 'x.com',
-            'linkedin': 'linkedin.com',
-            'spotify': 'spotify.com',
-            'discord': 'discord.com',
-            'slack': 'slack.com',
-            'figma': 'figma.com',
-            'canva': 'canva.com',
-            'adobe': 'adobe.com',
-            'salesforce': 'salesforce.com',
-            'oracle': 'oracle.com',
-            'ibm': 'ibm.com',
-            'intel': 'intel.com',
-            'nvidia': 'nvidia.com',
-            'amd': 'amd.com',
-            'paypal': 'paypal.com',
-            'stripe': 'stripe.com',
-            'coinbase': 'coinbase.com',
-            'shopify': 'shopify.com',
-            'squareup': 'squareup.com',
-            'square': 'squareup.com',
-            'zoom': 'zoom.us',
-            'github': 'github.com',
-            'gitlab': 'gitlab.com',
-            'redis': 'redis.io',
-            'mongodb': 'mongodb.com',
-            'elastic': 'elastic.co',
-            'databricks': 'databricks.com',
-            'snowflake': 'snowflake.com',
-            'palantir': 'palantir.com',
-            'mckinsey': 'mckinsey.com',
-            'bcg': 'bcg.com',
-            'bain': 'bain.com',
-            'deloitte': 'deloitte.com',
-            'accenture': 'accenture.com',
-            'pwc': 'pwc.com',
-            'ey': 'ey.com',
-            'kpmg': 'kpmg.com',
-            'ford': 'ford.com',
-            'gm': 'gm.com',
-            'general motors': 'gm.com',
-            'bmw': 'bmw.com',
-            'toyota': 'toyota.com',
-            'honda': 'honda.com',
-            'volkswagen': 'vw.com',
-            'booking': 'booking.com',
-            'expedia': 'expedia.com',
-            'airbnb': 'airbnb.com',
-            'lyft': 'lyft.com',
-            'doordash': 'doordash.com',
-            'grubhub': 'grubhub.com',
-            'youtube': 'youtube.com',
-            'tiktok': 'tiktok.com',
-            'instagram': 'instagram.com',
-            'snapchat': 'snapchat.com',
-            'pinterest': 'pinterest.com',
-            'reddit': 'reddit.com',
-            'twitch': 'twitch.tv',
-            'epicgames': 'epicgames.com',
-            'epic games': 'epicgames.com',
-            'activision': 'activision.com',
-            'activisionblizzard': 'activisionblizzard.com',
-            'ea': 'ea.com',
-            'electronic arts': 'ea.com',
-            'riotgames': 'riotgames.com',
-            'riot games': 'riotgames.com',
-            'valve': 'valvesoftware.com',
-            'steam': 'steampowered.com',
-            'airtable': 'airtable.com',
-            'notion': 'notion.so',
-            'asana': 'asana.com',
-            'trello': 'trello.com',
-            'monday': 'monday.com',
-            'clickup': 'clickup.com'
-        }
-        
         # Check direct mapping first
-        if clean_name in domain_mappings:
-            return domain_mappings[clean_name]
+        if clean_name in self.DOMAIN_MAPPINGS:
+            return self.DOMAIN_MAPPINGS[clean_name]
         
         # Try common patterns
         # Remove common words
@@ -872,8 +1500,8 @@ class LogoCacheService:
         clean_name = clean_name.replace(' ', '').replace('.', '').replace('-', '')
         
         # Check mapping again after cleaning
-        if clean_name in domain_mappings:
-            return domain_mappings[clean_name]
+        if clean_name in self.DOMAIN_MAPPINGS:
+            return self.DOMAIN_MAPPINGS[clean_name]
         
         # Try common domain extensions
         if clean_name:
@@ -882,31 +1510,36 @@ class LogoCacheService:
         return None
 
     def get_cache_stats(self):
-        """Get cache statistics"""
+        """Get cache statistics from the key registry counters"""
         if not self.redis_client:
             return {"error": "Redis not connected"}
         
         try:
-            logo_img_keys = self.redis_client.keys("logo_img:*")
-            logo_meta_keys = self.redis_client.keys("logo_meta:*")
-            search_keys = self.redis_client.keys("brandfetch_search:*")
-            direct_search_keys = self.redis_client.keys("brandfetch_direct_search:*")
-            autocomplete_brand_keys = self.redis_client.keys("brandfetch_autocomplete:*")
-            autocomplete_keys = self.redis_client.keys("autocomplete:*")
+            text_redis = get_text_redis()
             
-            # Calculate cache size by getting total memory usage for logo images
-            cache_size = 0
-            try:
-                for key in logo_img_keys[:100]:  # Sample first 100 to avoid timeout
-                    size = self.redis_client.memory_usage(key)
-                    if size:
-                        cache_size += size
-                # Estimate total size based on sample
-                if len(logo_img_keys) > 100:
-                    cache_size = int(cache_size * (len(logo_img_keys) / 100))
-            except Exception as e:
-                print(f"Error calculating cache size: {e}")
-                cache_size = 0
+            # Drop entries whose keys have expired since the last look
+            for category in self.KEY_CATEGORIES:
+                try:
+                    self.prune_registry(category)
+                except Exception as e:
+                    print(f"Error pruning logo registry for {category}: {e}")
+            
+            pipe = text_redis.pipeline(transaction=False)
+            for category in self.KEY_CATEGORIES:
+                pipe.zcard(self._registry_keys(category)[0])
+            pipe.hgetall(self.REGISTRY_TOTALS_KEY)
+            pipe.zrange(self._registry_keys('logo_images')[0], 0, 4)
+            pipe.zcard(self.PREFIX_INDEX_KEY)
+            results = pipe.execute()
+            
+            counts = dict(zip(self.KEY_CATEGORIES, results[:len(self.KEY_CATEGORIES)]))
+            totals = results[len(self.KEY_CATEGORIES)]
+            sample_logo_keys = results[len(self.KEY_CATEGORIES) + 1]
+            indexed_brands = results[-1]
+            categories = {
+                category: {"count": counts[category], "bytes": max(int(totals.get(category, 0)), 0)}
+                for category in self.KEY_CATEGORIES
+            }
             
             # Get Redis memory info
             try:
@@ -917,8 +1550,9 @@ class LogoCacheService:
                 used_memory = 0
             
             # Calculate hit/miss rates (simplified - based on cache vs search entries)
-            total_searches = len(search_keys) + len(direct_search_keys) + len(autocomplete_brand_keys) + len(autocomplete_keys)
-            cached_results = len(logo_img_keys)
+            total_searches = (counts['search_results'] + counts['direct_search_results'] +
+                              counts['autocomplete_brand_results'] + counts['autocomplete'])
+            cached_results = counts['logo_images']
             
             hit_rate = 0.0
             miss_rate = 0.0
@@ -926,31 +1560,67 @@ class LogoCacheService:
                 hit_rate = min(1.0, cached_results / total_searches)
                 miss_rate = 1.0 - hit_rate
             
+            with self._inflight_lock:
+                single_flight_stats = dict(self.single_flight_stats)
+                prefix_stats = dict(self.prefix_stats)
+                negative_stats = dict(self.negative_stats)
+            
             return {
-                "cached_count": len(logo_img_keys),
-                "cache_size": cache_size,
+                "cached_count": counts['logo_images'],
+                "cache_size": categories['logo_images']['bytes'],
                 "hit_rate": hit_rate,
                 "miss_rate": miss_rate,
-                "total_cached_logos": len(logo_img_keys),
-                "metadata_entries": len(logo_meta_keys),
-                "search_cache_entries": len(search_keys),
-                "direct_search_cache_entries": len(direct_search_keys),
-                "autocomplete_brand_cache_entries": len(autocomplete_brand_keys),
-                "autocomplete_cache_entries": len(autocomplete_keys),
+                "total_cached_logos": counts['logo_images'],
+                "metadata_entries": counts['metadata'],
+                "search_cache_entries": counts['search_results'],
+                "direct_search_cache_entries": counts['direct_search_results'],
+                "autocomplete_brand_cache_entries": counts['autocomplete_brand_results'],
+                "autocomplete_cache_entries": counts['autocomplete'],
+                "categories": categories,
                 "redis_used_memory": used_memory,
-                "sample_logo_keys": [k.decode('utf-8') if isinstance(k, bytes) else k for k in logo_img_keys[:5]]
+                "sample_logo_keys": sample_logo_keys,
+                "single_flight": single_flight_stats,
+                "local_cache": self.local_cache.stats(),
+                "image_memory": self.image_memory_report(categories),
+                "upstream_http": get_http_stats(),
+                "prefix_index": {"brands": indexed_brands, **prefix_stats},
+                "negative_cache": {
+                    "enabled": self.is_negative_cache_enabled(),
+                    "entries": {reason: counts[f"negative_{reason}"] for reason in self.NEGATIVE_REASONS},
+                    **negative_stats
+                }
             }
         except Exception as e:
             print(f"Error in get_cache_stats: {e}")
             return {"error": str(e)}
 
+    def image_memory_report(self, categories):
+        """Redis bytes held by logos and their variants against LOGO_IMAGE_MEMORY_BUDGET"""
+        used = categories['logo_images']['bytes'] + categories['logo_variants']['bytes']
+        budget = Config.LOGO_IMAGE_MEMORY_BUDGET
+        with self._inflight_lock:
+            ingested = self.normalize_stats['ingested_bytes']
+            stored = self.normalize_stats['stored_bytes']
+        return {
+            "logo_bytes": categories['logo_images']['bytes'],
+            "variant_bytes": categories['logo_variants']['bytes'],
+            "used_bytes": used,
+            "budget_bytes": budget,
+            "budget_used": round(used / budget, 4) if budget else None,
+            "over_budget": bool(budget) and used > budget,
+            "ingested_bytes": ingested,
+            "stored_bytes": stored,
+            "compression_ratio": round(stored / ingested, 4) if ingested else None
+        }
+
     def get_service_config(self):
         """Get current logo service configuration"""
         try:
             # Check Brandfetch API status
             brandfetch_status = "unknown"
             try:
-                test_response = requests.get(
+                test_response = http_get(
+                    'brandfetch_status',
                     f"{self.brandfetch_search_url}/test",
                     headers={'Authorization': f'Bearer {self.brandfetch_api_key}'},
                     timeout=3
@@ -975,7 +1645,8 @@ class LogoCacheService:
                     }
                 },
                 "cache_ttl": self.cache_ttl,
-                "search_cache_ttl": self.search_cache_ttl
+                "search_cache_ttl": self.search_cache_ttl,
+                "negative_cache_enabled": self.is_negative_cache_enabled()
             }
         except Exception as e:
             print(f"Error getting service config: {e}")
@@ -993,12 +1664,7 @@ class LogoCacheService:
             # Store in Redis for persistence
             if self.redis_client:
                 try:
-                    text_redis = redis.Redis(
-                        host=Config.REDIS_HOST,
-                        port=Config.REDIS_PORT,
-                        db=Config.REDIS_DB,
-                        decode_responses=True
-                    )
+                    text_redis = get_text_redis()
                     text_redis.set("logo_service_config", service_type)
                 except Exception as e:
                     print(f"Failed to store service config in Redis: {e}")
@@ -1016,12 +1682,7 @@ class LogoCacheService:
         """Load service configuration from Redis"""
         try:
             if self.redis_client:
-                text_redis = redis.Redis(
-                    host=Config.REDIS_HOST,
-                    port=Config.REDIS_PORT,
-                    db=Config.REDIS_DB,
-                    decode_responses=True
-                )
+                text_redis = get_text_redis()
                 stored_config = text_redis.get("logo_service_config")
                 if stored_config:
                     self.service_config = stored_config
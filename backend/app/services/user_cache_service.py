@@ -0,0 +1,161 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from app.config import Config
+from app.utils.redis_client import get_text_redis
+
+
+class UserCacheService:
+    """Short-TTL cache of authenticated user principals.
+
+    Holds only the fields token checks need (id, username, email,
+    email_verified, role) in a bounded in-process LRU, backed by Redis so
+    that other workers share warm entries. Anything that changes those
+    fields, or the user's credentials, must call invalidate().
+
+    invalidate() and clear() also bump a generation counter in Redis.
+    Every worker compares it at most once per USER_CACHE_SYNC_INTERVAL
+    and drops its local entries when it has moved, so a revoked role or
+    password change reaches the other workers within that interval
+    rather than after the local TTL.
+    """
+
+    PRINCIPAL_FIELDS = ('id', 'username', 'email', 'email_verified', 'role')
+    KEY_PREFIX = 'user_principal:'
+    GENERATION_KEY = 'user_cache:generation'
+
+    def __init__(self):
+        self.local_ttl = Config.USER_CACHE_LOCAL_TTL
+        self.redis_ttl = Config.USER_CACHE_TTL
+        self.max_entries = Config.USER_CACHE_MAX_ENTRIES
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = None
+        self._generation_checked = 0.0
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+
+    def _key(self, user_id):
+        return f"{self.KEY_PREFIX}{user_id}"
+
+    def _sync_generation(self):
+        """Drop local entries if another worker has invalidated since the last check"""
+        now = time.monotonic()
+        if now - self._generation_checked < Config.USER_CACHE_SYNC_INTERVAL:
+            return
+        self._generation_checked = now
+
+        redis_client = get_text_redis()
+        if not redis_client:
+            return
+        try:
+            generation = redis_client.get(self.GENERATION_KEY)
+        except Exception as e:
+            Config.log_warning(f"User cache generation check failed: {e}", 'user_cache')
+            return
+        with self._lock:
+            if generation != self._generation:
+                self._entries.clear()
+                self._generation = generation
+
+    def _store_local(self, user_id, principal):
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self.local_ttl, principal)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, user_id):
+        """Return a cached principal or None"""
+        user_id = int(user_id)
+        self._sync_generation()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry and entry[0] > time.monotonic():
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return dict(entry[1])
+            if entry:
+                del self._entries[user_id]
+
+        redis_client = get_text_redis()
+        if redis_client:
+            try:
+                cached = redis_client.get(self._key(user_id))
+                if cached:
+                    principal = json.loads(cached)
+                    self._store_local(user_id, principal)
+                    self.redis_hits += 1
+                    return dict(principal)
+            except Exception as e:
+                Config.log_warning(f"User cache Redis read failed: {e}", 'user_cache')
+
+        self.misses += 1
+        return None
+
+    def set(self, user):
+        """Cache the principal fields of a user row"""
+        principal = {field: user.get(field) for field in self.PRINCIPAL_FIELDS}
+        principal['email_verified'] = bool(principal['email_verified'])
+        user_id = int(principal['id'])
+        self._store_local(user_id, principal)
+
+        redis_client = get_text_redis()
+        if redis_client:
+            try:
+                redis_client.setex(self._key(user_id), self.redis_ttl, json.dumps(principal))
+            except Exception as e:
+                Config.log_warning(f"User cache Redis write failed: {e}", 'user_cache')
+        return dict(principal)
+
+    def invalidate(self, user_id):
+        """Drop a user's principal from both tiers"""
+        user_id = int(user_id)
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+        redis_client = get_text_redis()
+        if redis_client:
+            try:
+                pipe = redis_client.pipeline(transaction=False)
+                pipe.delete(self._key(user_id))
+                pipe.incr(self.GENERATION_KEY)
+                pipe.execute()
+            except Exception as e:
+                Config.log_warning(f"User cache Redis invalidation failed for {user_id}: {e}", 'user_cache')
+
+    def clear(self):
+        """Drop every cached principal (bulk credential or role changes)"""
+        with self._lock:
+            self._entries.clear()
+
+        redis_client = get_text_redis()
+        if redis_client:
+            try:
+                batch = []
+                for key in redis_client.scan_iter(match=f"{self.KEY_PREFIX}*", count=500):
+                    batch.append(key)
+                    if len(batch) >= 500:
+                        redis_client.unlink(*batch)
+                        batch = []
+                if batch:
+                    redis_client.unlink(*batch)
+                redis_client.incr(self.GENERATION_KEY)
+            except Exception as e:
+                Config.log_warning(f"User cache Redis clear failed: {e}", 'user_cache')
+
+    def stats(self):
+        """Hit/miss counters for monitoring"""
+        with self._lock:
+            local_entries = len(self._entries)
+        return {
+            "local_entries": local_entries,
+            "hits": self.hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses
+        }
+
+# Global instance
+user_cache = UserCacheService()
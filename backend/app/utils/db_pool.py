@@ -0,0 +1,142 @@
+"""
+Bounded MariaDB connection pool
+"""
+import queue
+import threading
+import time
+import mariadb
+from app.config import Config
+
+
+class DatabasePool:
+    """Thread-safe pool of MariaDB connections with overflow and checkout timeout.
+
+    Up to ``pool_size`` connections are kept open and reused. When all of them
+    are checked out, up to ``max_overflow`` extra connections may be opened;
+    those are closed again on release instead of being returned to the pool.
+    Once both are exhausted, ``acquire()`` waits up to ``wait_timeout`` seconds
+    before raising ``mariadb.PoolError``.
+    """
+
+    def __init__(self, connection_params, pool_size=10, max_overflow=5,
+                 wait_timeout=10.0, health_check_interval=30):
+        self.connection_params = connection_params
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.wait_timeout = wait_timeout
+        self.health_check_interval = health_check_interval
+
+        # LIFO keeps the most recently used (warm) connections in rotation
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(pool_size + max_overflow)
+        self._lock = threading.Lock()
+        self._open = 0
+        self._in_use = 0
+        self._created = 0
+        self._timeouts = 0
+        self._wait_time_total = 0.0
+        self._probes = 0
+        self._probe_failures = 0
+        self._reconnects = 0
+
+    def _connect(self):
+        connection = mariadb.connect(**self.connection_params)
+        with self._lock:
+            self._open += 1
+            self._created += 1
+        return connection
+
+    def _close(self, connection):
+        try:
+            connection.close()
+        except mariadb.Error:
+            pass
+        with self._lock:
+            self._open -= 1
+
+    def acquire(self):
+        """Check out a connection, waiting up to wait_timeout for a free slot"""
+        started = time.monotonic()
+        if not self._slots.acquire(timeout=self.wait_timeout):
+            with self._lock:
+                self._timeouts += 1
+            raise mariadb.PoolError(
+                f"Timed out after {self.wait_timeout}s waiting for a database connection"
+            )
+
+        try:
+            connection = None
+            while connection is None:
+                try:
+                    candidate, last_used = self._idle.get_nowait()
+                except queue.Empty:
+                    connection = self._connect()
+                    break
+
+                # Only validate connections that sat idle long enough to have been dropped
+                if time.monotonic() - last_used >= self.health_check_interval:
+                    with self._lock:
+                        self._probes += 1
+                    try:
+                        candidate.ping()
+                    except mariadb.Error:
+                        with self._lock:
+                            self._probe_failures += 1
+                            self._reconnects += 1
+                        self._close(candidate)
+                        continue
+                connection = candidate
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._in_use += 1
+            self._wait_time_total += time.monotonic() - started
+        return connection
+
+    def release(self, connection, discard=False):
+        """Return a connection to the pool, closing it if broken or over capacity.
+
+        ``discard=True`` marks the connection as broken: it is closed and the
+        next checkout opens a replacement, which is counted as a reconnect.
+        """
+        if discard:
+            with self._lock:
+                self._reconnects += 1
+        try:
+            if discard or self._idle.qsize() >= self.pool_size:
+                self._close(connection)
+            else:
+                self._idle.put((connection, time.monotonic()))
+        finally:
+            with self._lock:
+                self._in_use -= 1
+            self._slots.release()
+
+    def stats(self):
+        """Return a snapshot of pool usage counters"""
+        with self._lock:
+            return {
+                "pool_size": self.pool_size,
+                "max_overflow": self.max_overflow,
+                "open": self._open,
+                "in_use": self._in_use,
+                "idle": self._idle.qsize(),
+                "created": self._created,
+                "timeouts": self._timeouts,
+                "wait_time_total": round(self._wait_time_total, 3),
+                "probes": self._probes,
+                "probe_failures": self._probe_failures,
+                "reconnects": self._reconnects
+            }
+
+    def close_all(self):
+        """Close every idle connection (used on shutdown)"""
+        while True:
+            try:
+                connection, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._close(connection)
+        Config.log_info("Database pool closed", 'db')
@@ -0,0 +1,65 @@
+"""
+Bounded executors for blocking work called from async handlers
+"""
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from app.config import Config
+
+# Blocking I/O: MariaDB queries, Redis, outbound HTTP and SMTP
+io_executor = ThreadPoolExecutor(
+    max_workers=Config.IO_EXECUTOR_WORKERS,
+    thread_name_prefix='io-worker'
+)
+
+# CPU-bound work (image resizing) gets its own pool so it cannot starve I/O;
+# bcrypt runs on the process pool in password_hasher
+cpu_executor = ThreadPoolExecutor(
+    max_workers=Config.CPU_EXECUTOR_WORKERS,
+    thread_name_prefix='cpu-worker'
+)
+
+
+def _bind_context(func, args, kwargs):
+    # Carry the Quart app/request context into the worker thread so that
+    # get_db() resolves to the same request-scoped connection
+    context = contextvars.copy_context()
+    return functools.partial(context.run, func, *args, **kwargs)
+
+
+async def run_io(func, *args, **kwargs):
+    """Run a blocking I/O call on the I/O pool without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(io_executor, _bind_context(func, args, kwargs))
+
+
+async def run_cpu(func, *args, **kwargs):
+    """Run a CPU-bound call on the CPU pool without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(cpu_executor, _bind_context(func, args, kwargs))
+
+
+def run_cpu_sync(func, *args, **kwargs):
+    """Run a CPU-bound call on the CPU pool from code already on an I/O worker"""
+    return cpu_executor.submit(func, *args, **kwargs).result()
+
+
+def configure_event_loop(loop):
+    """Route default-executor work to the I/O pool and enable the debug block detector"""
+    # Quart runs sync view functions via run_in_executor(None, ...), so they land here too
+    loop.set_default_executor(io_executor)
+
+    if Config.DEBUG and Config.LOOP_BLOCK_WARN_MS > 0:
+        # asyncio's debug mode logs every callback/coroutine step that holds
+        # the loop longer than slow_callback_duration
+        Config.get_logger('asyncio')
+        loop.set_debug(True)
+        loop.slow_callback_duration = Config.LOOP_BLOCK_WARN_MS / 1000
+        Config.log_info(f"Event loop block detector enabled (>{Config.LOOP_BLOCK_WARN_MS}ms)", 'executors')
+
+
+def shutdown_executors():
+    """Stop accepting new work and let running tasks finish"""
+    io_executor.shutdown(wait=False)
+    cpu_executor.shutdown(wait=False)
@@ -47,5 +47,5 @@ def send_verification_email(user_email, token):
 
 
 def hash_password(password):
-    import bcrypt
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
\ No newline at end of file
+    from app.utils.password_hasher import password_hasher
+    return password_hasher.hash(password)
\ No newline at end of file
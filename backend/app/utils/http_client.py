@@ -0,0 +1,127 @@
+"""
+Shared outbound HTTP session with keep-alive, retries and latency histograms
+"""
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from app.config import Config
+
+# Histogram bucket upper bounds in milliseconds; slower calls land in "+Inf"
+LATENCY_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+_session = None
+_session_lock = threading.Lock()
+_histograms = {}
+_histograms_lock = threading.Lock()
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram for one upstream endpoint"""
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, elapsed_ms, error=False):
+        index = len(LATENCY_BUCKETS_MS)
+        for i, bound in enumerate(LATENCY_BUCKETS_MS):
+            if elapsed_ms <= bound:
+                index = i
+                break
+        self.buckets[index] += 1
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        if error:
+            self.errors += 1
+
+    def snapshot(self):
+        labels = [f"le_{bound}ms" for bound in LATENCY_BUCKETS_MS] + ["+Inf"]
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "avg_ms": round(self.total_ms / self.count, 1) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 1),
+            "buckets": dict(zip(labels, self.buckets))
+        }
+
+
+def get_http_session():
+    """Return the process-wide requests session (pooled keep-alive connections, retries on GET/HEAD)"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                retry = Retry(
+                    total=Config.HTTP_MAX_RETRIES,
+                    backoff_factor=Config.HTTP_RETRY_BACKOFF,
+                    status_forcelist=(502, 503, 504),
+                    allowed_methods=frozenset({'GET', 'HEAD'}),
+                    raise_on_status=False
+                )
+                adapter = HTTPAdapter(
+                    pool_connections=Config.HTTP_POOL_HOSTS,
+                    pool_maxsize=Config.HTTP_POOL_MAXSIZE,
+                    max_retries=retry
+                )
+                session = requests.Session()
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _session = session
+    return _session
+
+
+def http_request(endpoint, method, url, **kwargs):
+    """Send a request on the shared session, recording its latency under endpoint"""
+    started = time.perf_counter()
+    error = True
+    try:
+        response = get_http_session().request(method, url, **kwargs)
+        error = response.status_code >= 500
+        return response
+    finally:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with _histograms_lock:
+            histogram = _histograms.get(endpoint)
+            if histogram is None:
+                histogram = _histograms[endpoint] = LatencyHistogram()
+            histogram.observe(elapsed_ms, error)
+
+
+def http_get(endpoint, url, **kwargs):
+    return http_request(endpoint, 'GET', url, **kwargs)
+
+
+def http_head(endpoint, url, **kwargs):
+    return http_request(endpoint, 'HEAD', url, **kwargs)
+
+
+def get_http_stats():
+    """Latency histograms per endpoint and connection reuse per upstream host.
+
+    connections_opened counts TCP (+TLS) handshakes; with keep-alive working
+    it stays far below requests.
+    """
+    with _histograms_lock:
+        endpoints = {name: histogram.snapshot() for name, histogram in _histograms.items()}
+
+    hosts = {}
+    if _session is not None:
+        adapters = {id(adapter): adapter for adapter in _session.adapters.values()}
+        for adapter in adapters.values():
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                hosts[f"{key.key_scheme}://{key.key_host}:{key.key_port}"] = {
+                    "connections_opened": pool.num_connections,
+                    "requests": pool.num_requests,
+                    "idle": pool.pool.qsize() if pool.pool else 0
+                }
+    return {"endpoints": endpoints, "hosts": hosts}
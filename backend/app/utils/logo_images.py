@@ -0,0 +1,104 @@
+"""
+Logo normalization: sanitized SVGs and small raster variants for icon-sized display
+"""
+import io
+import re
+import xml.etree.ElementTree as ET
+
+try:
+    from PIL import Image, features
+except ImportError:  # Without Pillow logos are stored as downloaded
+    Image = None
+    features = None
+
+SVG_NS = 'http://www.w3.org/2000/svg'
+XLINK_NS = 'http://www.w3.org/1999/xlink'
+ET.register_namespace('', SVG_NS)
+ET.register_namespace('xlink', XLINK_NS)
+
+# Elements that can run script or embed foreign content
+UNSAFE_SVG_ELEMENTS = {'script', 'foreignObject', 'iframe', 'embed', 'object', 'handler'}
+SAFE_HREF = re.compile(r'^(#|data:image/(png|jpeg|gif|webp);)', re.IGNORECASE)
+
+
+def _local_name(name):
+    return name.rsplit('}', 1)[-1]
+
+
+def sanitize_svg(svg_data):
+    """Strip scripts, event handlers and external references from an SVG; None if unparsable"""
+    if b'<!ENTITY' in svg_data:
+        # No legitimate logo needs entity declarations
+        return None
+    try:
+        root = ET.fromstring(svg_data)
+    except ET.ParseError:
+        return None
+    if _local_name(root.tag) != 'svg':
+        return None
+
+    for parent in root.iter():
+        for child in list(parent):
+            if not isinstance(child.tag, str) or _local_name(child.tag) in UNSAFE_SVG_ELEMENTS:
+                parent.remove(child)
+        for attribute in list(parent.attrib):
+            name = _local_name(attribute).lower()
+            value = parent.attrib[attribute].strip()
+            if name.startswith('on'):
+                del parent.attrib[attribute]
+            elif name == 'href' and not SAFE_HREF.match(value):
+                del parent.attrib[attribute]
+            elif 'javascript:' in value.lower():
+                del parent.attrib[attribute]
+    return ET.tostring(root, encoding='utf-8')
+
+
+def _encode(image, quality):
+    buffer = io.BytesIO()
+    if features.check('webp'):
+        image.save(buffer, 'WEBP', quality=quality, method=6)
+        return buffer.getvalue(), 'image/webp'
+    image.save(buffer, 'PNG', optimize=True)
+    return buffer.getvalue(), 'image/png'
+
+
+def _resized(image, size, quality):
+    copy = image.copy()
+    copy.thumbnail((size, size), Image.LANCZOS)
+    return _encode(copy, quality)
+
+
+def normalize_logo(image_data, content_type, sizes, max_dimension, quality):
+    """Prepare a downloaded logo for caching.
+
+    Returns (image_data, content_type, variants) where variants maps each
+    pixel size smaller than the image to (data, content_type). SVGs come
+    back sanitized with no variants since they scale themselves; rasters
+    larger than max_dimension are shrunk. Anything that can't be decoded is
+    returned unchanged.
+    """
+    if content_type.split(';')[0].strip() == 'image/svg+xml':
+        sanitized = sanitize_svg(image_data)
+        if sanitized is None:
+            raise ValueError("SVG logo could not be sanitized")
+        return sanitized, 'image/svg+xml', {}
+
+    if Image is None:
+        return image_data, content_type, {}
+
+    try:
+        image = Image.open(io.BytesIO(image_data))
+        image.load()
+    except Exception:
+        return image_data, content_type, {}
+
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA')
+
+    longest = max(image.size)
+    if longest > max_dimension:
+        image_data, content_type = _resized(image, max_dimension, quality)
+        longest = max_dimension
+
+    variants = {size: _resized(image, size, quality) for size in sizes if size < longest}
+    return image_data, content_type, variants
@@ -0,0 +1,58 @@
+"""
+Keyset (cursor) pagination helpers for list endpoints
+"""
+import base64
+import hashlib
+import json
+from datetime import date, datetime
+from app.config import Config
+from app.utils.redis_client import get_text_redis
+
+
+def encode_cursor(sort_value, row_id):
+    """Build an opaque cursor pointing just past (sort_value, row_id)"""
+    if isinstance(sort_value, (datetime, date)):
+        sort_value = sort_value.isoformat()
+    payload = json.dumps([sort_value, row_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token, value_type=datetime):
+    """Parse a cursor back into (sort_value, row_id); raises ValueError if malformed"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        if sort_value is not None:
+            sort_value = value_type.fromisoformat(sort_value)
+        return sort_value, int(row_id)
+    except (TypeError, ValueError, UnicodeError) as e:
+        raise ValueError(f"Invalid cursor: {e}")
+
+
+def cached_count(scope, filters, count_func):
+    """Return a list total, reusing a recent value for the same filters.
+
+    Totals only drive the page counter in the admin UI, so a value up to
+    ADMIN_COUNT_CACHE_TTL seconds old is fine and saves a second scan of
+    the table on every page turn and search keystroke.
+    """
+    digest = hashlib.sha1(json.dumps(filters, sort_keys=True).encode('utf-8')).hexdigest()
+    key = f"list_count:{scope}:{digest}"
+
+    redis_client = get_text_redis()
+    if redis_client:
+        try:
+            cached = redis_client.get(key)
+            if cached is not None:
+                return int(cached)
+        except Exception as e:
+            Config.log_warning(f"Count cache read failed for {scope}: {e}", 'pagination')
+
+    total = count_func()
+
+    if redis_client:
+        try:
+            redis_client.setex(key, Config.ADMIN_COUNT_CACHE_TTL, total)
+        except Exception as e:
+            Config.log_warning(f"Count cache write failed for {scope}: {e}", 'pagination')
+    return total
@@ -0,0 +1,207 @@
+"""
+bcrypt hashing and verification on a dedicated process pool
+
+bcrypt is deliberately slow (tens to hundreds of ms per call). Running it
+in worker processes keeps that CPU time out of the server process and
+spreads a login storm across every core. The number of hashes queued or
+running per server process is capped at BCRYPT_MAX_PENDING. Admission is
+checked without waiting: a caller that finds the cap reached gets
+PasswordHasherBusy at once, so overload is answered with 503 instead of
+growing a queue of parked threads. Async callers await the worker's
+future on the event loop and hold no thread while the hash runs.
+
+The pool uses the spawn start method, because forking a process that
+already runs threads is unsafe. Workers are handed bcrypt's own functions,
+so they only import bcrypt and not the application.
+"""
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import bcrypt
+from app.config import Config
+from app.utils.executors import run_cpu
+
+
+class PasswordHasherBusy(Exception):
+    """Too many hashes are already queued on this server process"""
+
+
+class PasswordHasher:
+    """Process pool for bcrypt with a cap on queued work and queue-depth counters"""
+
+    def __init__(self):
+        self._executor = None
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(Config.BCRYPT_MAX_PENDING)
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.counters = {'hashed': 0, 'verified': 0, 'rejected': 0, 'errors': 0, 'pool_restarts': 0}
+        self.time_total = 0.0
+
+    @property
+    def processes(self):
+        return Config.BCRYPT_PROCESSES
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.processes,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._executor
+
+    def _reset_executor(self, broken):
+        # A worker died (e.g. OOM-killed); replace the pool unless another caller already did
+        with self._lock:
+            if self._executor is broken:
+                self._executor = None
+                self.counters['pool_restarts'] += 1
+        broken.shutdown(wait=False)
+
+    def start(self):
+        """Spawn the worker processes ahead of the first login"""
+        if self.processes <= 0:
+            return
+        executor = self._get_executor()
+        for _ in range(self.processes):
+            executor.submit(bcrypt.gensalt)
+        Config.log_info(f"Password hasher started with {self.processes} processes", 'auth')
+
+    def close(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _admit(self):
+        """Take a slot without waiting; a full queue is refused straight away"""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.counters['rejected'] += 1
+            raise PasswordHasherBusy("Password hashing queue is full")
+        with self._lock:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        return time.monotonic()
+
+    def _release_slot(self, started, counter):
+        with self._lock:
+            self.in_flight -= 1
+            self.counters[counter] += 1
+            self.time_total += time.monotonic() - started
+        self._slots.release()
+
+    def _submit(self, counter, func, args):
+        """Admit and submit one call; returns (executor, future).
+
+        The slot is released when the worker finishes, not when the caller
+        stops waiting, so abandoned hashes still count against the cap.
+        """
+        started = self._admit()
+        executor = self._get_executor()
+        try:
+            future = executor.submit(func, *args)
+        except BrokenProcessPool:
+            self._release_slot(started, 'errors')
+            self._reset_executor(executor)
+            raise
+        except Exception:
+            self._release_slot(started, 'errors')
+            raise
+        future.add_done_callback(
+            lambda done: self._release_slot(started, 'errors' if done.cancelled() or done.exception() else counter)
+        )
+        return executor, future
+
+    def _run(self, counter, func, *args):
+        """Run func(*args) in a worker process, blocking the calling thread until done.
+
+        Only for code that is already synchronous (sync views, CLI); async
+        handlers use _run_async so no I/O thread is parked on the pool.
+        """
+        if self.processes <= 0:
+            # Pool disabled: hash on the calling thread (bcrypt releases the GIL)
+            started = self._admit()
+            outcome = 'errors'
+            try:
+                result = func(*args)
+                outcome = counter
+                return result
+            finally:
+                self._release_slot(started, outcome)
+
+        for attempt in range(2):
+            executor, future = self._submit(counter, func, args)
+            try:
+                return future.result()
+            except BrokenProcessPool:
+                # A worker died (e.g. OOM-killed); retry once on a fresh pool
+                self._reset_executor(executor)
+                if attempt:
+                    raise
+
+    async def _run_async(self, counter, func, *args):
+        """Run func(*args) in a worker process and await it on the event loop"""
+        if self.processes <= 0:
+            started = self._admit()
+            outcome = 'errors'
+            try:
+                result = await run_cpu(func, *args)
+                outcome = counter
+                return result
+            finally:
+                self._release_slot(started, outcome)
+
+        for attempt in range(2):
+            executor, future = self._submit(counter, func, args)
+            try:
+                return await asyncio.wrap_future(future)
+            except BrokenProcessPool:
+                self._reset_executor(executor)
+                if attempt:
+                    raise
+
+    def hash(self, password):
+        """bcrypt hash of a str password, as str"""
+        salt = bcrypt.gensalt(rounds=Config.BCRYPT_ROUNDS)
+        return self._run('hashed', bcrypt.hashpw, password.encode('utf-8'), salt).decode('utf-8')
+
+    def check(self, password_bytes, hash_bytes):
+        """bcrypt.checkpw in a worker; raises ValueError for a malformed hash like checkpw does"""
+        return self._run('verified', bcrypt.checkpw, password_bytes, hash_bytes)
+
+    async def hash_async(self, password):
+        """hash() for async handlers, awaited on the event loop without holding a thread"""
+        salt = bcrypt.gensalt(rounds=Config.BCRYPT_ROUNDS)
+        return (await self._run_async('hashed', bcrypt.hashpw, password.encode('utf-8'), salt)).decode('utf-8')
+
+    async def check_async(self, password_bytes, hash_bytes):
+        """check() for async handlers"""
+        return await self._run_async('verified', bcrypt.checkpw, password_bytes, hash_bytes)
+
+    def stats(self):
+        """Pool size, queue depth and counters for this server process"""
+        with self._lock:
+            completed = self.counters['hashed'] + self.counters['verified'] + self.counters['errors']
+            return {
+                "processes": self.processes,
+                "max_pending": Config.BCRYPT_MAX_PENDING,
+                "in_flight": self.in_flight,
+                # Calls waiting for a free worker process
+                "queue_depth": max(self.in_flight - max(self.processes, 1), 0),
+                "peak_in_flight": self.peak_in_flight,
+                **self.counters,
+                "avg_seconds": round(self.time_total / completed, 4) if completed else 0.0
+            }
+
+
+def get_password_hasher_stats():
+    """Expose password hasher counters for monitoring endpoints"""
+    return password_hasher.stats()
+
+# Global instance
+password_hasher = PasswordHasher()
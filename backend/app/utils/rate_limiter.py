@@ -0,0 +1,234 @@
+"""
+Per-route rate limiting backed by an atomic Redis token bucket
+
+Each policy is a token bucket shared by every worker through Redis: a
+client may burst up to ``burst`` requests, refilled at ``limit`` per
+``period`` seconds. The refill-and-take step runs as one Lua script so
+concurrent workers can't both spend the last token. A client that gets
+rejected is also remembered in-process until its retry time, so a client
+hammering a limited route is turned away without a Redis round trip.
+When Redis is unavailable requests are let through (fail open).
+"""
+import inspect
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+import jwt
+from quart import request, jsonify, current_app
+from app.config import Config
+from app.utils.executors import run_io
+from app.utils.redis_client import get_text_redis
+from app.utils.security import SecurityUtils
+
+# name -> (limit, period in seconds, burst)
+RATE_LIMIT_POLICIES = {
+    'login': (10, 60, 5),
+    'register': (5, 3600, 3),
+    'send_email': (5, 900, 3),  # resend verification, forgot password
+    'reset_password': (10, 900, 5),
+    'verify_token': (30, 60, 10),  # links opened from emails
+    'validate_password': (60, 60, 20),  # called (debounced) while typing
+    'account': (10, 900, 5),  # password, email and account changes
+    'jobs_read': (300, 60, 100),
+    'jobs_write': (60, 60, 30),
+    'logo_image': (600, 60, 200),  # job lists render one logo per row
+    'logo_search': (30, 60, 10),
+    'logo_lookup': (60, 60, 20),
+    'logo_batch': (30, 60, 10),
+    'admin': (300, 60, 100)
+}
+
+KEY_PREFIX = 'rate_limit:'
+
+# KEYS: bucket hash; ARGV: now (ms), capacity, refill per ms, cost, ttl (ms)
+# Returns {allowed, tokens left, ms until enough tokens}
+TOKEN_BUCKET_SCRIPT = """
+    local now = tonumber(ARGV[1])
+    local capacity = tonumber(ARGV[2])
+    local rate = tonumber(ARGV[3])
+    local cost = tonumber(ARGV[4])
+    local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local tokens = tonumber(bucket[1]) or capacity
+    local ts = tonumber(bucket[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+    local allowed = 0
+    local retry_after = 0
+    if tokens >= cost then
+        tokens = tokens - cost
+        allowed = 1
+    else
+        retry_after = math.ceil((cost - tokens) / rate)
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+    redis.call('PEXPIRE', KEYS[1], ARGV[5])
+    return {allowed, math.floor(tokens), retry_after}
+"""
+
+
+class RateLimiter:
+    """Token buckets in Redis with an in-process tier for clients already over their limit"""
+
+    def __init__(self, policies):
+        self.policies = policies
+        self._script = None
+        self._blocked = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_error_log = 0.0
+        self.counters = {name: {'allowed': 0, 'rejected': 0, 'local_rejected': 0, 'errors': 0} for name in policies}
+
+    def _count(self, policy_name, outcome):
+        with self._lock:
+            self.counters[policy_name][outcome] += 1
+
+    def _blocked_for(self, key):
+        """Seconds the key is still known to be limited, 0 if not blocked locally"""
+        with self._lock:
+            blocked_until = self._blocked.get(key)
+            if blocked_until is None:
+                return 0
+            remaining = blocked_until - time.monotonic()
+            if remaining <= 0:
+                del self._blocked[key]
+                return 0
+            return remaining
+
+    def _block(self, key, seconds):
+        with self._lock:
+            self._blocked[key] = time.monotonic() + seconds
+            self._blocked.move_to_end(key)
+            while len(self._blocked) > Config.RATE_LIMIT_LOCAL_MAX_KEYS:
+                self._blocked.popitem(last=False)
+
+    def check(self, policy_name, identity):
+        """Spend one token for identity under a policy; returns (allowed, retry_after seconds)"""
+        limit, period, burst = self.policies[policy_name]
+        key = KEY_PREFIX + SecurityUtils.rate_limit_key({'remote_addr': identity, 'endpoint': policy_name})
+
+        blocked = self._blocked_for(key)
+        if blocked:
+            self._count(policy_name, 'local_rejected')
+            return False, math.ceil(blocked)
+
+        text_redis = get_text_redis()
+        if not text_redis:
+            return True, 0
+
+        rate = limit / (period * 1000.0)
+        try:
+            if self._script is None:
+                self._script = text_redis.register_script(TOKEN_BUCKET_SCRIPT)
+            allowed, _, retry_after_ms = self._script(
+                keys=[key],
+                args=[int(time.time() * 1000), burst, rate, 1, math.ceil(burst / rate)]
+            )
+        except Exception as e:
+            self._count(policy_name, 'errors')
+            now = time.monotonic()
+            if now - self._last_error_log > 60:
+                self._last_error_log = now
+                Config.log_warning(f"Rate limiter unavailable, allowing requests: {e}", 'rate_limit')
+            return True, 0
+
+        if allowed:
+            self._count(policy_name, 'allowed')
+            return True, 0
+
+        retry_after = max(retry_after_ms / 1000.0, 1)
+        self._block(key, retry_after)
+        self._count(policy_name, 'rejected')
+        return False, math.ceil(retry_after)
+
+    def stats(self):
+        """Per-policy decision counters for this process"""
+        with self._lock:
+            return {
+                "enabled": Config.RATE_LIMIT_ENABLED,
+                "locally_blocked_keys": len(self._blocked),
+                "policies": {
+                    name: {
+                        "limit": limit,
+                        "period": period,
+                        "burst": burst,
+                        **self.counters[name]
+                    }
+                    for name, (limit, period, burst) in self.policies.items()
+                }
+            }
+
+
+def client_identity():
+    """Authenticated user when known, otherwise the client IP"""
+    user_id = getattr(request, 'current_user_id', None) or bearer_user_id()
+    if user_id:
+        return f"user:{user_id}"
+    ip = request.remote_addr
+    if Config.RATE_LIMIT_TRUSTED_PROXIES:
+        # Only hops appended by our own proxies can be trusted; anything further left is client-supplied
+        forwarded = [hop.strip() for hop in request.headers.get('X-Forwarded-For', '').split(',') if hop.strip()]
+        if forwarded:
+            ip = forwarded[-min(Config.RATE_LIMIT_TRUSTED_PROXIES, len(forwarded))]
+    return ip or 'unknown'
+
+
+def bearer_user_id():
+    """User id from a valid bearer token, checked by signature only.
+
+    Limits run before token_required, so the user is identified without
+    the principal lookup; invalid or expired tokens fall back to the IP.
+    """
+    auth_header = request.headers.get('Authorization', '')
+    if not auth_header.startswith('Bearer '):
+        return None
+    try:
+        data = jwt.decode(auth_header[7:], current_app.config['SECRET_KEY'], algorithms=["HS256"])
+    except jwt.InvalidTokenError:
+        return None
+    return data.get('sub')
+
+
+def rate_limited_response(retry_after):
+    response = jsonify({
+        "error": "Too many requests, please try again later",
+        "message": "Too many requests, please try again later",
+        "retry_after": retry_after
+    })
+    response.status_code = 429
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+
+def rate_limit(policy_name):
+    """Decorator applying a named policy to a sync or async view"""
+    if policy_name not in RATE_LIMIT_POLICIES:
+        raise ValueError(f"Unknown rate limit policy: {policy_name}")
+
+    def decorator(f):
+        if inspect.iscoroutinefunction(f):
+            @wraps(f)
+            async def decorated(*args, **kwargs):
+                if Config.RATE_LIMIT_ENABLED:
+                    allowed, retry_after = await run_io(rate_limiter.check, policy_name, client_identity())
+                    if not allowed:
+                        return rate_limited_response(retry_after)
+                return await f(*args, **kwargs)
+        else:
+            # Sync views already run on a worker thread
+            @wraps(f)
+            def decorated(*args, **kwargs):
+                if Config.RATE_LIMIT_ENABLED:
+                    allowed, retry_after = rate_limiter.check(policy_name, client_identity())
+                    if not allowed:
+                        return rate_limited_response(retry_after)
+                return f(*args, **kwargs)
+        return decorated
+    return decorator
+
+
+def get_rate_limit_stats():
+    """Expose rate limiter counters for monitoring endpoints"""
+    return rate_limiter.stats()
+
+# Global instance
+rate_limiter = RateLimiter(RATE_LIMIT_POLICIES)
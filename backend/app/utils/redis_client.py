@@ -0,0 +1,131 @@
+"""
+Shared Redis connection pools and clients
+"""
+import ssl
+import threading
+import time
+import redis
+from app.config import Config
+
+_clients = {}
+_lock = threading.Lock()
+
+
+class InstrumentedConnectionPool(redis.BlockingConnectionPool):
+    """Blocking connection pool that keeps usage counters for monitoring.
+
+    Callers wait up to ``timeout`` seconds for a free connection once
+    ``max_connections`` are checked out, instead of opening more.
+    """
+
+    def __init__(self, **kwargs):
+        # Counters must exist before the base class calls reset()
+        self._stats_lock = threading.Lock()
+        self.created = 0
+        self.in_use = 0
+        self.checkouts = 0
+        self.failed_checkouts = 0
+        self.wait_time_total = 0.0
+        super().__init__(**kwargs)
+
+    def make_connection(self):
+        connection = super().make_connection()
+        with self._stats_lock:
+            self.created += 1
+        return connection
+
+    def get_connection(self, *args, **kwargs):
+        started = time.monotonic()
+        try:
+            connection = super().get_connection(*args, **kwargs)
+        except Exception:
+            with self._stats_lock:
+                self.failed_checkouts += 1
+            raise
+        with self._stats_lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.wait_time_total += time.monotonic() - started
+        return connection
+
+    def release(self, connection):
+        with self._stats_lock:
+            self.in_use = max(self.in_use - 1, 0)
+        super().release(connection)
+
+    def stats(self):
+        """Return a snapshot of pool usage counters"""
+        with self._stats_lock:
+            return {
+                "max_connections": self.max_connections,
+                "created": self.created,
+                "in_use": self.in_use,
+                "checkouts": self.checkouts,
+                "failed_checkouts": self.failed_checkouts,
+                "wait_time_total": round(self.wait_time_total, 3)
+            }
+
+
+def get_redis_config():
+    """Build redis connection keyword arguments from Config (password and SSL included)"""
+    redis_config = {
+        'host': Config.REDIS_HOST,
+        'port': Config.REDIS_PORT,
+        'db': Config.REDIS_DB,
+        'socket_timeout': 10,
+        'socket_connect_timeout': 10
+    }
+
+    # Add password if configured
+    if Config.REDIS_PASSWORD:
+        redis_config['password'] = Config.REDIS_PASSWORD
+
+    # Add SSL configuration if enabled
+    if Config.REDIS_SSL:
+        redis_config['connection_class'] = redis.SSLConnection
+        if Config.REDIS_SSL_CERT_REQS:
+            if Config.REDIS_SSL_CERT_REQS.lower() == 'required':
+                redis_config['ssl_cert_reqs'] = ssl.CERT_REQUIRED
+            elif Config.REDIS_SSL_CERT_REQS.lower() == 'optional':
+                redis_config['ssl_cert_reqs'] = ssl.CERT_OPTIONAL
+            else:
+                redis_config['ssl_cert_reqs'] = ssl.CERT_NONE
+
+    return redis_config
+
+
+def _get_client(decode_responses):
+    client = _clients.get(decode_responses)
+    if client is None:
+        with _lock:
+            client = _clients.get(decode_responses)
+            if client is None:
+                if not Config.REDIS_HOST:
+                    return None
+                pool = InstrumentedConnectionPool(
+                    max_connections=Config.REDIS_MAX_CONNECTIONS,
+                    timeout=Config.REDIS_POOL_TIMEOUT,
+                    decode_responses=decode_responses,
+                    **get_redis_config()
+                )
+                client = redis.Redis(connection_pool=pool)
+                _clients[decode_responses] = client
+    return client
+
+
+def get_binary_redis():
+    """Return the process-wide binary Redis client (raw bytes, e.g. images), or None if unavailable"""
+    return _get_client(False)
+
+
+def get_text_redis():
+    """Return the process-wide text (decode_responses=True) Redis client, or None if unavailable"""
+    return _get_client(True)
+
+
+def get_redis_pool_stats():
+    """Expose Redis pool counters for monitoring endpoints"""
+    return {
+        ("text" if decode_responses else "binary"): client.connection_pool.stats()
+        for decode_responses, client in list(_clients.items())
+    }
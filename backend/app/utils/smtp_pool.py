@@ -0,0 +1,188 @@
+"""
+Pooled, authenticated SMTP sessions shared by the email senders
+"""
+import smtplib
+import threading
+import time
+from collections import deque
+from app.config import Config
+
+# Errors that mean the session itself is gone, so a fresh one may succeed
+CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class SMTPConnectionPool:
+    """Keeps logged-in SMTP sessions warm and lends them out one caller at a time.
+
+    A session idle for EMAIL_SMTP_NOOP_AFTER seconds is checked with NOOP
+    before reuse; sessions idle past EMAIL_SMTP_MAX_IDLE (servers drop them
+    anyway) or that have sent EMAIL_SMTP_MAX_MESSAGES are retired.
+    """
+
+    def __init__(self, host, port, username, password, max_size):
+        self.settings = (host, port, username, password)
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.max_size = max_size
+        self._idle = deque()
+        self._open = 0
+        self._closed = False
+        self._condition = threading.Condition()
+        self.counters = {'created': 0, 'reused': 0, 'noop_failures': 0, 'retired': 0, 'messages': 0, 'send_errors': 0}
+
+    def _count(self, name):
+        with self._condition:
+            self.counters[name] += 1
+
+    def _connect(self):
+        # SMTP_SSL for port 465 (SSL), otherwise SMTP with STARTTLS (587)
+        if self.port == 465:
+            server = smtplib.SMTP_SSL(self.host, self.port, timeout=Config.EMAIL_SMTP_TIMEOUT)
+        else:
+            server = smtplib.SMTP(self.host, self.port, timeout=Config.EMAIL_SMTP_TIMEOUT)
+            server.starttls()
+        server.login(self.username, self.password)
+        self._count('created')
+        return {'server': server, 'last_used': time.monotonic(), 'messages': 0, 'reused': False}
+
+    def _usable(self, session):
+        idle = time.monotonic() - session['last_used']
+        if idle > Config.EMAIL_SMTP_MAX_IDLE or session['messages'] >= Config.EMAIL_SMTP_MAX_MESSAGES:
+            return False
+        if idle > Config.EMAIL_SMTP_NOOP_AFTER:
+            try:
+                if session['server'].noop()[0] != 250:
+                    raise smtplib.SMTPException("NOOP rejected")
+            except Exception:
+                self._count('noop_failures')
+                return False
+        return True
+
+    @staticmethod
+    def _close(session):
+        try:
+            session['server'].quit()
+        except Exception:
+            try:
+                session['server'].close()
+            except Exception:
+                pass
+
+    def acquire(self):
+        """Lend out a live session, opening one if the pool has room"""
+        deadline = time.monotonic() + Config.EMAIL_SMTP_POOL_TIMEOUT
+        while True:
+            with self._condition:
+                while not self._idle and self._open >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise smtplib.SMTPException("Timed out waiting for a pooled SMTP connection")
+                    self._condition.wait(remaining)
+                if self._idle:
+                    # Most recently used first: the likeliest to still be alive
+                    session = self._idle.pop()
+                else:
+                    self._open += 1
+                    session = None
+
+            if session is None:
+                try:
+                    return self._connect()
+                except Exception:
+                    self._discard_slot()
+                    raise
+
+            # Checked outside the lock: NOOP is a network round trip
+            if self._usable(session):
+                session['reused'] = True
+                self._count('reused')
+                return session
+            self._close(session)
+            self._count('retired')
+            self._discard_slot()
+
+    def _discard_slot(self):
+        with self._condition:
+            self._open -= 1
+            self._condition.notify()
+
+    def release(self, session, discard=False):
+        """Return a session to the pool, or drop it if it may be broken"""
+        if discard or self._closed:
+            self._close(session)
+            self._discard_slot()
+            return
+        session['last_used'] = time.monotonic()
+        with self._condition:
+            self._idle.append(session)
+            self._condition.notify()
+
+    def send(self, from_addr, to_addrs, message):
+        """Send one message on a pooled session, retrying once if a reused session turns out dead"""
+        for attempt in range(2):
+            session = self.acquire()
+            try:
+                session['server'].sendmail(from_addr, to_addrs, message)
+            except CONNECTION_ERRORS:
+                self.release(session, discard=True)
+                if session['reused'] and attempt == 0:
+                    continue
+                self._count('send_errors')
+                raise
+            except Exception:
+                # Refused recipients etc. leave the session in an unknown state
+                self.release(session, discard=True)
+                self._count('send_errors')
+                raise
+            session['messages'] += 1
+            self._count('messages')
+            self.release(session)
+            return
+
+    def close_all(self):
+        """Quit every idle session and stop pooling returned ones"""
+        with self._condition:
+            self._closed = True
+            sessions = list(self._idle)
+            self._idle.clear()
+            self._open -= len(sessions)
+        for session in sessions:
+            self._close(session)
+
+    def stats(self):
+        with self._condition:
+            return {
+                "max_size": self.max_size,
+                "open": self._open,
+                "idle": len(self._idle),
+                **self.counters
+            }
+
+
+def get_smtp_pool(host, port, username, password):
+    """Return the process-wide SMTP pool, rebuilding it when the mail settings change"""
+    global _pool
+    settings = (host, port, username, password)
+    with _pool_lock:
+        if _pool is None or _pool.settings != settings:
+            if _pool is not None:
+                _pool.close_all()
+            _pool = SMTPConnectionPool(host, port, username, password, Config.EMAIL_SMTP_POOL_SIZE)
+        return _pool
+
+
+def close_smtp_pool():
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close_all()
+
+
+def get_smtp_pool_stats():
+    """Expose SMTP pool counters for monitoring endpoints"""
+    pool = _pool
+    return pool.stats() if pool else {}
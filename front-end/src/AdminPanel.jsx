@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { Transition } from '@headlessui/react';
 import axios from 'axios';
@@ -50,6 +50,7 @@ function AdminPanel({ darkMode, toggleTheme, isMobile }) {
   const [usersPagination, setUsersPagination] = useState({});
   const [usersSearch, setUsersSearch] = useState('');
   const [usersFilter, setUsersFilter] = useState('all'); // 'all', 'verified', 'unverified', 'admin', 'user'
+  const usersCursors = useRef({}); // page number -> cursor returned by the previous page
   
   // Jobs data
   const [jobs, setJobs] = useState([]);
@@ -57,6 +58,7 @@ function AdminPanel({ darkMode, toggleTheme, isMobile }) {
   const [jobsPagination, setJobsPagination] = useState({});
   const [jobsSearch, setJobsSearch] = useState('');
   const [jobsStatusFilter, setJobsStatusFilter] = useState('');
+  const jobsCursors = useRef({}); // page number -> cursor returned by the previous page
   
   // Job statuses data
   const [jobStatuses, setJobStatuses] = useState([]);
@@ -97,6 +99,7 @@ function AdminPanel({ darkMode, toggleTheme, isMobile }) {
     const delayedSearch = setTimeout(() => {
       if (activeTab === 'users') {
         setUsersPage(1); // Reset to first page when searching
+        usersCursors.current = {};
         loadUsers();
       }
     }, 300);
@@ -145,6 +148,7 @@ function AdminPanel({ darkMode, toggleTheme, isMobile }) {
     const delayedSearch = setTimeout(() => {
       if (activeTab === 'jobs') {
         setJobsPage(1); // Reset to first page when searching
+        jobsCursors.current = {};
         loadJobs();
       }
     }, 300);
@@ -212,6 +216,9 @@ function AdminPanel({ darkMode, toggleTheme, isMobile }) {
         per_page: 20,
         search: usersSearch.trim()
       };
+      if (usersCursors.current[usersPage]) {
+        params.cursor = usersCursors.current[usersPage];
+      }
       
       debugLog('Loading users with params:', params); // Debug log
       
@@ -222,8 +229,12 @@ function AdminPanel({ darkMode, toggleTheme, isMobile }) {
       
       debugLog('Users response:', response.data); // Debug log
       
+      const pagination = response.data.pagination || {};
+      if (pagination.next_cursor) {
+        usersCursors.current[usersPage + 1] = pagination.next_cursor;
+      }
       setUsers(response.data.users || []);
-      setUsersPagination(response.data.pagination || {});
+      setUsersPagination(pagination);
       setError(''); // Clear any previous errors
     } catch (error) {
       debugError('Error loading users:', error);
@@ -244,12 +255,18 @@ function AdminPanel({ darkMode, toggleTheme, isMobile }) {
         search: jobsSearch,
         status: jobsStatusFilter
       };
+      if (jobsCursors.current[jobsPage]) {
+        params.cursor = jobsCursors.current[jobsPage];
+      }
       
       const response = await axios.get(`${API_BASE_URL}/api/admin/jobs`, {
         headers: { Authorization: `Bearer ${token}` },
         params
       });
       
+      if (response.data.pagination?.next_cursor) {
+        jobsCursors.current[jobsPage + 1] = response.data.pagination.next_cursor;
+      }
       setJobs(response.data.jobs);
       setJobsPagination(response.data.pagination);
     } catch (error) {